@@ -4,7 +4,18 @@ from flask_restful import Api
 from dotenv import load_dotenv
 from server.extension import db, migrate, jwt,ma
 from server.route_controller import register_routes
+from server.commands import register_commands
 from server.firebase_init import auth
+from server.service.stream_upload import StreamingRequest
+from server.service.storage import init_storage
+from server.service.scratch import init_scratch
+from server.service.task_pool import init_cpu_pool, PoolSaturated
+from server.service.preview_cache import init_preview_cache
+from server.service.fx_rates import init_fx_rates
+from server.service.paystack import init_paystack
+from server.service.webhook_inbox import init_webhook_inbox
+from server.service.contract_renderer import init_contract_renderer
+from server.service.discounts import init_discount_cache
 import os
 from datetime import timedelta
 import logging
@@ -16,6 +27,7 @@ load_dotenv()
 
 def create_app():
     app = Flask(__name__)
+    app.request_class = StreamingRequest
     
   
     CORS(app,
@@ -36,6 +48,50 @@ def create_app():
     app.config["JWT_TOKEN_LOCATION"] = ["headers"]
     app.config["JWT_HEADER_NAME"] = "Authorization"
     app.config["JWT_HEADER_TYPE"] = "Bearer"
+    # opt-in: pipe multipart file parts straight to storage (FLASK_STREAMING_UPLOADS=true)
+    app.config["STREAMING_UPLOADS"] = False
+    # "cloudinary" or "local"; local keeps files under STORAGE_LOCAL_ROOT and serves them from /media
+    app.config["STORAGE_BACKEND"] = "cloudinary"
+    app.config["STORAGE_LOCAL_ROOT"] = os.path.join(os.getcwd(), "media")
+    app.config["STORAGE_PUBLIC_URL"] = "http://localhost:5000/media"
+    app.config["STORAGE_POOL_SIZE"] = 16
+    # temp files for transcodes and PDFs; point at a tmpfs mount to keep them off disk
+    app.config["SCRATCH_DIR"] = None
+    app.config["SCRATCH_QUOTA_MB"] = 2048
+    # process pool for transcodes, audio analysis and PDF rendering; 0 workers runs them inline
+    app.config["CPU_POOL_WORKERS"] = max(1, (os.cpu_count() or 2) // 2)
+    app.config["CPU_POOL_QUEUE_DEPTH"] = 8
+    app.config["CPU_POOL_RETRY_AFTER"] = 10
+    # mix producers' voice tags into previews, once every PREVIEW_WATERMARK_INTERVAL seconds
+    app.config["PREVIEW_WATERMARK"] = True
+    app.config["PREVIEW_WATERMARK_INTERVAL"] = 10
+    # local disk LRU of previews served by /beats/<id>/preview
+    app.config["PREVIEW_CACHE_DIR"] = None
+    app.config["PREVIEW_CACHE_MAX_MB"] = 1024
+    # USD->KES rates for checkout: "exchangerate_host", or "file" with FX_RATE_FILE (JSON like {"USD/KES": 129.5})
+    app.config["FX_RATE_SOURCE"] = "exchangerate_host"
+    app.config["FX_RATE_FILE"] = None
+    app.config["FX_RATE_TTL"] = 3600
+    app.config["FX_RATE_MAX_STALE"] = 3 * 24 * 3600
+    app.config["FX_FALLBACK_RATES"] = {"USD/KES": 130.0}
+    # Paystack API client; point PAYSTACK_BASE_URL at a stub server for load tests
+    app.config["PAYSTACK_BASE_URL"] = "https://api.paystack.co"
+    app.config["PAYSTACK_POOL_SIZE"] = 10
+    app.config["PAYSTACK_MAX_RETRIES"] = 3
+    app.config["PAYSTACK_CONNECT_TIMEOUT"] = 3.05
+    app.config["PAYSTACK_READ_TIMEOUT"] = 15
+    # threads per worker process applying stored webhooks; 0 leaves it to 'flask webhooks drain'
+    app.config["WEBHOOK_WORKERS"] = 2
+    app.config["WEBHOOK_MAX_ATTEMPTS"] = 8
+    # threads per worker process rendering contract PDFs; 0 leaves it to 'flask contracts render'
+    app.config["CONTRACT_RENDER_WORKERS"] = 1
+    app.config["CONTRACT_RENDER_MAX_ATTEMPTS"] = 5
+    # seconds a stored Idempotency-Key response is replayed for
+    app.config["IDEMPOTENCY_TTL"] = 24 * 3600
+    # seconds a pending payment's Paystack page is handed back to a repeat Buy click
+    app.config["CHECKOUT_SESSION_TTL"] = 30 * 60
+    # seconds /api/discounts/validate may serve a code's cached state
+    app.config["DISCOUNT_CACHE_TTL"] = 5
    
     app.config.from_prefixed_env()
     app.config['SQLALCHEMY_ENGINE_OPTIONS'] = {
@@ -48,6 +104,15 @@ def create_app():
     api = Api(app)
     jwt.init_app(app)
     ma.init_app(app)
+    init_storage(app)
+    init_scratch(app)
+    init_cpu_pool(app)
+    init_preview_cache(app)
+    init_fx_rates(app)
+    init_paystack(app)
+    init_webhook_inbox(app)
+    init_contract_renderer(app)
+    init_discount_cache(app)
     
 
     # with app.app_context():
@@ -58,9 +123,14 @@ def create_app():
 
    
     register_routes(app)
+    register_commands(app)
 
     
  
+    @app.errorhandler(PoolSaturated)
+    def handle_pool_saturated(e):
+        return {"error": e.description}, 503, {"Retry-After": str(e.retry_after)}
+
     @app.errorhandler(Exception)
     def handle_error(e):
         app.logger.error(f"Unhandled error: {e}", exc_info=True)
@@ -0,0 +1,4 @@
+from .runner import run_benchmarks, compare_results, load_results
+from .stages import STAGES
+from .webhook_race import run_webhook_race
+from .admission_check import run_admission_check
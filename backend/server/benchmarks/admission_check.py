@@ -0,0 +1,131 @@
+import io
+import os
+import time
+import tempfile
+from contextlib import ExitStack
+from unittest import mock
+from flask import Flask
+from flask_restful import Api
+from server.extension import db
+from server.models import User
+from server.route_controller import register_routes
+from server.service import stream_upload
+from server.service.stream_upload import StreamingRequest
+from server.service.storage import init_storage
+from server.service.scratch import init_scratch
+from server.service.task_pool import init_cpu_pool, get_cpu_pool
+from server.service.upload_service import MAX_IMAGE_SIZE
+from server.utils import firebase_auth
+
+
+CHECK_TOKEN = "admission-check"
+CHECK_EMAIL = "admission-check@example.com"
+# how long upload threads get to delete what a rejected request had already stored
+CLEANUP_TIMEOUT = 5
+
+
+def _check_app(root):
+    app = Flask(__name__)
+    app.request_class = StreamingRequest
+    app.config.update(
+        SQLALCHEMY_DATABASE_URI=f"sqlite:///{os.path.join(root, 'check.db')}",
+        STREAMING_UPLOADS=True,
+        STORAGE_BACKEND="local",
+        STORAGE_LOCAL_ROOT=os.path.join(root, "media"),
+        STORAGE_PUBLIC_URL="http://localhost/media",
+        SCRATCH_DIR=os.path.join(root, "scratch"),
+        CPU_POOL_WORKERS=1,
+        CPU_POOL_QUEUE_DEPTH=0,
+        CPU_POOL_RETRY_AFTER=7
+    )
+    db.init_app(app)
+    Api(app)
+    init_storage(app)
+    init_scratch(app)
+    init_cpu_pool(app)
+    register_routes(app)
+    return app
+
+
+def _verify_token(token):
+    if token != CHECK_TOKEN:
+        raise ValueError("unknown token")
+    return {"uid": "admission-check", "email": CHECK_EMAIL, "name": "Admission Check", "role": "admin"}
+
+
+def run_admission_check(log=print):
+    """
+    Saturate the CPU pool and upload beats through the real route and
+    decorators, with streaming uploads on and Firebase token checks
+    answered locally. A busy pool must come back as a 503 with
+    Retry-After and rejected file parts as 400/413, not as a failed
+    login; a bad token must still be a 401. Parts stored before a later
+    part was rejected must be deleted. Runs in a throwaway SQLite
+    database and storage root.
+    """
+    root = tempfile.mkdtemp(prefix="admission-check-")
+    app = _check_app(root)
+    with app.app_context():
+        db.create_all()
+        db.session.add(User(name="Admission Check", email=CHECK_EMAIL, role="producer"))
+        db.session.commit()
+
+    client = app.test_client()
+    headers = {"Authorization": f"Bearer {CHECK_TOKEN}"}
+    checks = []
+
+    def expect(name, response, status, header=None, text=None):
+        ok = (
+            response.status_code == status
+            and (header is None or response.headers.get(header))
+            and (text is None or text in response.get_data(as_text=True))
+        )
+        checks.append({"check": name, "status": response.status_code, "expected": status, "ok": bool(ok)})
+        if not ok:
+            log(f"{name}: got {response.status_code} {response.get_data(as_text=True)[:200]}")
+
+    with mock.patch.object(firebase_auth.auth, "verify_id_token", _verify_token):
+        pool = get_cpu_pool()
+        with ExitStack() as held:
+            for _ in range(pool.workers + pool.queue_depth):
+                held.enter_context(pool.admission())
+            expect("saturated pool", client.post("/beats", headers=headers), 503, "Retry-After")
+            expect("bad token", client.post("/beats", headers={"Authorization": "Bearer nope"}), 401)
+        # with the pool free the same request gets as far as form validation
+        expect("pool free", client.post("/beats", headers=headers), 400)
+
+        def upload(**files):
+            data = {"title": "Admission Check", "price": "10"}
+            data.update({field: (io.BytesIO(body), name) for field, (name, body) in files.items()})
+            return client.post("/beats", headers=headers, data=data, content_type="multipart/form-data")
+
+        expect("unsupported file type", upload(mp3=("x.exe", b"MZ")), 400, text="Unsupported file type")
+        expect("oversize part", upload(cover=("cover.jpg", b"\0" * (MAX_IMAGE_SIZE + 1))), 413)
+        # a blank optional input is ignored, so the upload fails on the missing MP3 instead
+        expect("blank file input", upload(cover=("", b"")), 400, text="MP3 file is required")
+
+        # the cover is streamed to storage before the mp3 part is rejected; it must not be left
+        # behind. The parts are kept referenced, so only request teardown can clean them up,
+        # not garbage collection closing them.
+        created = []
+
+        class KeptUpload(stream_upload.StreamedUpload):
+            def __init__(self, *args, **kwargs):
+                super().__init__(*args, **kwargs)
+                created.append(self)
+
+        with mock.patch.object(stream_upload, "StreamedUpload", KeptUpload):
+            expect(
+                "good part, then rejected part",
+                upload(cover=("c.jpg", b"\xff\xd8cover"), mp3=("x.exe", b"MZ")), 400, text="Unsupported file type"
+            )
+        deadline = time.monotonic() + CLEANUP_TIMEOUT
+        for part in created:
+            part._thread.join(max(0.0, deadline - time.monotonic()))
+        media_root = app.config["STORAGE_LOCAL_ROOT"]
+        left = [name for _, _, names in os.walk(media_root) for name in names]
+        checks.append({"check": "rejected upload cleaned up", "left_in_storage": left, "ok": not left})
+        if left:
+            log(f"rejected upload cleaned up: {left} still stored")
+
+    return {"checks": checks, "ok": all(check["ok"] for check in checks)}
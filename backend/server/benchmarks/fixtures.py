@@ -0,0 +1,93 @@
+import os
+import wave
+import ffmpeg
+import numpy as np
+
+
+FIXTURE_SAMPLE_RATE = 44100
+# fixed seed: the same durations give byte-identical fixtures on every machine and commit
+FIXTURE_SEED = 1234
+BLOCK_SECONDS = 10
+TERMS_SIZES = {"terms_2kb": 2 * 1024, "terms_32kb": 32 * 1024}
+
+
+def _audio_block(rng, start, frames):
+    """A few seconds of beat-like stereo audio: chords, a kick every half second and noise."""
+    t = (start + np.arange(frames)) / FIXTURE_SAMPLE_RATE
+    chord = sum(np.sin(2 * np.pi * f * t) for f in (110.0, 164.8, 220.0, 329.6)) * 0.12
+    kick = np.sin(2 * np.pi * 55 * t) * np.exp(-12 * (t % 0.5)) * 0.5
+    noise = rng.standard_normal((frames, 2)) * 0.02
+    left = chord + kick + noise[:, 0]
+    right = chord * 0.8 + kick + noise[:, 1]
+    return (np.clip(np.stack([left, right], axis=1), -1, 1) * 32767).astype("<i2")
+
+
+def make_wav(path, seconds):
+    rng = np.random.default_rng(FIXTURE_SEED)
+    total = int(seconds * FIXTURE_SAMPLE_RATE)
+    with wave.open(path, "wb") as out:
+        out.setnchannels(2)
+        out.setsampwidth(2)
+        out.setframerate(FIXTURE_SAMPLE_RATE)
+        for start in range(0, total, BLOCK_SECONDS * FIXTURE_SAMPLE_RATE):
+            frames = min(BLOCK_SECONDS * FIXTURE_SAMPLE_RATE, total - start)
+            out.writeframes(_audio_block(rng, start, frames).tobytes())
+    return path
+
+
+def make_mp3(path, wav_path):
+    (
+        ffmpeg
+        .input(wav_path)
+        .output(path, format="mp3", acodec="libmp3lame", audio_bitrate="320k", map_metadata=-1)
+        .overwrite_output()
+        .run(quiet=True)
+    )
+    return path
+
+
+def make_terms(path, size):
+    clause = (
+        "The licensee may use the beat in one commercial release and must credit the "
+        "producer in its metadata. Resale or redistribution of the beat itself is prohibited. "
+    )
+    paragraphs = []
+    while sum(len(p) for p in paragraphs) < size:
+        paragraphs.append(f"{len(paragraphs) + 1}. " + clause * 3)
+    with open(path, "w") as out:
+        out.write("\n".join(paragraphs)[:size])
+    return path
+
+
+def build_fixtures(fixtures_dir, durations):
+    """
+    Create (or reuse) the WAV/MP3 fixture for each duration plus the contract
+    terms fixtures. Returns one dict per fixture with name, kind, path, bytes
+    and audio seconds.
+    """
+    os.makedirs(fixtures_dir, exist_ok=True)
+    fixtures = []
+    for seconds in durations:
+        wav_path = os.path.join(fixtures_dir, f"wav_{seconds}s.wav")
+        mp3_path = os.path.join(fixtures_dir, f"mp3_{seconds}s.mp3")
+        if not os.path.exists(wav_path):
+            make_wav(wav_path + ".part", seconds)
+            os.replace(wav_path + ".part", wav_path)
+        if not os.path.exists(mp3_path):
+            make_mp3(mp3_path + ".part.mp3", wav_path)
+            os.replace(mp3_path + ".part.mp3", mp3_path)
+        for kind, path in (("wav", wav_path), ("mp3", mp3_path)):
+            fixtures.append({
+                "name": f"{kind}_{seconds}s",
+                "kind": kind,
+                "path": path,
+                "bytes": os.path.getsize(path),
+                "seconds": seconds,
+            })
+
+    for name, size in TERMS_SIZES.items():
+        path = os.path.join(fixtures_dir, f"{name}.txt")
+        if not os.path.exists(path):
+            make_terms(path, size)
+        fixtures.append({"name": name, "kind": "terms", "path": path, "bytes": os.path.getsize(path), "seconds": None})
+    return fixtures
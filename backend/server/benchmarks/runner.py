@@ -0,0 +1,308 @@
+import os
+import sys
+import time
+import uuid
+import json
+import shutil
+import platform
+import resource
+import tempfile
+import threading
+import statistics
+import subprocess
+import multiprocessing
+from datetime import datetime
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from flask import Flask
+from server.service.stream_upload import StreamingRequest
+from server.service.storage import init_storage
+from server.service.scratch import init_scratch
+from server.service.task_pool import init_cpu_pool
+from .fixtures import build_fixtures
+from .stages import STAGES
+
+
+RESULTS_VERSION = 1
+DISK_SAMPLE_INTERVAL = 0.01
+# metrics compared between runs; all of them are better when lower
+COMPARED_METRICS = ("wall_per_op_s", "cpu_per_op_s", "peak_rss_kb", "peak_tree_rss_kb", "peak_temp_bytes")
+
+
+def _status_kb(pid, field):
+    """A kB field of /proc/<pid>/status, 0 where /proc isn't available."""
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith(field + ":"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return 0
+
+
+def _descendants(pid):
+    found = []
+    try:
+        for tid in os.listdir(f"/proc/{pid}/task"):
+            with open(f"/proc/{pid}/task/{tid}/children") as f:
+                found.extend(int(child) for child in f.read().split())
+    except OSError:
+        return []
+    for child in list(found):
+        found.extend(_descendants(child))
+    return found
+
+
+def _reset_peak_rss():
+    # Linux only; without it VmHWM still holds the peak of the parent we were spawned from
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+        return True
+    except OSError:
+        return False
+
+
+class ResourceSampler:
+    """
+    Polls on a thread and keeps the peaks of a directory tree's size and of
+    the RSS summed over this process and its children (ffmpeg included).
+    """
+
+    def __init__(self, root, interval=DISK_SAMPLE_INTERVAL):
+        self.root = root
+        self.interval = interval
+        self.peak_bytes = 0
+        self.peak_tree_rss_kb = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _size(self):
+        total = 0
+        for dirpath, _, filenames in os.walk(self.root):
+            for name in filenames:
+                try:
+                    total += os.path.getsize(os.path.join(dirpath, name))
+                except OSError:
+                    pass
+        return total
+
+    def _sample(self):
+        pid = os.getpid()
+        tree_rss = sum(_status_kb(p, "VmRSS") for p in [pid] + _descendants(pid))
+        self.peak_tree_rss_kb = max(self.peak_tree_rss_kb, tree_rss)
+        self.peak_bytes = max(self.peak_bytes, self._size())
+
+    def _run(self):
+        while not self._stop.is_set():
+            self._sample()
+            self._stop.wait(self.interval)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        self._sample()
+
+
+def _bench_app(work_dir):
+    """
+    Minimal app for one cell: local storage stub, scratch and temp files
+    under work_dir/tmp, and the CPU pool disabled so ffmpeg and PDF work
+    is charged to the measuring process.
+    """
+    app = Flask(__name__)
+    app.request_class = StreamingRequest
+    app.config.update(
+        STORAGE_BACKEND="local",
+        STORAGE_LOCAL_ROOT=os.path.join(work_dir, "storage"),
+        STORAGE_PUBLIC_URL="http://localhost:5000/media",
+        SCRATCH_DIR=os.path.join(work_dir, "tmp", "scratch"),
+        CPU_POOL_WORKERS=0,
+    )
+    init_storage(app)
+    init_scratch(app)
+    init_cpu_pool(app)
+    return app
+
+
+def _usage():
+    own = resource.getrusage(resource.RUSAGE_SELF)
+    children = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return own, children
+
+
+def measure_cell(stage, fixture, concurrency, repeat, work_dir):
+    """
+    Time one (stage, fixture, concurrency) cell. Runs in a fresh process so
+    CPU time and peak RSS belong to this cell alone: each of the repeat
+    rounds runs the operation on concurrency threads at once, after one
+    untimed warm-up.
+    """
+    temp_root = os.path.join(work_dir, "tmp")
+    os.makedirs(temp_root, exist_ok=True)
+    tempfile.tempdir = temp_root
+    app = _bench_app(work_dir)
+    op = STAGES[stage][0](app, fixture)
+    op()
+
+    walls = []
+    reported_temp = 0
+    rss_before = _status_kb(os.getpid(), "VmRSS")
+    exact_peak = _reset_peak_rss()
+    own_before, children_before = _usage()
+    with ResourceSampler(temp_root) as sampler, ThreadPoolExecutor(max_workers=concurrency) as threads:
+        for _ in range(repeat):
+            started = time.perf_counter()
+            held = [future.result() for future in [threads.submit(op) for _ in range(concurrency)]]
+            walls.append(time.perf_counter() - started)
+            reported_temp = max(reported_temp, sum(n or 0 for n in held))
+    own_after, children_after = _usage()
+
+    ops = repeat * concurrency
+    cpu = (
+        own_after.ru_utime - own_before.ru_utime + own_after.ru_stime - own_before.ru_stime
+        + children_after.ru_utime - children_before.ru_utime + children_after.ru_stime - children_before.ru_stime
+    )
+    return {
+        "ops": ops,
+        "wall_s": {
+            "median": round(statistics.median(walls), 4),
+            "min": round(min(walls), 4),
+            "max": round(max(walls), 4),
+        },
+        "wall_per_op_s": round(sum(walls) / ops, 4),
+        "throughput_ops_s": round(ops / sum(walls), 3),
+        "cpu_s": round(cpu, 4),
+        "cpu_per_op_s": round(cpu / ops, 4),
+        "rss_before_kb": rss_before,
+        "peak_rss_kb": _status_kb(os.getpid(), "VmHWM") if exact_peak else own_after.ru_maxrss,
+        "peak_tree_rss_kb": sampler.peak_tree_rss_kb,
+        "peak_temp_bytes": max(sampler.peak_bytes, reported_temp),
+    }
+
+
+def _git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=os.path.dirname(os.path.abspath(__file__)), capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except Exception:
+        return None
+
+
+def _ffmpeg_version():
+    try:
+        return subprocess.run(["ffmpeg", "-version"], capture_output=True, text=True).stdout.split("\n")[0]
+    except Exception:
+        return None
+
+
+def run_benchmarks(stages=None, durations=(30, 180), concurrency=(1, 4), repeat=3, fixtures_dir=None, log=print):
+    """
+    Benchmark the media pipeline stages over synthetic fixtures and return
+    the results document (see RESULTS_VERSION). Fixtures are deterministic
+    and kept in fixtures_dir, so runs on different commits use identical input.
+    """
+    stages = list(stages or STAGES)
+    unknown = set(stages) - set(STAGES)
+    if unknown:
+        raise ValueError(f"Unknown stages: {', '.join(sorted(unknown))}")
+
+    base_dir = os.path.join(tempfile.gettempdir(), "beatsmart-bench")
+    fixtures = build_fixtures(fixtures_dir or os.path.join(base_dir, "fixtures"), durations)
+    run_dir = os.path.join(base_dir, f"run-{os.getpid()}")
+
+    results = []
+    try:
+        for stage in stages:
+            kinds = STAGES[stage][1]
+            for fixture in [f for f in fixtures if f["kind"] in kinds]:
+                for level in concurrency:
+                    cell = {
+                        "stage": stage,
+                        "fixture": fixture["name"],
+                        "fixture_bytes": fixture["bytes"],
+                        "audio_seconds": fixture["seconds"],
+                        "concurrency": level,
+                        "repeat": repeat,
+                    }
+                    work_dir = os.path.join(run_dir, uuid.uuid4().hex)
+                    # a fresh process per cell keeps rusage and peak RSS from leaking between cells
+                    with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("spawn")) as pool:
+                        try:
+                            cell.update(pool.submit(measure_cell, stage, fixture, level, repeat, work_dir).result())
+                        except Exception as e:
+                            cell["error"] = str(e)
+                    shutil.rmtree(work_dir, ignore_errors=True)
+                    results.append(cell)
+                    log(_describe(cell))
+    finally:
+        shutil.rmtree(run_dir, ignore_errors=True)
+
+    return {
+        "version": RESULTS_VERSION,
+        "meta": {
+            "commit": _git_commit(),
+            "created_at": datetime.utcnow().isoformat() + "Z",
+            "python": sys.version.split()[0],
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "ffmpeg": _ffmpeg_version(),
+            "durations": list(durations),
+            "concurrency": list(concurrency),
+            "repeat": repeat,
+        },
+        "results": results,
+    }
+
+
+def _describe(cell):
+    name = f"{cell['stage']} {cell['fixture']} x{cell['concurrency']}"
+    if "error" in cell:
+        return f"{name}: error: {cell['error']}"
+    return (
+        f"{name}: {cell['wall_per_op_s'] * 1000:.1f} ms/op wall, {cell['cpu_per_op_s'] * 1000:.1f} ms/op cpu, "
+        f"{cell['throughput_ops_s']} ops/s, rss {cell['peak_rss_kb'] // 1024} MB "
+        f"({cell['peak_tree_rss_kb'] // 1024} MB with children), temp {cell['peak_temp_bytes'] // 1024} KB"
+    )
+
+
+def compare_results(base, head, threshold=10.0):
+    """
+    Line up two results documents by (stage, fixture, concurrency) and
+    return one row per metric with the relative change in percent.
+    regression is set when a metric grew by more than threshold percent.
+    """
+    def cells(doc):
+        return {
+            (c["stage"], c["fixture"], c["concurrency"]): c
+            for c in doc["results"] if "error" not in c
+        }
+
+    base_cells, head_cells = cells(base), cells(head)
+    rows = []
+    for key in sorted(base_cells.keys() & head_cells.keys()):
+        for metric in COMPARED_METRICS:
+            before, after = base_cells[key][metric], head_cells[key][metric]
+            change = (after - before) / before * 100 if before else (0.0 if not after else float("inf"))
+            rows.append({
+                "stage": key[0],
+                "fixture": key[1],
+                "concurrency": key[2],
+                "metric": metric,
+                "base": before,
+                "head": after,
+                "change_pct": round(change, 1),
+                "regression": change > threshold,
+            })
+    return rows
+
+
+def load_results(path):
+    with open(path) as f:
+        return json.load(f)
@@ -0,0 +1,97 @@
+import io
+import os
+from types import SimpleNamespace
+from flask import request
+from werkzeug.datastructures import FileStorage
+from werkzeug.test import EnvironBuilder, encode_multipart
+from server.service.storage import get_storage
+from server.service.media_ingest import render_preview
+from server.service.upload_service import file_content_hash, streamed_result
+from server.utils.contract_util import generate_contract_pdf
+
+
+# Each stage takes (app, fixture) and returns the operation to time. An
+# operation may return the temp bytes it held, for files the disk sampler
+# can't see (werkzeug spools parts to unlinked temp files).
+
+
+def preview_transcode(app, fixture):
+    def op():
+        preview_url, _ = render_preview(fixture["path"], 0)
+        if not preview_url:
+            raise RuntimeError("Preview render failed")
+    return op
+
+
+def contract_pdf(app, fixture):
+    with open(fixture["path"]) as f:
+        terms = f.read()
+    template = SimpleNamespace(contract_type="Lease", price=29.99, terms=terms)
+    buyer = SimpleNamespace(name="Benchmark Buyer")
+    beat = SimpleNamespace(title="Benchmark Beat")
+
+    def op():
+        generate_contract_pdf(template, buyer, beat, "mp3")
+    return op
+
+
+def _multipart_body(fixture):
+    with open(fixture["path"], "rb") as f:
+        data = f.read()
+    filename = os.path.basename(fixture["path"])
+    boundary, body = encode_multipart({"title": "Benchmark", "mp3": FileStorage(io.BytesIO(data), filename)})
+    return body, f"multipart/form-data; boundary={boundary}"
+
+
+def _parse(app, body, content_type):
+    environ = EnvironBuilder(
+        method="POST",
+        input_stream=io.BytesIO(body),
+        content_type=content_type,
+        content_length=len(body)
+    ).get_environ()
+    with app.request_context(environ):
+        spooled = 0
+        for file in request.files.values():
+            streamed = streamed_result(file)
+            if streamed:
+                get_storage().delete(streamed["public_id"], resource_type=streamed["resource_type"])
+            elif hasattr(file.stream, "fileno"):
+                spooled += os.fstat(file.stream.fileno()).st_size
+        return spooled
+
+
+def multipart_parse(app, fixture):
+    """Default parsing: werkzeug spools each file part to a temp file."""
+    app.config["STREAMING_UPLOADS"] = False
+    body, content_type = _multipart_body(fixture)
+
+    def op():
+        return _parse(app, body, content_type)
+    return op
+
+
+def multipart_stream(app, fixture):
+    """STREAMING_UPLOADS: parts are piped to the storage stub while parsing."""
+    app.config["STREAMING_UPLOADS"] = True
+    body, content_type = _multipart_body(fixture)
+
+    def op():
+        return _parse(app, body, content_type)
+    return op
+
+
+def hashing(app, fixture):
+    def op():
+        with open(fixture["path"], "rb") as f:
+            file_content_hash(FileStorage(f, os.path.basename(fixture["path"])))
+    return op
+
+
+STAGES = {
+    "preview_transcode": (preview_transcode, ("mp3", "wav")),
+    "contract_pdf": (contract_pdf, ("terms",)),
+    "multipart_parse": (multipart_parse, ("mp3", "wav")),
+    "multipart_stream": (multipart_stream, ("mp3", "wav")),
+    "hashing": (hashing, ("mp3", "wav")),
+}
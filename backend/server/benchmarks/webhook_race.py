@@ -0,0 +1,125 @@
+import os
+import time
+import random
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from flask import Flask
+from sqlalchemy import func
+from server.extension import db
+from server.models import User, Beat, ContractTemplate, Payment, Sale, Contract
+from server.service.payment_events import handle_paystack_event
+
+
+def _race_app(database_url):
+    app = Flask(__name__)
+    app.config["SQLALCHEMY_DATABASE_URI"] = database_url
+    if database_url.startswith("sqlite"):
+        # writers queue on SQLite's file lock instead of failing straight away
+        app.config["SQLALCHEMY_ENGINE_OPTIONS"] = {"connect_args": {"timeout": 30}}
+    db.init_app(app)
+    return app
+
+
+def _seed(payments):
+    buyer = User(name="Race Buyer", email=f"race-buyer-{time.time_ns()}@example.com", role="artist")
+    producer = User(name="Race Producer", email=f"race-producer-{time.time_ns()}@example.com", role="producer")
+    db.session.add_all([buyer, producer])
+    db.session.flush()
+
+    beats = [Beat(title=f"Race Beat {i}", price=10, producer_id=producer.id) for i in range(payments)]
+    db.session.add_all(beats)
+    db.session.flush()
+    db.session.add_all([
+        ContractTemplate(beat_id=beat.id, file_type="mp3", contract_type="Lease", terms="Race terms", price=10)
+        for beat in beats
+    ])
+    rows = [
+        Payment(
+            user_id=buyer.id, amount=10, currency="USD", method="paystack", status="pending",
+            beat_id=beat.id, file_type="mp3", transaction_ref=f"RACE_{buyer.id}_{beat.id}"
+        )
+        for beat in beats
+    ]
+    db.session.add_all(rows)
+    db.session.commit()
+    return buyer.id, [(payment.id, payment.transaction_ref) for payment in rows]
+
+
+def run_webhook_race(database_url=None, payments=50, duplicates=4, workers=8, log=print):
+    """
+    Deliver every charge.success `duplicates` times at once from `workers`
+    threads, each delivery in its own transaction as the webhook inbox
+    applies them, and count what came out. A correct run has exactly one
+    sale and one contract per payment. Creates its tables and rows in
+    database_url (a throwaway SQLite file by default); run it against a
+    scratch Postgres database to exercise the row locks.
+    """
+    database_url = database_url or f"sqlite:///{os.path.join(tempfile.mkdtemp(prefix='webhook-race-'), 'race.db')}"
+    app = _race_app(database_url)
+    with app.app_context():
+        db.create_all()
+        buyer_id, seeded = _seed(payments)
+
+    deliveries = [
+        {
+            "event": "charge.success",
+            "data": {
+                "reference": reference,
+                "status": "success",
+                "amount": 130000,
+                "currency": "KES",
+                "metadata": {"payment_id": payment_id, "file_type": "mp3"},
+            },
+        }
+        for payment_id, reference in seeded
+        for _ in range(duplicates)
+    ]
+    random.shuffle(deliveries)
+
+    def deliver(payload):
+        started = time.perf_counter()
+        with app.app_context():
+            try:
+                handle_paystack_event(payload)
+                db.session.commit()
+                error = None
+            except Exception as e:
+                db.session.rollback()
+                error = f"{type(e).__name__}: {e}"
+        return time.perf_counter() - started, error
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        results = list(pool.map(deliver, deliveries))
+    wall = time.perf_counter() - started
+
+    errors = [error for _, error in results if error]
+    for error in errors[:5]:
+        log(error)
+    latencies = sorted(latency for latency, _ in results)
+    pick = lambda q: round(1000 * latencies[min(len(latencies) - 1, int(q * len(latencies)))], 1)
+
+    with app.app_context():
+        sales = Sale.query.filter_by(buyer_id=buyer_id).count()
+        contracts = Contract.query.filter_by(buyer_id=buyer_id).count()
+        duplicate_sales = db.session.query(Sale.beat_id).filter_by(buyer_id=buyer_id).group_by(
+            Sale.beat_id, Sale.file_type
+        ).having(func.count(Sale.id) > 1).count()
+        settled = Payment.query.filter_by(user_id=buyer_id, status="success").count()
+
+    return {
+        "database": database_url.split("://")[0],
+        "payments": payments,
+        "deliveries": len(deliveries),
+        "workers": workers,
+        "errors": len(errors),
+        "settled": settled,
+        "sales": sales,
+        "contracts": contracts,
+        "duplicate_sales": duplicate_sales,
+        "ok": sales == payments and contracts == payments and not duplicate_sales,
+        "wall_s": round(wall, 3),
+        "deliveries_per_s": round(len(deliveries) / wall, 1),
+        "p50_ms": pick(0.5),
+        "p95_ms": pick(0.95),
+    }
@@ -0,0 +1,236 @@
+import sys
+import json
+import click
+from datetime import datetime
+from flask import current_app
+from flask.cli import AppGroup
+from werkzeug.serving import run_simple
+from server.service.scratch import get_scratch, ORPHAN_MAX_AGE_SECONDS
+from server.service.backfill import run_backfill
+from server.service.reconcile import run_reconcile, DEFAULT_MIN_AGE_SECONDS
+from server.service.paystack_stub import create_stub_app
+from server.service.media_ingest import rerender_previews
+from server.service.webhook_inbox import get_webhook_inbox
+from server.models.webhook_event import WebhookEvent
+from server.service.contract_renderer import get_contract_renderer
+from server.models.contract import Contract
+from server.extension import db
+from server.benchmarks import run_benchmarks, compare_results, load_results, run_webhook_race, run_admission_check, STAGES
+
+
+scratch_cli = AppGroup("scratch", help="Manage temp space used for media and PDF work.")
+
+
+@scratch_cli.command("clean")
+@click.option("--max-age", default=ORPHAN_MAX_AGE_SECONDS, show_default=True, help="Seconds before a live worker's file counts as leaked.")
+def scratch_clean(max_age):
+    """Remove scratch files left behind by crashed or killed workers."""
+    freed = get_scratch().clean_orphans(max_age)
+    click.echo(f"Freed {freed} bytes of scratch space")
+
+
+media_cli = AppGroup("media", help="Batch jobs over stored beat audio.")
+
+
+@media_cli.command("backfill")
+@click.option("--workers", default=2, show_default=True, help="Analysis processes.")
+@click.option("--max-download-rate", type=float, default=None, help="Storage download cap in MB/s.")
+@click.option("--restart", is_flag=True, help="Ignore the checkpoint and start from the first beat.")
+@click.option("--force", is_flag=True, help="Recompute steps that already have stored output.")
+@click.option("--limit", type=int, default=None, help="Stop after this many beats (resume later).")
+def media_backfill(workers, max_download_rate, restart, force, limit):
+    """Compute waveforms, tempo/key and fingerprints for beats missing them."""
+    rate = int(max_download_rate * 1024 * 1024) if max_download_rate else None
+    checkpoint = run_backfill(
+        workers=workers, max_download_rate=rate, restart=restart, force=force, limit=limit, log=click.echo
+    )
+    state = "finished" if checkpoint.finished_at else f"paused after beat {checkpoint.last_id}"
+    click.echo(
+        f"Backfill {state}: {checkpoint.processed} processed, "
+        f"{checkpoint.skipped} skipped, {checkpoint.failed} failed"
+    )
+
+
+@media_cli.command("rerender-previews")
+@click.option("--producer-id", type=int, default=None, help="Only this producer's beats.")
+@click.option("--force", is_flag=True, help="Re-render previews that already carry the current tag.")
+def media_rerender_previews(producer_id, force):
+    """Re-render previews whose voice tag watermark is out of date."""
+    updated, failed = rerender_previews(producer_id=producer_id, force=force, log=click.echo)
+    click.echo(f"Previews re-rendered: {updated} updated, {failed} failed")
+
+
+bench_cli = AppGroup("bench", help="Benchmarks for the media pipeline and payment handling.")
+
+
+def _int_list(value):
+    return [int(v) for v in value.split(",") if v.strip()]
+
+
+@bench_cli.command("run")
+@click.option("--stages", default=",".join(STAGES), show_default=True, help="Comma-separated stages to run.")
+@click.option("--durations", default="30,180", show_default=True, help="Fixture lengths in seconds.")
+@click.option("--concurrency", default="1,4", show_default=True, help="Simultaneous operations per cell.")
+@click.option("--repeat", default=3, show_default=True, help="Timed rounds per cell.")
+@click.option("--fixtures-dir", default=None, help="Where generated fixtures are kept between runs.")
+@click.option("--out", default="-", help="JSON results file, '-' for stdout.")
+def bench_run(stages, durations, concurrency, repeat, fixtures_dir, out):
+    """Time preview transcodes, contract PDFs, multipart parsing and hashing."""
+    results = run_benchmarks(
+        stages=[s for s in stages.split(",") if s],
+        durations=_int_list(durations),
+        concurrency=_int_list(concurrency),
+        repeat=repeat,
+        fixtures_dir=fixtures_dir,
+        log=lambda line: click.echo(line, err=True)
+    )
+    document = json.dumps(results, indent=2)
+    if out == "-":
+        click.echo(document)
+    else:
+        with open(out, "w") as f:
+            f.write(document + "\n")
+        click.echo(f"Results written to {out}", err=True)
+
+
+@bench_cli.command("compare")
+@click.argument("base", type=click.Path(exists=True, dir_okay=False))
+@click.argument("head", type=click.Path(exists=True, dir_okay=False))
+@click.option("--threshold", default=10.0, show_default=True, help="Percent growth reported as a regression.")
+@click.option("--fail-on-regression", is_flag=True, help="Exit with status 1 when anything regressed.")
+def bench_compare(base, head, threshold, fail_on_regression):
+    """Show how HEAD's results moved against BASE's."""
+    rows = compare_results(load_results(base), load_results(head), threshold)
+    for row in rows:
+        marker = "  REGRESSION" if row["regression"] else ""
+        click.echo(
+            f"{row['stage']:<18} {row['fixture']:<12} x{row['concurrency']:<3} {row['metric']:<18} "
+            f"{row['base']:>14} -> {row['head']:<14} {row['change_pct']:+7.1f}%{marker}"
+        )
+    regressions = sum(row["regression"] for row in rows)
+    click.echo(f"{len(rows)} metrics compared, {regressions} regressed more than {threshold:g}%")
+    if regressions and fail_on_regression:
+        sys.exit(1)
+
+
+@bench_cli.command("webhook-race")
+@click.option("--database-url", default=None, help="Scratch database to race in (default: a temp SQLite file).")
+@click.option("--payments", default=50, show_default=True)
+@click.option("--duplicates", default=4, show_default=True, help="Simultaneous deliveries of each payment's webhook.")
+@click.option("--workers", default=8, show_default=True, help="Threads delivering.")
+def bench_webhook_race(database_url, payments, duplicates, workers):
+    """Deliver duplicate charge.success webhooks concurrently and check for double sales."""
+    if database_url and database_url == current_app.config.get("SQLALCHEMY_DATABASE_URI"):
+        raise click.UsageError("Refusing to race in the app's own database; pass a scratch database")
+    result = run_webhook_race(
+        database_url=database_url, payments=payments, duplicates=duplicates, workers=workers,
+        log=lambda line: click.echo(line, err=True)
+    )
+    click.echo(json.dumps(result, indent=2))
+    if not result["ok"]:
+        sys.exit(1)
+
+
+@bench_cli.command("admission")
+def bench_admission():
+    """Check that a saturated CPU pool and rejected uploads get their own status codes, not a 401."""
+    result = run_admission_check(log=lambda line: click.echo(line, err=True))
+    click.echo(json.dumps(result, indent=2))
+    if not result["ok"]:
+        sys.exit(1)
+
+
+webhooks_cli = AppGroup("webhooks", help="Inspect and drain the webhook inbox.")
+
+
+@webhooks_cli.command("drain")
+@click.option("--batch", default=50, show_default=True, help="Events claimed per round.")
+def webhooks_drain(batch):
+    """Process every due event in the inbox, then exit."""
+    inbox = get_webhook_inbox()
+    total = 0
+    while True:
+        handled = inbox.drain(limit=batch)
+        if not handled:
+            break
+        total += handled
+    click.echo(f"{total} events handled: {inbox.processed} processed, {inbox.failed} failed, {inbox.dead_lettered} dead-lettered")
+
+
+@webhooks_cli.command("retry-dead")
+@click.option("--event-id", type=int, default=None, help="Only this event.")
+def webhooks_retry_dead(event_id):
+    """Put dead-lettered events back in the queue with fresh attempts."""
+    query = WebhookEvent.query.filter_by(status="dead")
+    if event_id:
+        query = query.filter_by(id=event_id)
+    requeued = query.update({"status": "pending", "attempts": 0, "next_attempt_at": datetime.utcnow()})
+    db.session.commit()
+    click.echo(f"{requeued} events requeued")
+
+
+@webhooks_cli.command("stats")
+def webhooks_stats():
+    """Inbox depth, dead letters and lag."""
+    for key, value in get_webhook_inbox().metrics().items():
+        click.echo(f"{key}: {value}")
+
+
+contracts_cli = AppGroup("contracts", help="Render contract PDFs.")
+
+
+@contracts_cli.command("render")
+@click.option("--retry-failed", is_flag=True, help="Requeue contracts whose render gave up first.")
+@click.option("--batch", default=20, show_default=True, help="Contracts claimed per round.")
+def contracts_render(retry_failed, batch):
+    """Render every contract still waiting for its PDF, then exit."""
+    if retry_failed:
+        requeued = Contract.query.filter_by(pdf_status="failed").update(
+            {"pdf_status": "pending", "pdf_attempts": 0, "pdf_locked_at": None}
+        )
+        db.session.commit()
+        click.echo(f"{requeued} failed contracts requeued")
+    renderer = get_contract_renderer()
+    while renderer.drain(limit=batch):
+        pass
+    click.echo(f"{renderer.rendered} rendered, {renderer.failed} failed")
+
+
+payments_cli = AppGroup("payments", help="Payment maintenance jobs.")
+
+
+@payments_cli.command("reconcile")
+@click.option("--workers", default=8, show_default=True, help="Paystack verify calls in flight at once.")
+@click.option("--batch", default=50, show_default=True, help="Payments per batch (and checkpoint).")
+@click.option("--min-age", default=DEFAULT_MIN_AGE_SECONDS, show_default=True, help="Seconds before a pending payment is checked.")
+@click.option("--restart", is_flag=True, help="Ignore the checkpoint and start from the first payment.")
+@click.option("--limit", type=int, default=None, help="Stop after this many payments (resume later).")
+def payments_reconcile(workers, batch, min_age, restart, limit):
+    """Settle pending payments whose webhook never arrived by verifying them with Paystack."""
+    checkpoint = run_reconcile(
+        workers=workers, batch_size=batch, min_age=min_age, restart=restart, limit=limit, log=click.echo
+    )
+    state = "finished" if checkpoint.finished_at else f"paused after payment {checkpoint.last_id}"
+    click.echo(
+        f"Reconcile {state}: {checkpoint.processed} settled, "
+        f"{checkpoint.skipped} still open, {checkpoint.failed} failed"
+    )
+
+
+@payments_cli.command("stub")
+@click.option("--port", default=8010, show_default=True)
+@click.option("--outcome", default="success", show_default=True, help="Status verify reports for every transaction.")
+@click.option("--latency-ms", default=0, show_default=True, help="Delay added to every response.")
+def payments_stub(port, outcome, latency_ms):
+    """Serve a local Paystack stand-in; set PAYSTACK_BASE_URL=http://127.0.0.1:<port>."""
+    # app.run() is a no-op inside the flask CLI
+    run_simple("127.0.0.1", port, create_stub_app(outcome=outcome, latency=latency_ms / 1000), threaded=True)
+
+
+def register_commands(app):
+    app.cli.add_command(scratch_cli)
+    app.cli.add_command(media_cli)
+    app.cli.add_command(bench_cli)
+    app.cli.add_command(webhooks_cli)
+    app.cli.add_command(contracts_cli)
+    app.cli.add_command(payments_cli)
@@ -8,3 +8,13 @@ from .sale import Sale
 from .payment import Payment
 from .wishlist import Wishlist
 from .discount import Discount
+from .beat_waveform import BeatWaveform
+from .audio_fingerprint import AudioFingerprint
+from .fingerprint_match import FingerprintMatch
+from .archive_manifest import ArchiveManifest
+from .media_derivative import MediaDerivative
+from .job_checkpoint import JobCheckpoint
+from .fx_rate import FxRate
+from .webhook_event import WebhookEvent
+from .idempotency_key import IdempotencyKey
+from .payment_item import PaymentItem
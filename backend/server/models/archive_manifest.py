@@ -0,0 +1,21 @@
+from datetime import datetime
+from server.extension import db
+
+class ArchiveManifest(db.Model):
+    """Contents of a trackout or soundpack ZIP, read from its central directory at upload."""
+    __tablename__ = "archive_manifests"
+
+    id = db.Column(db.Integer, primary_key=True)
+    beat_file_id = db.Column(db.Integer, db.ForeignKey("beat_files.id", ondelete="CASCADE"), nullable=True, unique=True)
+    soundpack_id = db.Column(db.Integer, db.ForeignKey("soundpacks.id", ondelete="CASCADE"), nullable=True, unique=True)
+    archive_size = db.Column(db.BigInteger, nullable=False)
+    entry_count = db.Column(db.Integer, nullable=False)
+    total_uncompressed = db.Column(db.BigInteger, nullable=False)
+    entries = db.Column(db.JSON, nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    beat_file = db.relationship("BeatFile", back_populates="manifest")
+    soundpack = db.relationship("SoundPack", back_populates="manifest")
+
+    def __repr__(self):
+        return f"<ArchiveManifest {self.entry_count} entries ({self.total_uncompressed} bytes)>"
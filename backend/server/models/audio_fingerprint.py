@@ -0,0 +1,13 @@
+from server.extension import db
+
+class AudioFingerprint(db.Model):
+    """Inverted index row: one constellation hash of a beat at an anchor frame."""
+    __tablename__ = "audio_fingerprints"
+
+    id = db.Column(db.Integer, primary_key=True)
+    hash = db.Column(db.Integer, nullable=False, index=True)
+    beat_id = db.Column(db.Integer, db.ForeignKey("beats.id", ondelete="CASCADE"), nullable=False, index=True)
+    time_offset = db.Column(db.Integer, nullable=False)
+
+    def __repr__(self):
+        return f"<AudioFingerprint {self.hash} beat={self.beat_id}@{self.time_offset}>"
@@ -10,10 +10,22 @@ class Beat(db.Model):
     genre = db.Column(db.String(80), nullable=True)
     bpm = db.Column(db.Integer, nullable=True)
     key = db.Column(db.String(20), nullable=True)
+    # estimated from the audio at upload time, kept next to the declared values
+    detected_bpm = db.Column(db.Float, nullable=True)
+    bpm_confidence = db.Column(db.Float, nullable=True)
+    detected_key = db.Column(db.String(20), nullable=True)
+    key_confidence = db.Column(db.Float, nullable=True)
+    analyzed_at = db.Column(db.DateTime, nullable=True)
     price = db.Column(db.Float, nullable=False, default=0.0)  
     cover_url = db.Column(db.String(255), nullable=True)
+    # resized WebP/JPEG derivatives of the cover, keyed by size name
+    cover_variants = db.Column(db.JSON, nullable=True)
     file_url = db.Column(db.String(255), nullable=True)       
     preview_url = db.Column(db.String(255), nullable=True)   
+    preview_playlist_url = db.Column(db.String(255), nullable=True)
+    preview_start = db.Column(db.Float, nullable=False, default=0.0, server_default="0")
+    # producer's voice_tag_version mixed into the preview, None when it has no watermark
+    preview_tag_version = db.Column(db.Integer, nullable=True)
     exclusive_available = db.Column(db.Boolean, default=True)
     is_sold_exclusive = db.Column(db.Boolean, default=False) 
     producer_id = db.Column(db.Integer, db.ForeignKey("users.id"), nullable=False)
@@ -27,6 +39,14 @@ class Beat(db.Model):
     payments = db.relationship("Payment", back_populates="beat", lazy="dynamic")
     files = db.relationship("BeatFile", back_populates="beat", cascade="all, delete-orphan")
     contract_templates = db.relationship("ContractTemplate", back_populates="beat")
+    waveforms = db.relationship("BeatWaveform", back_populates="beat", cascade="all, delete-orphan")
+    fingerprint_matches = db.relationship(
+        "FingerprintMatch",
+        foreign_keys="FingerprintMatch.beat_id",
+        back_populates="beat",
+        cascade="all, delete-orphan",
+        passive_deletes=True
+    )
 
 
     def __repr__(self):
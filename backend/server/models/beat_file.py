@@ -6,10 +6,13 @@ class BeatFile(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     file_type = db.Column(db.String(20), nullable=False)  
     file_url = db.Column(db.String(255), nullable=False)
+    # sha256 of the uploaded bytes; lets re-uploads of the same audio be skipped
+    content_hash = db.Column(db.String(64), nullable=True)
     price = db.Column(db.Float, nullable=False, default=0.0)
     beat_id = db.Column(db.Integer, db.ForeignKey("beats.id"), nullable=False)
 
     beat = db.relationship("Beat", back_populates="files")
+    manifest = db.relationship("ArchiveManifest", back_populates="beat_file", uselist=False, cascade="all, delete-orphan")
 
     def __repr__(self):
         return f"<BeatFile {self.file_type} - {self.file_url}>"
@@ -0,0 +1,20 @@
+from datetime import datetime
+from server.extension import db
+
+class BeatWaveform(db.Model):
+    __tablename__ = "beat_waveforms"
+    __table_args__ = (
+        db.UniqueConstraint("beat_id", "resolution", name="uq_beat_waveform_resolution"),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    beat_id = db.Column(db.Integer, db.ForeignKey("beats.id"), nullable=False, index=True)
+    resolution = db.Column(db.Integer, nullable=False)
+    format = db.Column(db.String(20), nullable=False, default="int8-minmax")
+    peaks = db.Column(db.LargeBinary, nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    beat = db.relationship("Beat", back_populates="waveforms")
+
+    def __repr__(self):
+        return f"<BeatWaveform beat={self.beat_id} res={self.resolution}>"
@@ -15,6 +15,12 @@ class Contract(db.Model):
     buyer_id = db.Column(db.Integer, db.ForeignKey("users.id"), nullable=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     contract_url = db.Column(db.String(255), nullable=True) 
+    file_type = db.Column(db.String(20), nullable=True)
+    # pending until the contract renderer has uploaded the PDF to contract_url
+    pdf_status = db.Column(db.String(20), nullable=False, default="ready", server_default="ready", index=True)
+    pdf_attempts = db.Column(db.Integer, nullable=False, default=0, server_default="0")
+    pdf_error = db.Column(db.Text, nullable=True)
+    pdf_locked_at = db.Column(db.DateTime, nullable=True)
 
   
     beat = db.relationship("Beat", back_populates="contracts")
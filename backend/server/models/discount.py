@@ -16,6 +16,8 @@ class Discount(db.Model):
     description = db.Column(db.Text, nullable=True) 
     max_uses = db.Column(db.Integer, nullable=True) 
     used_count = db.Column(db.Integer, default=0) 
+    # uses held by checkouts that haven't been paid yet
+    reserved_count = db.Column(db.Integer, nullable=False, default=0, server_default="0")
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
 
     def is_valid(self):
@@ -27,7 +29,7 @@ class Discount(db.Model):
             return False
         if self.end_date and now > self.end_date:
             return False
-        if self.max_uses and self.used_count >= self.max_uses:
+        if self.max_uses and (self.used_count or 0) + (self.reserved_count or 0) >= self.max_uses:
             return False
         return True
 
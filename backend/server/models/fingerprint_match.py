@@ -0,0 +1,20 @@
+from datetime import datetime
+from server.extension import db
+
+class FingerprintMatch(db.Model):
+    __tablename__ = "fingerprint_matches"
+
+    id = db.Column(db.Integer, primary_key=True)
+    beat_id = db.Column(db.Integer, db.ForeignKey("beats.id", ondelete="CASCADE"), nullable=False, index=True)
+    matched_beat_id = db.Column(db.Integer, db.ForeignKey("beats.id", ondelete="CASCADE"), nullable=False, index=True)
+    aligned_hashes = db.Column(db.Integer, nullable=False)
+    score = db.Column(db.Float, nullable=False)
+    same_producer = db.Column(db.Boolean, default=False)
+    status = db.Column(db.String(20), default="flagged")
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    beat = db.relationship("Beat", foreign_keys=[beat_id], back_populates="fingerprint_matches")
+    matched_beat = db.relationship("Beat", foreign_keys=[matched_beat_id])
+
+    def __repr__(self):
+        return f"<FingerprintMatch {self.beat_id} ~ {self.matched_beat_id} ({self.aligned_hashes})>"
@@ -0,0 +1,20 @@
+from datetime import datetime
+from server.extension import db
+
+class FxRate(db.Model):
+    """Latest known exchange rate for a currency pair, shared by all workers."""
+    __tablename__ = "fx_rates"
+    __table_args__ = (
+        db.UniqueConstraint("base", "quote", name="uq_fx_rate_pair"),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    base = db.Column(db.String(3), nullable=False)
+    quote = db.Column(db.String(3), nullable=False)
+    # units of quote per one unit of base
+    rate = db.Column(db.Float, nullable=False)
+    source = db.Column(db.String(50), nullable=False)
+    fetched_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+    def __repr__(self):
+        return f"<FxRate {self.base}/{self.quote} {self.rate}>"
@@ -0,0 +1,24 @@
+from datetime import datetime
+from server.extension import db
+
+class IdempotencyKey(db.Model):
+    """A client's Idempotency-Key and the response its first request got."""
+    __tablename__ = "idempotency_keys"
+    __table_args__ = (
+        db.UniqueConstraint("user_id", "key", name="uq_idempotency_user_key"),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey("users.id"), nullable=False)
+    key = db.Column(db.String(255), nullable=False)
+    # sha256 of method, path and body, so a key can't be replayed for a different request
+    request_hash = db.Column(db.String(64), nullable=False)
+    # in_progress until the first request finishes, then completed
+    status = db.Column(db.String(20), nullable=False, default="in_progress")
+    response_status = db.Column(db.Integer, nullable=True)
+    response_body = db.Column(db.JSON, nullable=True)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    expires_at = db.Column(db.DateTime, nullable=False, index=True)
+
+    def __repr__(self):
+        return f"<IdempotencyKey {self.user_id}:{self.key} {self.status}>"
@@ -0,0 +1,19 @@
+from datetime import datetime
+from server.extension import db
+
+class JobCheckpoint(db.Model):
+    """Progress of a resumable batch job; rows up to last_id are done."""
+    __tablename__ = "job_checkpoints"
+
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(80), nullable=False, unique=True)
+    last_id = db.Column(db.Integer, nullable=False, default=0)
+    processed = db.Column(db.Integer, nullable=False, default=0)
+    skipped = db.Column(db.Integer, nullable=False, default=0)
+    failed = db.Column(db.Integer, nullable=False, default=0)
+    started_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    finished_at = db.Column(db.DateTime, nullable=True)
+
+    def __repr__(self):
+        return f"<JobCheckpoint {self.name} last_id={self.last_id}>"
@@ -0,0 +1,29 @@
+from datetime import datetime
+from server.extension import db
+
+class MediaDerivative(db.Model):
+    """
+    A rendered derivative of stored media, keyed by everything that affects
+    its output. A render whose key already exists is reused, not redone.
+    """
+    __tablename__ = "media_derivatives"
+    __table_args__ = (
+        db.UniqueConstraint(
+            "source_hash", "kind", "start_time", "duration", "codec_params",
+            name="uq_media_derivative_key"
+        ),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    # sha256 of the source file's bytes
+    source_hash = db.Column(db.String(64), nullable=False, index=True)
+    kind = db.Column(db.String(40), nullable=False)
+    start_time = db.Column(db.Float, nullable=False, default=0.0)
+    duration = db.Column(db.Float, nullable=False, default=0.0)
+    codec_params = db.Column(db.String(255), nullable=False)
+    # stored URLs of the rendered outputs, e.g. {"preview_url": ..., "preview_playlist_url": ...}
+    outputs = db.Column(db.JSON, nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    def __repr__(self):
+        return f"<MediaDerivative {self.kind} {self.source_hash[:12]} @{self.start_time}>"
@@ -3,6 +3,9 @@ from server.extension import db
 
 class Payment(db.Model):
     __tablename__ = "payments"
+    __table_args__ = (
+        db.Index("ix_payments_user_id_status", "user_id", "status"),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey("users.id"), nullable=False)
@@ -20,6 +23,18 @@ class Payment(db.Model):
 
   
     payment_metadata = db.Column(db.JSON, nullable=True)
+    # USD->KES rate the charge was converted at, and when that rate was fetched
+    fx_rate = db.Column(db.Float, nullable=True)
+    fx_rate_at = db.Column(db.DateTime, nullable=True)
+
+    # checkout session: a pending payment's Paystack page is reused until it expires
+    file_type = db.Column(db.String(50), nullable=True)
+    discount_id = db.Column(db.Integer, db.ForeignKey("discounts.id"), nullable=True)
+    # holds one of the discount's reserved uses until the payment settles or its checkout expires
+    discount_reserved = db.Column(db.Boolean, nullable=False, default=False, server_default=db.false())
+    authorization_url = db.Column(db.String(500), nullable=True)
+    access_code = db.Column(db.String(100), nullable=True)
+    checkout_expires_at = db.Column(db.DateTime, nullable=True)
 
     beat_id = db.Column(db.Integer, db.ForeignKey("beats.id"), nullable=True)
     soundpack_id = db.Column(db.Integer, db.ForeignKey("soundpacks.id"), nullable=True)
@@ -31,6 +46,8 @@ class Payment(db.Model):
     beat = db.relationship("Beat", back_populates="payments", foreign_keys=[beat_id])
     contract = db.relationship("Contract", back_populates="payments", foreign_keys=[contract_id])
     soundpack = db.relationship("SoundPack", back_populates="payments", foreign_keys=[soundpack_id])
+    # set for cart checkouts; a single-item payment uses beat_id/soundpack_id and file_type
+    items = db.relationship("PaymentItem", back_populates="payment", cascade="all, delete-orphan", order_by="PaymentItem.id")
 
     def __repr__(self):
         return f"<Payment {self.transaction_ref or self.paystack_ref} - {self.amount}{self.currency}>"
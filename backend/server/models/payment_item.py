@@ -0,0 +1,20 @@
+from server.extension import db
+
+class PaymentItem(db.Model):
+    """One line of a cart payment: a beat file or a soundpack at its charged price."""
+    __tablename__ = "payment_items"
+
+    id = db.Column(db.Integer, primary_key=True)
+    payment_id = db.Column(db.Integer, db.ForeignKey("payments.id"), nullable=False, index=True)
+    item_type = db.Column(db.String(20), nullable=False)
+    beat_id = db.Column(db.Integer, db.ForeignKey("beats.id"), nullable=True)
+    soundpack_id = db.Column(db.Integer, db.ForeignKey("soundpacks.id"), nullable=True)
+    file_type = db.Column(db.String(20), nullable=True)
+    # USD, before and after the cart's discount
+    unit_price = db.Column(db.Float, nullable=False)
+    amount = db.Column(db.Float, nullable=False)
+
+    payment = db.relationship("Payment", back_populates="items")
+
+    def __repr__(self):
+        return f"<PaymentItem {self.item_type}:{self.beat_id or self.soundpack_id} {self.file_type} - {self.amount}>"
@@ -4,6 +4,11 @@ from server.extension import db
 
 class Sale(db.Model):
     __tablename__ = "sales"
+    # a buyer owns each beat file / soundpack once; fulfilment inserts ON CONFLICT DO NOTHING
+    __table_args__ = (
+        db.UniqueConstraint("buyer_id", "beat_id", "file_type", name="uq_sale_buyer_beat_file"),
+        db.UniqueConstraint("buyer_id", "soundpack_id", name="uq_sale_buyer_soundpack"),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     buyer_id = db.Column(db.Integer, db.ForeignKey("users.id"), nullable=False)
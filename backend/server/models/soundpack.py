@@ -18,6 +18,7 @@ class SoundPack(db.Model):
     sales = db.relationship("Sale", back_populates="soundpack", lazy="dynamic")
    
     payments = db.relationship("Payment", back_populates="soundpack", lazy="dynamic")
+    manifest = db.relationship("ArchiveManifest", back_populates="soundpack", uselist=False, cascade="all, delete-orphan")
 
     def __repr__(self):
         return f"<SoundPack {self.name}>"
@@ -11,6 +11,9 @@ class User(db.Model):
     role = db.Column(db.String(20), default="buyer")
     bio = db.Column(db.Text, nullable=True)
     profile_image = db.Column(db.String(255), nullable=True)
+    voice_tag_url = db.Column(db.String(255), nullable=True)
+    # bumped on every tag change; previews record the version they were mixed with
+    voice_tag_version = db.Column(db.Integer, nullable=False, default=0, server_default="0")
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
 
     # relationships
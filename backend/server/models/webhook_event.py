@@ -0,0 +1,30 @@
+from datetime import datetime
+from server.extension import db
+
+class WebhookEvent(db.Model):
+    """
+    A received webhook, stored before it is acknowledged and processed
+    from here by the inbox workers. Redeliveries of the same event hit the
+    unique key and are dropped.
+    """
+    __tablename__ = "webhook_events"
+    __table_args__ = (
+        db.UniqueConstraint("event", "reference", name="uq_webhook_event_reference"),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    provider = db.Column(db.String(20), nullable=False, default="paystack")
+    event = db.Column(db.String(60), nullable=False)
+    reference = db.Column(db.String(200), nullable=True)
+    payload = db.Column(db.JSON, nullable=False)
+    # pending -> processing -> done, or dead once attempts run out
+    status = db.Column(db.String(20), nullable=False, default="pending", index=True)
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    last_error = db.Column(db.Text, nullable=True)
+    received_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    next_attempt_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, index=True)
+    locked_at = db.Column(db.DateTime, nullable=True)
+    processed_at = db.Column(db.DateTime, nullable=True)
+
+    def __repr__(self):
+        return f"<WebhookEvent {self.event} {self.reference} {self.status}>"
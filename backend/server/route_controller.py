@@ -3,6 +3,8 @@ from server.routes.beats import beat_resource_bp
 from server.routes.wishlist import wishlist_resource_bp
 from server.routes.discount import discount_bp
 from server.routes.purchase import purchase_bp
+from server.routes.media import media_bp
+from server.routes.metrics import metrics_bp
 
 def register_routes(app):
     app.register_blueprint(auth_bp)
@@ -10,5 +12,7 @@ def register_routes(app):
     app.register_blueprint(wishlist_resource_bp)
     app.register_blueprint(discount_bp,url_prefix='/api/discounts')
     app.register_blueprint(purchase_bp,url_prefix='/api/purchases')
+    app.register_blueprint(media_bp)
+    app.register_blueprint(metrics_bp,url_prefix='/api/metrics')
     
     
\ No newline at end of file
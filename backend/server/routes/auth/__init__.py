@@ -6,4 +6,5 @@ auth_bp = Blueprint('auth_bp',__name__)
 from .verify_token import *
 from .me import *
 from .session_route import *
+from .voice_tag import *
 
@@ -0,0 +1,56 @@
+from flask_restful import Resource, Api
+from flask import request
+from server.extension import db
+from server.service.upload_service import upload_voice_tag
+from server.service.media_ingest import start_preview_rerender
+from server.utils.firebase_auth import firebase_auth_required
+from server.utils.role import role_required, ROLES
+from . import auth_bp
+
+api = Api(auth_bp)
+
+
+class VoiceTagResource(Resource):
+    """The producer's voice tag, mixed into every preview they publish."""
+
+    @firebase_auth_required
+    @role_required(ROLES["ADMIN"])
+    def put(self):
+        user = request.current_user
+        tag_file = request.files.get("tag")
+        if not tag_file:
+            return {"error": "Voice tag file is required"}, 400
+
+        try:
+            tag_url = upload_voice_tag(tag_file)["url"]
+        except ValueError as e:
+            return {"error": str(e)}, 400
+
+        user.voice_tag_url = tag_url
+        user.voice_tag_version += 1
+        db.session.commit()
+
+        # existing previews are re-mixed in the background; new uploads pick the tag up straight away
+        start_preview_rerender(user.id)
+        return {
+            "voice_tag_url": user.voice_tag_url,
+            "voice_tag_version": user.voice_tag_version,
+            "message": "Voice tag saved, previews are being updated"
+        }, 202
+
+    @firebase_auth_required
+    @role_required(ROLES["ADMIN"])
+    def delete(self):
+        user = request.current_user
+        if not user.voice_tag_url:
+            return {"error": "No voice tag set"}, 404
+
+        user.voice_tag_url = None
+        user.voice_tag_version += 1
+        db.session.commit()
+
+        start_preview_rerender(user.id)
+        return {"message": "Voice tag removed, previews are being updated"}, 202
+
+
+api.add_resource(VoiceTagResource, "/auth/me/voice-tag")
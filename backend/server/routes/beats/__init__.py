@@ -4,4 +4,6 @@ beat_resource_bp = Blueprint('beat_resource_bp',__name__)
 
 
 from .beat_resource import *
-from .beats_file_resource import *
\ No newline at end of file
+from .beats_file_resource import *
+from .waveform_resource import *
+from .preview_resource import *
\ No newline at end of file
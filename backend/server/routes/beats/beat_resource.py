@@ -1,14 +1,18 @@
 from flask_restful import Resource, Api
 from flask import request, jsonify
 from marshmallow import ValidationError
+from contextlib import nullcontext
+from sqlalchemy import func
 from server.models.beat import Beat
 from server.models.beat_file import BeatFile
 from server.models.discount import Discount
 from server.models.contract_template import ContractTemplate
+from server.models.archive_manifest import ArchiveManifest
 from server.schemas.beat_schema import BeatSchema
 from server.extension import db
-from server.service.upload_service import upload_beat_file, upload_cover_image
-from server.utils.audio_utils import create_preview
+from server.service.upload_service import upload_beat_file, upload_cover_image, upload_trackout, streamed_result, media_source, file_content_hash
+from server.service.media_ingest import ingest_beat_audio, cached_preview, refresh_waveforms, preview_watermark, preview_tag_version
+from server.service.task_pool import get_cpu_pool, cpu_bound
 from server.utils.firebase_auth import firebase_auth_required
 from server.utils.role import role_required ,ROLES
 from . import beat_resource_bp
@@ -24,9 +28,31 @@ class BeatListResource(Resource):
     """Handles beat listing (public) and upload (restricted to producers)."""
     def get(self):
         genre = request.args.get("genre")
+        bpm_min = request.args.get("bpm_min", type=float)
+        bpm_max = request.args.get("bpm_max", type=float)
+        key = request.args.get("key")
+        # "declared", "detected" or "any" (declared value, falling back to detected)
+        source = request.args.get("source", "any")
+
         query = Beat.query
         if genre:
             query = query.filter_by(genre=genre)
+
+        if source == "declared":
+            bpm_col, key_col = Beat.bpm, Beat.key
+        elif source == "detected":
+            bpm_col, key_col = Beat.detected_bpm, Beat.detected_key
+        else:
+            bpm_col = func.coalesce(Beat.bpm, Beat.detected_bpm)
+            key_col = func.coalesce(Beat.key, Beat.detected_key)
+
+        if bpm_min is not None:
+            query = query.filter(bpm_col >= bpm_min)
+        if bpm_max is not None:
+            query = query.filter(bpm_col <= bpm_max)
+        if key:
+            query = query.filter(func.lower(key_col) == key.lower())
+
         beats = query.order_by(Beat.created_at.desc()).all()
 
       
@@ -37,8 +63,14 @@ class BeatListResource(Resource):
                 "genre": beat.genre,
                 "bpm": beat.bpm,
                 "key": beat.key,
+                "detected_bpm": beat.detected_bpm,
+                "bpm_confidence": beat.bpm_confidence,
+                "detected_key": beat.detected_key,
+                "key_confidence": beat.key_confidence,
                 "cover_url": beat.cover_url,
+                "cover_variants": beat.cover_variants,
                 "preview_url": beat.preview_url,
+                "preview_playlist_url": beat.preview_playlist_url,
                 "price": beat.price,
                 "producer": {
                     "name": beat.producer.name 
@@ -52,6 +84,7 @@ class BeatListResource(Resource):
 
     @firebase_auth_required
     @role_required(ROLES["ADMIN"])
+    @cpu_bound
     def post(self):
         user = request.current_user
         if not user.is_producer():
@@ -70,7 +103,7 @@ class BeatListResource(Resource):
         mp3_file = request.files.get("mp3")
         wav_file = request.files.get("wav")
         trackout_file = request.files.get("trackout")
-        preview_start = int(data.get("preview_start", 0))
+        preview_start = float(data.get("preview_start", 0))
 
       
         if not mp3_file:
@@ -101,28 +134,49 @@ class BeatListResource(Resource):
             return {"error": "MP3, WAV, and Trackout prices must be greater than 0"}, 400
 
       
-        cover_url = upload_cover_image(cover_file)["url"] if cover_file else None
+        # the trackout ZIP is checked first so a bad archive fails before anything else is uploaded
+        try:
+            trackout_upload = upload_trackout(trackout_file)
+        except ValueError as e:
+            return {"error": str(e)}, 400
+
+        cover_upload = upload_cover_image(cover_file) if cover_file else {}
+        mp3_hash = file_content_hash(mp3_file)
         mp3_url = upload_beat_file(mp3_file)["url"]
         wav_url = upload_beat_file(wav_file)["url"]
-        trackout_url = upload_beat_file(trackout_file)["url"]
+        trackout_url = trackout_upload["url"]
 
-        preview_path = create_preview(mp3_file, start_time=preview_start)
-        preview_url = upload_beat_file(open(preview_path, "rb"))["url"] if preview_path else None
+        # streamed parts never touch local disk, so ffmpeg reads the stored MP3 instead
+        preview_source = media_source(mp3_url) if streamed_result(mp3_file) else mp3_file
+        watermark = preview_watermark(user)
+        preview_url, preview_playlist_url = cached_preview(preview_source, mp3_hash, preview_start, watermark)
 
        
         beat = Beat(
             **validated_data,
             price=mp3_price,  
-            cover_url=cover_url,
-            preview_url=preview_url
+            cover_url=cover_upload.get("url"),
+            cover_variants=cover_upload.get("variants"),
+            preview_url=preview_url,
+            preview_playlist_url=preview_playlist_url,
+            preview_start=preview_start,
+            preview_tag_version=preview_tag_version(watermark)
         )
         db.session.add(beat)
         db.session.flush()
 
+        ingest_beat_audio(beat, preview_source, preview_start)
+
        
-        db.session.add(BeatFile(file_type="mp3", file_url=mp3_url, price=mp3_price, beat_id=beat.id))
+        db.session.add(BeatFile(file_type="mp3", file_url=mp3_url, content_hash=mp3_hash, price=mp3_price, beat_id=beat.id))
         db.session.add(BeatFile(file_type="wav", file_url=wav_url, price=wav_price, beat_id=beat.id))
-        db.session.add(BeatFile(file_type="trackout", file_url=trackout_url, price=trackout_price, beat_id=beat.id))
+        db.session.add(BeatFile(
+            file_type="trackout",
+            file_url=trackout_url,
+            price=trackout_price,
+            beat_id=beat.id,
+            manifest=ArchiveManifest(**trackout_upload["manifest"])
+        ))
         #
         db.session.add(BeatFile(file_type="exclusive", file_url=mp3_url, price=exclusive_price, beat_id=beat.id))
 
@@ -160,7 +214,19 @@ class BeatListResource(Resource):
                 db.session.add(contract_template)
 
         db.session.commit()
-        return beat_schema.dump(beat), 201
+
+        response = beat_schema.dump(beat)
+        response["fingerprint_matches"] = [
+            {
+                "matched_beat_id": match.matched_beat_id,
+                "aligned_hashes": match.aligned_hashes,
+                "score": match.score,
+                "same_producer": match.same_producer,
+                "status": match.status
+            }
+            for match in beat.fingerprint_matches
+        ]
+        return response, 201
 
 
 class BeatResource(Resource):
@@ -172,8 +238,14 @@ class BeatResource(Resource):
             "genre": beat.genre,
             "bpm": beat.bpm,
             "key": beat.key,
+            "detected_bpm": beat.detected_bpm,
+            "bpm_confidence": beat.bpm_confidence,
+            "detected_key": beat.detected_key,
+            "key_confidence": beat.key_confidence,
             "cover_url": beat.cover_url,
+            "cover_variants": beat.cover_variants,
             "preview_url": beat.preview_url,
+            "preview_playlist_url": beat.preview_playlist_url,
             "price": beat.price,
             "producer": {
                 "name": beat.producer.name  
@@ -234,19 +306,44 @@ class BeatResource(Resource):
         mp3_file = request.files.get("mp3")
         wav_file = request.files.get("wav")
         trackout_file = request.files.get("trackout")
-        preview_start = int(data.get("preview_start", 0))
+        preview_start = data.get("preview_start")
+        preview_start = float(preview_start) if preview_start not in (None, "") else beat.preview_start
+
+        # only cover and audio changes need the CPU pool; metadata edits are never turned away
+        needs_pool = cover_file or mp3_file or preview_start != beat.preview_start
+        media_job = get_cpu_pool().admission() if needs_pool else nullcontext()
+        with media_job:
+            if cover_file:
+                cover_upload = upload_cover_image(cover_file)
+                beat.cover_url = cover_upload["url"]
+                beat.cover_variants = cover_upload["variants"]
 
-        if cover_file:
-            beat.cover_url = upload_cover_image(cover_file)["url"]
-
-        if mp3_file:
-            mp3_url = upload_beat_file(mp3_file)["url"]
-            beat.preview_url = upload_beat_file(open(create_preview(mp3_file, preview_start), "rb"))["url"]
             mp3_obj = BeatFile.query.filter_by(beat_id=beat.id, file_type="mp3").first()
-            if mp3_obj:
-                mp3_obj.file_url = mp3_url
-            else:
-                db.session.add(BeatFile(file_type="mp3", file_url=mp3_url, price=beat.price, beat_id=beat.id))
+            mp3_hash = file_content_hash(mp3_file) if mp3_file else None
+            watermark = preview_watermark(user)
+            # resending the audio that is already stored changes nothing; a streamed
+            # duplicate is left unclaimed and deleted on request teardown
+            if mp3_file and not (mp3_obj and mp3_obj.content_hash == mp3_hash):
+                mp3_url = upload_beat_file(mp3_file)["url"]
+                preview_source = media_source(mp3_url) if streamed_result(mp3_file) else mp3_file
+                beat.preview_url, beat.preview_playlist_url = cached_preview(preview_source, mp3_hash, preview_start, watermark)
+                beat.preview_start = preview_start
+                beat.preview_tag_version = preview_tag_version(watermark)
+                ingest_beat_audio(beat, preview_source, preview_start)
+                if mp3_obj:
+                    mp3_obj.file_url = mp3_url
+                    mp3_obj.content_hash = mp3_hash
+                else:
+                    db.session.add(BeatFile(file_type="mp3", file_url=mp3_url, content_hash=mp3_hash, price=beat.price, beat_id=beat.id))
+            elif mp3_obj and preview_start != beat.preview_start:
+                # only the offset moved: re-cut from the stored MP3 instead of a new upload
+                stored_source = media_source(mp3_obj.file_url)
+                preview_url, preview_playlist_url = cached_preview(stored_source, mp3_obj.content_hash, preview_start, watermark)
+                if preview_url:
+                    beat.preview_url, beat.preview_playlist_url = preview_url, preview_playlist_url
+                    beat.preview_start = preview_start
+                    beat.preview_tag_version = preview_tag_version(watermark)
+                    refresh_waveforms(beat, stored_source, preview_start)
 
         if wav_file:
             wav_url = upload_beat_file(wav_file)["url"]
@@ -259,14 +356,20 @@ class BeatResource(Resource):
                 db.session.add(BeatFile(file_type="wav", file_url=wav_url, price=wav_price, beat_id=beat.id))
 
         if trackout_file:
-            trackout_url = upload_beat_file(trackout_file)["url"]
+            try:
+                trackout_upload = upload_trackout(trackout_file)
+            except ValueError as e:
+                return {"error": str(e)}, 400
+            trackout_url = trackout_upload["url"]
             trackout_obj = BeatFile.query.filter_by(beat_id=beat.id, file_type="trackout").first()
             if trackout_obj:
                 trackout_obj.file_url = trackout_url
             else:
                 current_trackout_price = BeatFile.query.filter_by(beat_id=beat.id, file_type="trackout").first()
                 trackout_price = current_trackout_price.price if current_trackout_price else beat.price * 1.5
-                db.session.add(BeatFile(file_type="trackout", file_url=trackout_url, price=trackout_price, beat_id=beat.id))
+                trackout_obj = BeatFile(file_type="trackout", file_url=trackout_url, price=trackout_price, beat_id=beat.id)
+                db.session.add(trackout_obj)
+            trackout_obj.manifest = ArchiveManifest(**trackout_upload["manifest"])
 
         
         discount_code = data.get("discount_code")
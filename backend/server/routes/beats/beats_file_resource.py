@@ -1,5 +1,5 @@
 from flask_restful import Resource, Api
-from flask import jsonify, request
+from flask import request
 from server.models.beat_file import BeatFile
 from server.models.beat import Beat
 from server.models.sale import Sale
@@ -23,13 +23,14 @@ class BeatFileResource(Resource):
         beat_file = BeatFile.query.filter_by(beat_id=beat_id, file_type=file_type).first()
 
         if not beat_file:
-            return jsonify({"error": f"No {file_type} file found for this beat"}), 404
+            return {"error": f"No {file_type} file found for this beat"}, 404
 
         if user.role == ROLES["ADMIN"] and user.id == beat.producer_id:
-            return jsonify({
+            return {
                 "file_url": beat_file.file_url,
-                "contract_url": None
-            }), 200
+                "contract_url": None,
+                "contract_status": None
+            }, 200
 
       
         sale = Sale.query.filter_by(
@@ -37,16 +38,42 @@ class BeatFileResource(Resource):
         ).first()
 
         if not sale:
-            return jsonify({"error": "You have not purchased this file"}), 403
+            return {"error": "You have not purchased this file"}, 403
 
         contract = Contract.query.filter_by(
             beat_id=beat_id, buyer_id=user.id, file_type=file_type
         ).first()
 
-        return jsonify({
+        # contract_url stays null while the PDF is still being rendered
+        return {
             "file_url": beat_file.file_url,
-            "contract_url": contract.contract_url if contract else None
-        }), 200
+            "contract_url": contract.contract_url if contract else None,
+            "contract_status": contract.pdf_status if contract else None
+        }, 200
+
+
+class BeatFileManifestResource(Resource):
+    def get(self, beat_id, file_type):
+        """
+        Public listing of what's inside a trackout archive, read from the
+        manifest recorded at upload so the archive itself is never opened.
+        """
+        beat_file = BeatFile.query.filter_by(beat_id=beat_id, file_type=file_type).first()
+        if not beat_file:
+            return {"error": f"No {file_type} file found for this beat"}, 404
+        if not beat_file.manifest:
+            return {"error": "No manifest available for this file"}, 404
+
+        manifest = beat_file.manifest
+        return {
+            "beat_id": beat_id,
+            "file_type": file_type,
+            "archive_size": manifest.archive_size,
+            "entry_count": manifest.entry_count,
+            "total_uncompressed": manifest.total_uncompressed,
+            "entries": manifest.entries
+        }, 200
 
 
 api.add_resource(BeatFileResource, "/beats/<int:beat_id>/files/<string:file_type>")
+api.add_resource(BeatFileManifestResource, "/beats/<int:beat_id>/files/<string:file_type>/manifest")
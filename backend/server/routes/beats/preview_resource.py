@@ -0,0 +1,33 @@
+from flask_restful import Resource, Api
+from flask import send_file, redirect
+from server.models.beat import Beat
+from server.service.preview_cache import get_preview_cache
+from . import beat_resource_bp
+
+api = Api(beat_resource_bp)
+
+PREVIEW_MAX_AGE = 86400
+
+
+class BeatPreviewResource(Resource):
+    def get(self, beat_id):
+        """
+        Stream the MP3 preview from the local preview cache. send_file
+        answers Range requests for seeking and hands the file to the
+        server's wsgi.file_wrapper, which is sendfile under gunicorn.
+        """
+        beat = Beat.query.get_or_404(beat_id)
+        if not beat.preview_url:
+            return {"error": "Preview not available for this beat"}, 404
+
+        try:
+            path = get_preview_cache().path_for(beat.preview_url)
+        except Exception as e:
+            # storage is still reachable directly; a slow cache fill shouldn't break playback
+            print("Preview cache error:", e)
+            return redirect(beat.preview_url)
+
+        return send_file(path, mimetype="audio/mpeg", conditional=True, max_age=PREVIEW_MAX_AGE)
+
+
+api.add_resource(BeatPreviewResource, "/beats/<int:beat_id>/preview")
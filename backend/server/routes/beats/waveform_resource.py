@@ -0,0 +1,30 @@
+from flask_restful import Resource, Api
+from flask import request, Response
+from server.models.beat import Beat
+from server.models.beat_waveform import BeatWaveform
+from server.utils.waveform import WAVEFORM_RESOLUTIONS, DEFAULT_WAVEFORM_RESOLUTION
+from . import beat_resource_bp
+
+api = Api(beat_resource_bp)
+
+
+class BeatWaveformResource(Resource):
+    def get(self, beat_id):
+        """Precomputed preview peaks as raw interleaved int8 [min, max] pairs."""
+        resolution = request.args.get("res", DEFAULT_WAVEFORM_RESOLUTION, type=int)
+        if resolution not in WAVEFORM_RESOLUTIONS:
+            return {"error": f"res must be one of {list(WAVEFORM_RESOLUTIONS)}"}, 400
+
+        Beat.query.get_or_404(beat_id)
+        waveform = BeatWaveform.query.filter_by(beat_id=beat_id, resolution=resolution).first()
+        if not waveform:
+            return {"error": "Waveform not available for this beat"}, 404
+
+        response = Response(waveform.peaks, mimetype="application/octet-stream")
+        response.headers["X-Waveform-Resolution"] = str(waveform.resolution)
+        response.headers["X-Waveform-Format"] = waveform.format
+        response.headers["Cache-Control"] = "public, max-age=86400"
+        return response
+
+
+api.add_resource(BeatWaveformResource, "/beats/<int:beat_id>/waveform")
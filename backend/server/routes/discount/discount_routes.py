@@ -6,6 +6,7 @@ from server.models.soundpack import SoundPack
 from server.extension import db
 from server.utils.firebase_auth import firebase_auth_required
 from server.utils.role import role_required, ROLES
+from server.service.discounts import get_discount_cache
 from . import discount_bp
 import datetime
 
@@ -22,7 +23,7 @@ class ActiveDiscountsResource(Resource):
             Discount.is_active == True,
             (Discount.start_date.is_(None) | (Discount.start_date <= now)),
             (Discount.end_date.is_(None) | (Discount.end_date >= now)),
-            (Discount.max_uses.is_(None) | (Discount.used_count < Discount.max_uses))
+            (Discount.max_uses.is_(None) | (Discount.used_count + Discount.reserved_count < Discount.max_uses))
         ).all()
         
         discounts = []
@@ -78,12 +79,15 @@ class ValidateDiscountResource(Resource):
         if not code:
             return {"valid": False, "error": "Discount code is required"}, 400
         
-        # Find active discount
-        discount = Discount.query.filter_by(code=code, is_active=True).first()
+        # Find active discount; read through the hot-code cache, since a dropped code is validated by everyone at once
+        discount = get_discount_cache().discount(code)
         
-        if not discount:
+        if not discount or not discount.is_active:
             return {"valid": False, "error": "Invalid discount code"}, 400
         
+        if discount.max_uses and (discount.used_count or 0) + discount.reserved_count >= discount.max_uses:
+            return {"valid": False, "error": "Discount code is sold out"}, 400
+        
         if not discount.is_valid():
             return {"valid": False, "error": "Discount code has expired"}, 400
         
@@ -95,17 +99,13 @@ class ValidateDiscountResource(Resource):
             return {"valid": False, "error": "Discount not applicable to this item"}, 400
         
        
-        if item_type == "beat":
-            item = Beat.query.get(item_id)
-        elif item_type == "soundpack":
-            item = SoundPack.query.get(item_id)
-        else:
+        if item_type not in ("beat", "soundpack"):
             return {"valid": False, "error": "Invalid item type"}, 400
         
-        if not item:
+        original_price = get_discount_cache().item_price(item_type, item_id)
+        if original_price is None:
             return {"valid": False, "error": "Item not found"}, 400
         
-        original_price = float(item.price)
         final_price = discount.apply_discount(original_price)
         
         return {
@@ -156,6 +156,8 @@ class DiscountManagementResource(Resource):
         
         db.session.add(discount)
         db.session.commit()
+        # drop any cached "invalid code" answer for it
+        get_discount_cache().invalidate(discount.code)
         
         return {
             "message": "Discount created successfully",
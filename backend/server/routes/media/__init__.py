@@ -0,0 +1,6 @@
+from flask import Blueprint
+
+media_bp = Blueprint('media_bp',__name__)
+
+
+from .media_resource import *
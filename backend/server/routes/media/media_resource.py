@@ -0,0 +1,22 @@
+from flask_restful import Resource, Api
+from flask import send_from_directory, abort
+from server.service.storage import get_storage, LocalStorage
+from . import media_bp
+
+api = Api(media_bp)
+
+
+class MediaResource(Resource):
+    def get(self, public_id):
+        """
+        Serve a file stored by the local backend. send_from_directory hands
+        the open file to the server's wsgi.file_wrapper (sendfile under
+        gunicorn) and answers Range requests itself.
+        """
+        storage = get_storage()
+        if not isinstance(storage, LocalStorage):
+            abort(404)
+        return send_from_directory(storage.root, public_id, conditional=True, max_age=86400)
+
+
+api.add_resource(MediaResource, "/media/<path:public_id>")
@@ -0,0 +1,6 @@
+from flask import Blueprint
+
+metrics_bp = Blueprint('metrics_bp',__name__)
+
+
+from .metrics_resource import *
@@ -0,0 +1,32 @@
+from flask_restful import Resource, Api
+from server.service.scratch import get_scratch
+from server.service.task_pool import get_cpu_pool
+from server.service.preview_cache import get_preview_cache
+from server.service.paystack import get_paystack
+from server.service.webhook_inbox import get_webhook_inbox
+from server.service.contract_renderer import get_contract_renderer
+from server.service.discounts import get_discount_cache
+from server.utils.firebase_auth import firebase_auth_required
+from server.utils.role import role_required, ROLES
+from . import metrics_bp
+
+api = Api(metrics_bp)
+
+
+class MetricsResource(Resource):
+    @firebase_auth_required
+    @role_required(ROLES["ADMIN"])
+    def get(self):
+        """Resource usage of this worker process."""
+        return {
+            "scratch": get_scratch().metrics(),
+            "cpu_pool": get_cpu_pool().metrics(),
+            "preview_cache": get_preview_cache().metrics(),
+            "paystack": get_paystack().metrics(),
+            "webhooks": get_webhook_inbox().metrics() if get_webhook_inbox() else None,
+            "contracts": get_contract_renderer().metrics() if get_contract_renderer() else None,
+            "discount_cache": get_discount_cache().metrics() if get_discount_cache() else None
+        }, 200
+
+
+api.add_resource(MetricsResource, "/")
@@ -4,5 +4,6 @@ from flask import Blueprint
 purchase_bp = Blueprint('purchase_bp', __name__)
 
 from .purchase_resource import *
+from .cart_resource import *
 from .purchase_history import *
 from .paystack_webhook import *
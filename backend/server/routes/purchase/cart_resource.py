@@ -0,0 +1,221 @@
+from flask_restful import Resource, Api
+from flask import request, current_app
+from datetime import datetime, timedelta
+from server.models.payment import Payment
+from server.models.payment_item import PaymentItem
+from server.models.beat import Beat
+from server.models.beat_file import BeatFile
+from server.models.soundpack import SoundPack
+from server.models.discount import Discount
+from server.extension import db
+from server.service.paystack import get_paystack
+from server.service.idempotency import idempotent
+from server.service.discounts import reserve_discount, release_discount
+from server.utils.firebase_auth import firebase_auth_required
+from server.utils.role import role_required
+from .purchase_resource import convert_usd_to_kes
+from . import purchase_bp
+
+api = Api(purchase_bp)
+
+MAX_CART_ITEMS = 50
+
+
+# -------------------------------
+# Utility Functions
+# -------------------------------
+
+def price_cart(items):
+    """
+    Price every cart line with one query per table. Returns (lines, None),
+    or (None, (error, status)) for the first line that can't be bought.
+    """
+    if not isinstance(items, list) or not items:
+        return None, ({"error": "items must be a non-empty list"}, 400)
+    if len(items) > MAX_CART_ITEMS:
+        return None, ({"error": f"A cart can hold at most {MAX_CART_ITEMS} items"}, 400)
+
+    lines, seen = [], set()
+    for item in items:
+        item = item if isinstance(item, dict) else {}
+        item_type, item_id, file_type = item.get("item_type"), item.get("item_id"), item.get("file_type")
+        # bool is an int subclass; true/false are not ids
+        if item_type not in ("beat", "soundpack") or not isinstance(item_id, int) or isinstance(item_id, bool):
+            return None, ({"error": "Each item needs an item_type of beat or soundpack and an item_id"}, 400)
+        if item_type == "beat" and not file_type:
+            return None, ({"error": f"file_type is required for beat {item_id}"}, 400)
+        key = (item_type, item_id, file_type if item_type == "beat" else None)
+        if key in seen:
+            return None, ({"error": f"{item_type} {item_id} is in the cart twice"}, 400)
+        seen.add(key)
+        lines.append({"item_type": key[0], "item_id": key[1], "file_type": key[2]})
+
+    beat_ids = {line["item_id"] for line in lines if line["item_type"] == "beat"}
+    soundpack_ids = {line["item_id"] for line in lines if line["item_type"] == "soundpack"}
+    beats = {beat.id: beat for beat in Beat.query.filter(Beat.id.in_(beat_ids))} if beat_ids else {}
+    beat_files = {
+        (beat_file.beat_id, beat_file.file_type): beat_file
+        for beat_file in BeatFile.query.filter(BeatFile.beat_id.in_(beat_ids))
+    } if beat_ids else {}
+    soundpacks = {
+        pack.id: pack for pack in SoundPack.query.filter(SoundPack.id.in_(soundpack_ids))
+    } if soundpack_ids else {}
+
+    for line in lines:
+        item_id, file_type = line["item_id"], line["file_type"]
+        if line["item_type"] == "beat":
+            beat = beats.get(item_id)
+            if not beat:
+                return None, ({"error": f"Beat {item_id} not found"}, 404)
+            beat_file = beat_files.get((item_id, file_type))
+            if not beat_file:
+                return None, ({"error": f"File type '{file_type}' not available for beat {item_id}"}, 400)
+            if file_type == "exclusive" and beat.is_sold_exclusive:
+                return None, ({"error": f"Exclusive rights already sold for beat {item_id}"}, 400)
+            line["unit_price"] = float(beat_file.price)
+        else:
+            pack = soundpacks.get(item_id)
+            if not pack:
+                return None, ({"error": f"Soundpack {item_id} not found"}, 404)
+            line["unit_price"] = float(pack.price or 0.0)
+        line["amount"] = line["unit_price"]
+    return lines, None
+
+
+def apply_cart_discount(lines, discount_code):
+    """Apply one discount code across the cart; returns the Discount, or None if it applies to no line."""
+    discount = Discount.query.filter_by(code=discount_code).first()
+    if not discount or not discount.is_valid():
+        return None
+
+    applied = None
+    for line in lines:
+        if discount.applicable_to == "global" or (
+            discount.applicable_to == line["item_type"] and discount.item_id == line["item_id"]
+        ):
+            line["amount"] = discount.apply_discount(line["unit_price"])
+            applied = discount
+    return applied
+
+
+# -------------------------------
+# Resource: Cart checkout
+# -------------------------------
+
+class CartCheckoutResource(Resource):
+    @firebase_auth_required
+    @role_required("artist", "producer")
+    @idempotent
+    def post(self):
+        """Check out several beats and soundpacks as one payment and one Paystack transaction."""
+        user = request.current_user
+        data = request.get_json() or {}
+        discount_code = data.get("discount_code")
+        callback_url = data.get("callback_url")
+
+        lines, error = price_cart(data.get("items"))
+        if error:
+            return error
+
+        discount_obj = None
+        if discount_code:
+            discount_obj = apply_cart_discount(lines, discount_code)
+            if not discount_obj:
+                return {"error": "Discount invalid/not applicable"}, 400
+
+        total_usd = round(sum(line["amount"] for line in lines), 2)
+        total_kes, fx = convert_usd_to_kes(total_usd)
+
+        payment = Payment(
+            user_id=user.id,
+            amount=total_usd,
+            currency="USD",
+            method="paystack",
+            status="pending",
+            fx_rate=fx.rate,
+            fx_rate_at=fx.fetched_at,
+            checkout_expires_at=datetime.utcnow() + timedelta(
+                seconds=int(current_app.config.get("CHECKOUT_SESSION_TTL", 30 * 60))
+            ),
+            items=[
+                PaymentItem(
+                    item_type=line["item_type"],
+                    beat_id=line["item_id"] if line["item_type"] == "beat" else None,
+                    soundpack_id=line["item_id"] if line["item_type"] == "soundpack" else None,
+                    file_type=line["file_type"],
+                    unit_price=line["unit_price"],
+                    amount=line["amount"]
+                )
+                for line in lines
+            ]
+        )
+        if discount_obj and not reserve_discount(payment, discount_obj):
+            db.session.rollback()
+            return {"error": "Discount code is sold out"}, 400
+        db.session.add(payment)
+        db.session.commit()
+
+        reference = f"CART_{payment.id}_{int(datetime.utcnow().timestamp())}"
+        amount_kes_cents = int(round(total_kes * 100))
+        payload = {
+            "email": user.email,
+            "amount": amount_kes_cents,
+            "currency": "KES",
+            "reference": reference,
+            "callback_url": callback_url,
+            "metadata": {
+                "user_id": user.id,
+                "payment_id": payment.id,
+                "item_count": len(lines),
+                "price_usd": total_usd,
+                "price_kes": total_kes,
+                "fx_rate": fx.rate,
+            },
+        }
+
+        try:
+            res_data = get_paystack().initialize_transaction(payload)
+        except Exception as e:
+            current_app.logger.error("Paystack initialize error: %s", e)
+            release_discount(payment)
+            db.session.commit()
+            return {"error": "Payment initialization failed"}, 500
+
+        if not (res_data.get("status") and res_data.get("data")):
+            current_app.logger.error("Paystack init failed: %s", res_data)
+            release_discount(payment)
+            db.session.commit()
+            return {"error": "Payment initialization failed", "detail": res_data}, 500
+
+        payment.transaction_ref = reference
+        payment.authorization_url = res_data["data"]["authorization_url"]
+        payment.access_code = res_data["data"].get("access_code")
+        payment.payment_metadata = {**payload["metadata"], "callback_url": callback_url}
+        db.session.commit()
+
+        current_app.logger.info(
+            f"Cart checkout initiated: {len(lines)} items at ${total_usd} USD ({total_kes} KES)"
+        )
+
+        return {
+            "payment_url": payment.authorization_url,
+            "access_code": payment.access_code,
+            "reference": reference,
+            "payment_id": payment.id,
+            "items": [
+                {
+                    "item_type": line["item_type"],
+                    "item_id": line["item_id"],
+                    "file_type": line["file_type"],
+                    "unit_price_usd": line["unit_price"],
+                    "amount_usd": line["amount"],
+                }
+                for line in lines
+            ],
+            "amount_usd": total_usd,
+            "amount_kes": total_kes,
+            "currency": "KES",
+        }, 200
+
+
+api.add_resource(CartCheckoutResource, "/cart")
@@ -1,24 +1,22 @@
-import os
-import requests
 from flask_restful import Resource, Api
 from flask import request, jsonify, current_app
-from datetime import datetime
+from datetime import datetime, timedelta
 from server.models.payment import Payment
 from server.models.beat import Beat
 from server.models.beat_file import BeatFile
 from server.models.soundpack import SoundPack
 from server.models.discount import Discount
 from server.extension import db
+from server.service.fx_rates import get_fx_rates
+from server.service.paystack import get_paystack
+from server.service.idempotency import idempotent
+from server.service.discounts import reserve_discount, release_discount
 from server.utils.firebase_auth import firebase_auth_required
 from server.utils.role import role_required
 from . import purchase_bp
 
 api = Api(purchase_bp)
 
-PAYSTACK_SECRET_KEY = os.getenv("PAYSTACK_SECRET_KEY")
-PAYSTACK_BASE = "https://api.paystack.co"
-CURRENCY_API = "https://api.exchangerate.host/convert"
-
 
 # -------------------------------
 # Utility Functions
@@ -42,19 +40,44 @@ def apply_discount_if_any(item_type, item_id, discount_code, base_price):
 
 
 def convert_usd_to_kes(amount_usd):
-    """Fetch live USD→KES conversion rate and return KES amount (safe fallback included)."""
-    try:
-        response = requests.get(f"{CURRENCY_API}?from=USD&to=KES&amount={amount_usd}", timeout=10)
-        data = response.json()
-        if data.get("success") and data.get("result"):
-            result = round(float(data["result"]), 2)
-            if result > 0:
-                return result
-        current_app.logger.warning("Currency API failed, using fallback rate 130")
-        return max(round(amount_usd * 130, 2), 1.00)
-    except Exception as e:
-        current_app.logger.error(f"Currency conversion error: {e}")
-        return max(round(amount_usd * 130, 2), 1.00)
+    """KES amount at the cached USD→KES rate, and the FxQuote it was converted at."""
+    amount_kes, fx = get_fx_rates().convert(amount_usd, "USD", "KES")
+    if fx.source == "fallback":
+        current_app.logger.warning(f"No USD/KES rate available, using fallback rate {fx.rate}")
+    return max(amount_kes, 1.00), fx
+
+
+def find_checkout_session(user, item_type, item_id, file_type, discount, price_usd, callback_url):
+    """An unexpired pending payment for the same purchase whose Paystack page can be reused."""
+    item_filter = Payment.beat_id == item_id if item_type == "beat" else Payment.soundpack_id == item_id
+    candidates = Payment.query.filter(
+        Payment.user_id == user.id,
+        Payment.status == "pending",
+        item_filter,
+        Payment.file_type == file_type,
+        Payment.discount_id == (discount.id if discount else None),
+        Payment.amount == price_usd,
+        Payment.authorization_url.isnot(None),
+        Payment.checkout_expires_at > datetime.utcnow(),
+    ).order_by(Payment.id.desc()).all()
+    for payment in candidates:
+        if (payment.payment_metadata or {}).get("callback_url") == callback_url:
+            return payment
+    return None
+
+
+def checkout_response(payment):
+    metadata = payment.payment_metadata or {}
+    return {
+        "payment_url": payment.authorization_url,
+        "access_code": payment.access_code,
+        "reference": payment.transaction_ref,
+        "payment_id": payment.id,
+        "file_type": payment.file_type,
+        "amount_usd": payment.amount,
+        "amount_kes": metadata.get("price_kes"),
+        "currency": "KES",
+    }
 
 
 # -------------------------------
@@ -64,6 +87,7 @@ def convert_usd_to_kes(amount_usd):
 class PurchaseResource(Resource):
     @firebase_auth_required
     @role_required("artist", "producer")
+    @idempotent
     def post(self):
         user = request.current_user
         data = request.get_json() or {}
@@ -110,7 +134,15 @@ class PurchaseResource(Resource):
         if final_price_usd is None:
             return {"error": "Discount invalid/not applicable"}, 400
 
-        final_price_kes = convert_usd_to_kes(final_price_usd)
+        # A buyer who abandoned the Paystack page and clicks Buy again gets the same page back
+        session = find_checkout_session(
+            user, item_type, item_id, file_type, discount_obj, final_price_usd, callback_url
+        )
+        if session:
+            current_app.logger.info(f"Reusing checkout session {session.transaction_ref}")
+            return checkout_response(session), 200
+
+        final_price_kes, fx = convert_usd_to_kes(final_price_usd)
 
         # -------------------------------
         # Save initial payment record
@@ -123,9 +155,16 @@ class PurchaseResource(Resource):
             status="pending",
             beat_id=item_id if item_type == "beat" else None,
             soundpack_id=item_id if item_type == "soundpack" else None,
+            fx_rate=fx.rate,
+            fx_rate_at=fx.fetched_at,
+            file_type=file_type,
+            checkout_expires_at=datetime.utcnow() + timedelta(
+                seconds=int(current_app.config.get("CHECKOUT_SESSION_TTL", 30 * 60))
+            ),
         )
-        if discount_obj:
-            payment.discount_id = discount_obj.id
+        if discount_obj and not reserve_discount(payment, discount_obj):
+            db.session.rollback()
+            return {"error": "Discount code is sold out"}, 400
 
         db.session.add(payment)
         db.session.commit()
@@ -158,19 +197,19 @@ class PurchaseResource(Resource):
                 "payment_id": payment.id,
                 "price_usd": final_price_usd,
                 "price_kes": final_price_kes,
+                "fx_rate": fx.rate,
             },
         }
 
-        headers = {"Authorization": f"Bearer {PAYSTACK_SECRET_KEY}"}
-
         # -------------------------------
         # Initialize Paystack transaction
         # -------------------------------
         try:
-            res = requests.post(f"{PAYSTACK_BASE}/transaction/initialize", json=payload, headers=headers, timeout=15)
-            res_data = res.json()
+            res_data = get_paystack().initialize_transaction(payload)
         except Exception as e:
             current_app.logger.error("Paystack initialize error: %s", e)
+            release_discount(payment)
+            db.session.commit()
             return {"error": "Payment initialization failed"}, 500
 
         # -------------------------------
@@ -178,6 +217,9 @@ class PurchaseResource(Resource):
         # -------------------------------
         if res_data.get("status") and res_data.get("data"):
             payment.transaction_ref = reference
+            payment.authorization_url = res_data["data"]["authorization_url"]
+            payment.access_code = res_data["data"].get("access_code")
+            payment.payment_metadata = {**payload["metadata"], "callback_url": callback_url}
             db.session.commit()
 
             current_app.logger.info(
@@ -185,18 +227,11 @@ class PurchaseResource(Resource):
                 f"at ${final_price_usd} USD ({final_price_kes} KES)"
             )
 
-            return {
-                "payment_url": res_data["data"]["authorization_url"],
-                "access_code": res_data["data"].get("access_code"),
-                "reference": reference,
-                "payment_id": payment.id,
-                "file_type": file_type,
-                "amount_usd": final_price_usd,
-                "amount_kes": final_price_kes,
-                "currency": "KES",
-            }, 200
+            return checkout_response(payment), 200
 
         current_app.logger.error("Paystack init failed: %s", res_data)
+        release_discount(payment)
+        db.session.commit()
         return {"error": "Payment initialization failed", "detail": res_data}, 500
 
 
@@ -20,10 +20,19 @@ class BeatSchema(ma.SQLAlchemyAutoSchema):
     genre = fields.String(validate=validate.Length(max=80))
     bpm = fields.Integer(validate=validate.Range(min=20, max=300))  
     key = fields.String(validate=validate.Length(max=20))
+    detected_bpm = fields.Float(dump_only=True)
+    bpm_confidence = fields.Float(dump_only=True)
+    detected_key = fields.String(dump_only=True)
+    key_confidence = fields.Float(dump_only=True)
+    analyzed_at = fields.DateTime(dump_only=True)
     price = fields.Float(required=True, validate=validate.Range(min=0.0))
     cover_url = fields.Url(required=False)
+    cover_variants = fields.Dict(dump_only=True)
     file_url = fields.Url(required=False)
     preview_url = fields.Url(required=False)
+    preview_playlist_url = fields.Url(dump_only=True)
+    preview_start = fields.Float(dump_only=True)
+    preview_tag_version = fields.Integer(dump_only=True)
     exclusive_available = fields.Boolean()
     is_sold_exclusive = fields.Boolean()
     producer_id = fields.Integer(required=True)
@@ -0,0 +1,221 @@
+import time
+import hashlib
+import threading
+from contextlib import ExitStack
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+from server.extension import db
+from server.models.beat import Beat
+from server.models.beat_file import BeatFile
+from server.models.beat_waveform import BeatWaveform
+from server.models.audio_fingerprint import AudioFingerprint
+from server.models.job_checkpoint import JobCheckpoint
+from server.service.storage import get_storage
+from server.service.scratch import get_scratch
+from server.service.task_pool import CpuPool
+from server.service.media_ingest import (
+    extract_audio_features,
+    save_waveforms,
+    save_analysis,
+    save_fingerprint,
+    INGEST_STEPS,
+)
+
+
+BACKFILL_JOB = "media_backfill"
+BACKFILL_STEPS = INGEST_STEPS
+DOWNLOAD_CHUNK_SIZE = 1024 * 1024
+# beats downloaded ahead of the pool per worker, which bounds scratch use
+BATCH_PER_WORKER = 2
+
+
+class RateLimiter:
+    """Token bucket over bytes; acquire() sleeps until the budget allows n more."""
+
+    def __init__(self, bytes_per_second):
+        self.rate = bytes_per_second
+        self.allowance = bytes_per_second
+        self.last = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, n):
+        if not self.rate:
+            return
+        with self._lock:
+            now = time.monotonic()
+            self.allowance = min(self.rate, self.allowance + (now - self.last) * self.rate)
+            self.last = now
+            self.allowance -= n
+            wait = -self.allowance / self.rate if self.allowance < 0 else 0
+        if wait:
+            time.sleep(wait)
+
+
+def fetch_source(url, scratch_path, limiter):
+    """
+    Make a stored file readable by ffmpeg. Local storage is read in place;
+    anything else is downloaded in rate-limited ranges to scratch_path.
+    Returns (path, sha256 hex digest, bytes downloaded).
+    """
+    storage = get_storage()
+    sha256 = hashlib.sha256()
+    local_path = storage.local_path(url)
+    if local_path:
+        with open(local_path, "rb") as f:
+            for chunk in iter(lambda: f.read(DOWNLOAD_CHUNK_SIZE), b""):
+                sha256.update(chunk)
+        return local_path, sha256.hexdigest(), 0
+
+    size = storage.size(url)
+    with open(scratch_path, "wb") as out:
+        for start in range(0, size, DOWNLOAD_CHUNK_SIZE):
+            end = min(start + DOWNLOAD_CHUNK_SIZE, size) - 1
+            limiter.acquire(end - start + 1)
+            chunk = storage.get_range(url, start, end)
+            sha256.update(chunk)
+            out.write(chunk)
+    return scratch_path, sha256.hexdigest(), size
+
+
+def _missing_steps(beats, force):
+    """{beat_id: [steps]} for the steps each beat has no stored output for."""
+    if force:
+        return {beat.id: list(BACKFILL_STEPS) for beat in beats}
+
+    ids = [beat.id for beat in beats]
+    with_waveforms = set(db.session.scalars(
+        db.select(BeatWaveform.beat_id).where(BeatWaveform.beat_id.in_(ids)).distinct()
+    ))
+    with_fingerprints = set(db.session.scalars(
+        db.select(AudioFingerprint.beat_id).where(AudioFingerprint.beat_id.in_(ids)).distinct()
+    ))
+
+    missing = {}
+    for beat in beats:
+        steps = []
+        if beat.id not in with_waveforms:
+            steps.append("waveform")
+        if beat.analyzed_at is None:
+            steps.append("analysis")
+        if beat.id not in with_fingerprints:
+            steps.append("fingerprint")
+        missing[beat.id] = steps
+    return missing
+
+
+def run_backfill(workers=2, max_download_rate=None, restart=False, force=False, limit=None, log=print):
+    """
+    Walk beats in id order and fill in whatever derived audio data is
+    missing, computing with extract_audio_features (as upload ingest
+    does) on a CPU pool of `workers` processes and writing from this one.
+    Progress is checkpointed after every batch, so an interrupted run
+    resumes where it stopped; beats that are complete are skipped, so
+    re-running is harmless.
+    """
+    checkpoint = JobCheckpoint.query.filter_by(name=BACKFILL_JOB).first()
+    if checkpoint is None:
+        checkpoint = JobCheckpoint(name=BACKFILL_JOB, last_id=0, processed=0, skipped=0, failed=0)
+        db.session.add(checkpoint)
+    elif restart or checkpoint.finished_at:
+        checkpoint.last_id = 0
+        checkpoint.processed = checkpoint.skipped = checkpoint.failed = 0
+        checkpoint.started_at = datetime.utcnow()
+        checkpoint.finished_at = None
+    db.session.commit()
+    if checkpoint.last_id:
+        log(f"Resuming after beat {checkpoint.last_id}")
+
+    limiter = RateLimiter(max_download_rate)
+    batch_size = max(1, workers * BATCH_PER_WORKER)
+    started = time.monotonic()
+    seen = downloaded = 0
+
+    cpu_pool = CpuPool(workers=workers)
+    try:
+        # the threads only wait on the pool, one per worker keeps every process busy
+        with ThreadPoolExecutor(max_workers=max(workers, 1)) as pool:
+            while limit is None or seen < limit:
+                size = batch_size if limit is None else min(batch_size, limit - seen)
+                beats = (
+                    Beat.query.filter(Beat.id > checkpoint.last_id)
+                    .order_by(Beat.id)
+                    .limit(size)
+                    .all()
+                )
+                if not beats:
+                    checkpoint.finished_at = datetime.utcnow()
+                    db.session.commit()
+                    break
+
+                ids = [beat.id for beat in beats]
+                mp3_files = {
+                    beat_file.beat_id: beat_file
+                    for beat_file in BeatFile.query.filter(BeatFile.beat_id.in_(ids), BeatFile.file_type == "mp3")
+                }
+                missing = _missing_steps(beats, force)
+
+                futures = {}
+                with ExitStack() as scratch_files:
+                    for beat in beats:
+                        mp3 = mp3_files.get(beat.id)
+                        steps = missing[beat.id]
+                        if not mp3 or (not steps and mp3.content_hash):
+                            checkpoint.skipped += 1
+                            continue
+                        try:
+                            scratch_path = scratch_files.enter_context(get_scratch().file(suffix=".mp3"))
+                            source, digest, nbytes = fetch_source(mp3.file_url, scratch_path, limiter)
+                        except Exception as e:
+                            log(f"Beat {beat.id}: download failed: {e}")
+                            checkpoint.failed += 1
+                            continue
+                        downloaded += nbytes
+                        mp3.content_hash = mp3.content_hash or digest
+                        if steps:
+                            futures[beat.id] = pool.submit(
+                                cpu_pool.run, extract_audio_features, source, beat.preview_start or 0, tuple(steps)
+                            )
+                        else:
+                            checkpoint.processed += 1
+
+                    beats_by_id = {beat.id: beat for beat in beats}
+                    for beat_id, future in futures.items():
+                        beat = beats_by_id[beat_id]
+                        try:
+                            result = future.result()
+                            if result is None:
+                                raise ValueError("Audio could not be decoded")
+                            # one savepoint per beat, so a failure leaves no half-written rows
+                            with db.session.begin_nested():
+                                if "waveform" in result:
+                                    save_waveforms(beat, result["waveform"])
+                                if "analysis" in result:
+                                    save_analysis(beat, result["analysis"])
+                                if "fingerprint" in result:
+                                    save_fingerprint(beat, *result["fingerprint"])
+                        except Exception as e:
+                            log(f"Beat {beat_id}: {e}")
+                            checkpoint.failed += 1
+                            continue
+                        # steps that failed stay missing, so the next run retries just those
+                        for step, error in result["errors"].items():
+                            log(f"Beat {beat_id}: {step} failed: {error}")
+                        if result["errors"]:
+                            checkpoint.failed += 1
+                        else:
+                            checkpoint.processed += 1
+
+                checkpoint.last_id = ids[-1]
+                db.session.commit()
+                seen += len(beats)
+
+                elapsed = max(time.monotonic() - started, 1e-9)
+                log(
+                    f"through beat {checkpoint.last_id}: {checkpoint.processed} processed, "
+                    f"{checkpoint.skipped} skipped, {checkpoint.failed} failed | "
+                    f"{seen / elapsed:.2f} beats/s, {downloaded / elapsed / (1024 * 1024):.2f} MB/s downloaded"
+                )
+    finally:
+        cpu_pool.shutdown()
+
+    return checkpoint
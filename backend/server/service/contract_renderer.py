@@ -0,0 +1,171 @@
+import time
+import threading
+from datetime import datetime, timedelta
+from sqlalchemy import or_, and_, func
+from server.extension import db
+from server.models.contract import Contract
+from server.utils.contract_util import generate_contract_pdf
+
+
+DEFAULT_RENDER_WORKERS = 1
+DEFAULT_MAX_ATTEMPTS = 5
+POLL_INTERVAL = 10
+CLAIM_BATCH = 5
+# a failed render is retried after this long
+RETRY_SECONDS = 60
+# a contract still "rendering" after this is assumed to belong to a dead worker
+LOCK_TIMEOUT = 10 * 60
+
+
+def claim_contracts(limit=CLAIM_BATCH):
+    """Mark up to limit contracts awaiting a PDF as rendering and return their ids."""
+    now = datetime.utcnow()
+    contracts = (
+        Contract.query
+        .filter(or_(
+            and_(Contract.pdf_status == "pending", or_(
+                Contract.pdf_locked_at.is_(None),
+                Contract.pdf_locked_at < now - timedelta(seconds=RETRY_SECONDS)
+            )),
+            and_(Contract.pdf_status == "rendering", Contract.pdf_locked_at < now - timedelta(seconds=LOCK_TIMEOUT))
+        ))
+        .order_by(Contract.id)
+        .limit(limit)
+        .with_for_update(skip_locked=True)
+        .all()
+    )
+    for contract in contracts:
+        contract.pdf_status = "rendering"
+        contract.pdf_locked_at = now
+    db.session.commit()
+    return [contract.id for contract in contracts]
+
+
+class ContractRenderer:
+    """
+    Renders contract PDFs for sales on a background thread, so the webhook
+    that records a sale only inserts a pending contract. Contracts with
+    pdf_status "pending" are the queue, so nothing is lost on restart; a
+    render that keeps failing is left as "failed" after max_attempts.
+    """
+
+    def __init__(self, app, workers=DEFAULT_RENDER_WORKERS, max_attempts=DEFAULT_MAX_ATTEMPTS):
+        self.app = app
+        self.workers = workers
+        self.max_attempts = max_attempts
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._threads = []
+        self.rendered = 0
+        self.failed = 0
+        self.total_render_seconds = 0.0
+
+    def start(self):
+        if self._threads:
+            return
+        with self._lock:
+            if self._threads:
+                return
+            self._threads = [
+                threading.Thread(target=self._run, name=f"contract-renderer-{i}", daemon=True)
+                for i in range(self.workers)
+            ]
+        for thread in self._threads:
+            thread.start()
+
+    def notify(self):
+        """Wake the renderer now instead of at its next poll."""
+        self._wake.set()
+
+    def _run(self):
+        while True:
+            try:
+                if not self.drain():
+                    self._wake.wait(POLL_INTERVAL)
+                    self._wake.clear()
+            except Exception as e:
+                print("Contract renderer error:", e)
+                time.sleep(POLL_INTERVAL)
+
+    def drain(self, limit=CLAIM_BATCH):
+        """Claim and render one batch; returns how many contracts were handled."""
+        with self.app.app_context():
+            ids = claim_contracts(limit)
+        for contract_id in ids:
+            with self.app.app_context():
+                self.render(contract_id)
+        return len(ids)
+
+    def render(self, contract_id):
+        contract = db.session.get(Contract, contract_id)
+        started = time.perf_counter()
+        try:
+            contract.contract_url = generate_contract_pdf(
+                contract.template, contract.buyer, contract.beat, contract.file_type
+            )
+            contract.pdf_status = "ready"
+            contract.pdf_error = None
+            contract.pdf_attempts += 1
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            self._failed(contract_id, e)
+            return False
+
+        with self._lock:
+            self.rendered += 1
+            self.total_render_seconds += time.perf_counter() - started
+        return True
+
+    def _failed(self, contract_id, error):
+        contract = db.session.get(Contract, contract_id)
+        contract.pdf_attempts += 1
+        contract.pdf_error = f"{type(error).__name__}: {error}"[:2000]
+        contract.pdf_status = "failed" if contract.pdf_attempts >= self.max_attempts else "pending"
+        print(f"Contract {contract.id} render failed (attempt {contract.pdf_attempts}):", error)
+        db.session.commit()
+        with self._lock:
+            self.failed += 1
+
+    def metrics(self):
+        """Queue depth from the table, plus this process's counters. Needs an app context."""
+        counts = dict(
+            db.session.query(Contract.pdf_status, func.count(Contract.id))
+            .filter(Contract.pdf_status != "ready")
+            .group_by(Contract.pdf_status)
+            .all()
+        )
+        with self._lock:
+            return {
+                "workers": self.workers,
+                "running": bool(self._threads),
+                "pending": counts.get("pending", 0),
+                "rendering": counts.get("rendering", 0),
+                "failed": counts.get("failed", 0),
+                "rendered": self.rendered,
+                "render_errors": self.failed,
+                "avg_render_s": round(self.total_render_seconds / self.rendered, 3) if self.rendered else None,
+            }
+
+
+_renderer = None
+
+
+def init_contract_renderer(app):
+    """
+    Configure from CONTRACT_RENDER_WORKERS and CONTRACT_RENDER_MAX_ATTEMPTS.
+    Like the webhook inbox, the thread starts with the first request.
+    """
+    global _renderer
+    _renderer = ContractRenderer(
+        app,
+        workers=int(app.config.get("CONTRACT_RENDER_WORKERS", DEFAULT_RENDER_WORKERS)),
+        max_attempts=int(app.config.get("CONTRACT_RENDER_MAX_ATTEMPTS", DEFAULT_MAX_ATTEMPTS))
+    )
+    if _renderer.workers > 0:
+        app.before_request(_renderer.start)
+    return _renderer
+
+
+def get_contract_renderer():
+    return _renderer
@@ -0,0 +1,185 @@
+import time
+import threading
+from datetime import datetime
+from flask import current_app
+from sqlalchemy import update, or_, func
+from server.extension import db
+from server.models.discount import Discount
+from server.models.payment import Payment
+from server.models.beat import Beat
+from server.models.soundpack import SoundPack
+
+
+DEFAULT_DISCOUNT_CACHE_TTL = 5
+# past this many entries (mostly mistyped codes) the cache starts over
+MAX_CACHE_ENTRIES = 10000
+
+_used = func.coalesce(Discount.used_count, 0)
+_has_room = or_(Discount.max_uses.is_(None), _used + Discount.reserved_count < Discount.max_uses)
+
+
+def _update(stmt):
+    return db.session.execute(stmt.execution_options(synchronize_session=False)).first()
+
+
+def reserve_discount(payment, discount):
+    """
+    Hold one use of discount for payment's checkout with a single
+    conditional UPDATE, so a limited code can't be oversold however many
+    checkouts race for it. Reservations of checkouts that expired unpaid
+    are released if that makes room. Returns False when the code is used up.
+    """
+    stmt = (
+        update(Discount)
+        .where(Discount.id == discount.id, _has_room)
+        .values(reserved_count=Discount.reserved_count + 1)
+        .returning(Discount.id)
+    )
+    reserved = _update(stmt) is not None
+    if not reserved and discount.max_uses and release_expired_reservations(discount.id):
+        reserved = _update(stmt) is not None
+    if not reserved:
+        if get_discount_cache():
+            get_discount_cache().invalidate(discount.code)
+        return False
+    payment.discount_id = discount.id
+    payment.discount_reserved = True
+    return True
+
+
+def release_discount(payment):
+    """Give back payment's reserved use, if it still holds one."""
+    if not payment.discount_reserved:
+        return
+    _update(
+        update(Discount)
+        .where(Discount.id == payment.discount_id, Discount.reserved_count > 0)
+        .values(reserved_count=Discount.reserved_count - 1)
+        .returning(Discount.id)
+    )
+    payment.discount_reserved = False
+
+
+def redeem_discount(payment):
+    """
+    Count the discount as used for a paid payment, turning its reservation
+    into a use: UPDATE ... SET used_count = used_count + 1 WHERE
+    used_count < max_uses RETURNING.
+    """
+    if not payment.discount_id:
+        return
+    values = {"used_count": _used + 1}
+    if payment.discount_reserved:
+        values["reserved_count"] = Discount.reserved_count - 1
+    stmt = update(Discount).where(Discount.id == payment.discount_id).values(**values).returning(Discount.id)
+    if _update(stmt.where(or_(Discount.max_uses.is_(None), _used < Discount.max_uses))) is None:
+        # paid after its reservation lapsed and the code sold out meanwhile; the buyer
+        # already paid the discounted price, so the use is counted anyway
+        current_app.logger.warning(f"Discount {payment.discount_id} redeemed past max_uses by payment {payment.id}")
+        _update(stmt)
+    payment.discount_reserved = False
+
+
+def release_expired_reservations(discount_id=None):
+    """Release uses held by pending checkouts that expired unpaid; returns how many."""
+    query = Payment.query.filter(
+        Payment.discount_reserved.is_(True),
+        Payment.status == "pending",
+        Payment.checkout_expires_at < datetime.utcnow()
+    )
+    if discount_id:
+        query = query.filter(Payment.discount_id == discount_id)
+    expired = query.with_for_update(skip_locked=True).all()
+    for payment in expired:
+        release_discount(payment)
+    return len(expired)
+
+
+class DiscountCache:
+    """
+    Read-through cache of discount codes (and the prices they apply to)
+    for /api/discounts/validate, so a code dropped to thousands of buyers
+    at once is read from the database every ttl seconds instead of per
+    request. Discounts are cached as detached rows, unknown codes as
+    None. When an entry expires one request reloads it while the rest keep
+    getting the old one. Counts may lag by up to ttl; that only affects
+    what validate reports, since checkout reserves uses in the database.
+    """
+
+    def __init__(self, ttl=DEFAULT_DISCOUNT_CACHE_TTL):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._entries = {}
+        self.hits = 0
+        self.misses = 0
+
+    def _get(self, key, load):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and (entry[0] > now or entry[2]):
+                self.hits += 1
+                return entry[1]
+            if entry:
+                # expired: this request reloads, the others keep the old value meanwhile
+                entry[2] = True
+            self.misses += 1
+        try:
+            value = load()
+        except Exception:
+            with self._lock:
+                if entry:
+                    entry[2] = False
+            raise
+        with self._lock:
+            if len(self._entries) >= MAX_CACHE_ENTRIES:
+                self._entries.clear()
+            self._entries[key] = [time.monotonic() + self.ttl, value, False]
+        return value
+
+    def discount(self, code):
+        """The Discount for code (detached, so it is safe to share), or None."""
+        def load():
+            discount = Discount.query.filter_by(code=code).first()
+            if discount is not None:
+                db.session.expunge(discount)
+            return discount
+        return self._get(("code", code), load)
+
+    def item_price(self, item_type, item_id):
+        """Base price of a beat or soundpack, or None when it doesn't exist."""
+        model = {"beat": Beat, "soundpack": SoundPack}[item_type]
+        def load():
+            item = db.session.get(model, item_id)
+            return float(item.price or 0.0) if item else None
+        return self._get((item_type, item_id), load)
+
+    def invalidate(self, code=None):
+        with self._lock:
+            if code is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(("code", code), None)
+
+    def metrics(self):
+        with self._lock:
+            return {
+                "ttl_s": self.ttl,
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+            }
+
+
+_discount_cache = None
+
+
+def init_discount_cache(app):
+    """Configure from DISCOUNT_CACHE_TTL (seconds; 0 disables caching)."""
+    global _discount_cache
+    _discount_cache = DiscountCache(float(app.config.get("DISCOUNT_CACHE_TTL", DEFAULT_DISCOUNT_CACHE_TTL)))
+    return _discount_cache
+
+
+def get_discount_cache():
+    return _discount_cache
@@ -0,0 +1,196 @@
+import json
+import threading
+from collections import namedtuple
+from datetime import datetime
+import requests
+from flask import current_app
+from sqlalchemy.exc import IntegrityError
+from server.extension import db
+from server.models.fx_rate import FxRate
+
+
+DEFAULT_FX_TTL = 60 * 60
+# past this age a cached rate is refreshed before use instead of in the background
+DEFAULT_FX_MAX_STALE = 3 * 24 * 60 * 60
+DEFAULT_FX_TIMEOUT = 3
+DEFAULT_FX_FALLBACK_RATES = {"USD/KES": 130.0}
+EXCHANGERATE_HOST_URL = "https://api.exchangerate.host/convert"
+
+FxQuote = namedtuple("FxQuote", ["rate", "fetched_at", "source"])
+
+
+class ExchangerateHostSource:
+    name = "exchangerate.host"
+
+    def __init__(self, url=EXCHANGERATE_HOST_URL, timeout=DEFAULT_FX_TIMEOUT):
+        self.url = url
+        self.timeout = timeout
+        self.session = requests.Session()
+
+    def fetch(self, base, quote):
+        response = self.session.get(self.url, params={"from": base, "to": quote, "amount": 1}, timeout=self.timeout)
+        data = response.json()
+        rate = float(data.get("result") or 0) if data.get("success") else 0
+        if rate <= 0:
+            raise ValueError(f"No {base}/{quote} rate in response: {data}")
+        return rate
+
+
+class FileRateSource:
+    """Rates from a JSON file like {"USD/KES": 129.5}; for tests and offline setups."""
+    name = "file"
+
+    def __init__(self, path):
+        self.path = path
+
+    def fetch(self, base, quote):
+        with open(self.path) as f:
+            rates = json.load(f)
+        rate = float(rates[f"{base}/{quote}"])
+        if rate <= 0:
+            raise ValueError(f"Invalid {base}/{quote} rate in {self.path}")
+        return rate
+
+
+FX_SOURCES = {
+    "exchangerate_host": lambda config: ExchangerateHostSource(
+        config.get("FX_RATE_API_URL", EXCHANGERATE_HOST_URL),
+        timeout=float(config.get("FX_RATE_TIMEOUT", DEFAULT_FX_TIMEOUT))
+    ),
+    "file": lambda config: FileRateSource(config["FX_RATE_FILE"]),
+}
+
+
+class FxRateProvider:
+    """
+    Exchange rates for checkout without a third-party call on the request
+    path. A rate younger than ttl is served from memory; an older one is
+    still served while a single background refresh runs, up to max_stale.
+    Fetched rates are written to fx_rates, so a fresh worker starts with
+    the last known rate and workers pick up each other's refreshes. When
+    no usable rate exists at all, the configured fallback is used.
+    """
+
+    def __init__(self, source, ttl=DEFAULT_FX_TTL, max_stale=DEFAULT_FX_MAX_STALE, fallback_rates=None):
+        self.source = source
+        self.ttl = ttl
+        self.max_stale = max_stale
+        self.fallback_rates = DEFAULT_FX_FALLBACK_RATES if fallback_rates is None else fallback_rates
+        self._lock = threading.Lock()
+        self._rates = {}
+        self._refreshing = set()
+
+    def _age(self, quote):
+        return (datetime.utcnow() - quote.fetched_at).total_seconds()
+
+    def _stored(self, base, quote):
+        row = db.session.execute(
+            db.select(FxRate.rate, FxRate.fetched_at, FxRate.source).filter_by(base=base, quote=quote)
+        ).first()
+        return FxQuote(*row) if row else None
+
+    def get_rate(self, base, quote):
+        """FxQuote for converting base into quote. Needs an app context."""
+        pair = (base, quote)
+        cached = self._rates.get(pair)
+        if cached and self._age(cached) < self.ttl:
+            return cached
+
+        stored = self._stored(base, quote)
+        if stored and (not cached or stored.fetched_at > cached.fetched_at):
+            cached = self._rates[pair] = stored
+        if cached and self._age(cached) < self.ttl:
+            return cached
+
+        if cached and self._age(cached) < self.max_stale:
+            self._refresh_in_background(base, quote)
+            return cached
+
+        try:
+            return self.refresh(base, quote)
+        except Exception as e:
+            current_app.logger.warning(f"FX rate refresh failed for {base}/{quote}: {e}")
+            if cached:
+                return cached
+            rate = self.fallback_rates.get(f"{base}/{quote}")
+            if rate is None:
+                raise
+            return FxQuote(float(rate), datetime.utcnow(), "fallback")
+
+    def refresh(self, base, quote):
+        """Fetch the rate from the source now and persist it (best effort)."""
+        rate = self.source.fetch(base, quote)
+        fetched = FxQuote(rate, datetime.utcnow(), self.source.name)
+        try:
+            try:
+                self._save(base, quote, fetched)
+            except IntegrityError:
+                # another worker inserted the pair first; update its row instead
+                self._save(base, quote, fetched)
+        except Exception as e:
+            # the rate itself is good; other workers just fetch their own
+            current_app.logger.warning(f"FX rate for {base}/{quote} not persisted: {e}")
+        self._rates[(base, quote)] = fetched
+        return fetched
+
+    def _save(self, base, quote, fetched):
+        # its own connection and transaction: this can run in the middle of a
+        # checkout, whose pending work on the request session isn't ours to commit
+        table = FxRate.__table__
+        values = fetched._asdict()
+        with db.engine.begin() as conn:
+            updated = conn.execute(
+                table.update().where(table.c.base == base, table.c.quote == quote).values(**values)
+            ).rowcount
+            if not updated:
+                conn.execute(table.insert().values(base=base, quote=quote, **values))
+
+    def _refresh_in_background(self, base, quote):
+        with self._lock:
+            if (base, quote) in self._refreshing:
+                return
+            self._refreshing.add((base, quote))
+        app = current_app._get_current_object()
+
+        def run():
+            try:
+                with app.app_context():
+                    self.refresh(base, quote)
+            except Exception as e:
+                app.logger.warning(f"FX rate refresh failed for {base}/{quote}: {e}")
+            finally:
+                with self._lock:
+                    self._refreshing.discard((base, quote))
+
+        threading.Thread(target=run, daemon=True).start()
+
+    def convert(self, amount, base, quote):
+        """(converted amount rounded to cents, FxQuote used)."""
+        fx = self.get_rate(base, quote)
+        return round(amount * fx.rate, 2), fx
+
+
+_fx_rates = None
+
+
+def init_fx_rates(app):
+    """
+    Configure from FX_RATE_SOURCE ("exchangerate_host" or "file", with
+    FX_RATE_FILE), FX_RATE_TTL, FX_RATE_MAX_STALE and FX_FALLBACK_RATES.
+    """
+    global _fx_rates
+    source = FX_SOURCES[app.config.get("FX_RATE_SOURCE", "exchangerate_host")](app.config)
+    _fx_rates = FxRateProvider(
+        source,
+        ttl=int(app.config.get("FX_RATE_TTL", DEFAULT_FX_TTL)),
+        max_stale=int(app.config.get("FX_RATE_MAX_STALE", DEFAULT_FX_MAX_STALE)),
+        fallback_rates=app.config.get("FX_FALLBACK_RATES", DEFAULT_FX_FALLBACK_RATES)
+    )
+    return _fx_rates
+
+
+def get_fx_rates():
+    global _fx_rates
+    if _fx_rates is None:
+        _fx_rates = FxRateProvider(ExchangerateHostSource())
+    return _fx_rates
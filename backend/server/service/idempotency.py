@@ -0,0 +1,130 @@
+import time
+import hashlib
+from functools import wraps
+from datetime import datetime, timedelta
+from flask import request, current_app
+from sqlalchemy.exc import IntegrityError
+from server.extension import db
+from server.models.idempotency_key import IdempotencyKey
+
+
+IDEMPOTENCY_HEADER = "Idempotency-Key"
+DEFAULT_IDEMPOTENCY_TTL = 24 * 60 * 60
+MAX_KEY_LENGTH = 255
+# how long a duplicate waits for the first request before giving up with a 409
+WAIT_TIMEOUT = 30
+WAIT_INTERVAL = 0.1
+
+
+def _request_hash():
+    digest = hashlib.sha256()
+    digest.update(request.method.encode())
+    digest.update(request.path.encode())
+    digest.update(request.get_data())
+    return digest.hexdigest()
+
+
+def _replay(record):
+    return record.response_body, record.response_status, {"Idempotent-Replayed": "true"}
+
+
+def _claim(user_id, key, request_hash):
+    """Insert the in-progress row; returns None when we own the key, else the existing row."""
+    now = datetime.utcnow()
+    ttl = int(current_app.config.get("IDEMPOTENCY_TTL", DEFAULT_IDEMPOTENCY_TTL))
+    # keys are only ever looked up by (user, key), so expired ones are swept per user
+    IdempotencyKey.query.filter(
+        IdempotencyKey.user_id == user_id, IdempotencyKey.expires_at <= now
+    ).delete()
+    for _ in range(2):
+        db.session.add(IdempotencyKey(
+            user_id=user_id,
+            key=key,
+            request_hash=request_hash,
+            expires_at=now + timedelta(seconds=ttl)
+        ))
+        try:
+            db.session.commit()
+            return None
+        except IntegrityError:
+            db.session.rollback()
+
+        existing = IdempotencyKey.query.filter_by(user_id=user_id, key=key).first()
+        if existing is None or existing.expires_at <= now:
+            # expired (or just released): drop it and claim again
+            IdempotencyKey.query.filter_by(user_id=user_id, key=key).filter(
+                IdempotencyKey.expires_at <= now
+            ).delete()
+            db.session.commit()
+            continue
+        return existing
+    return IdempotencyKey.query.filter_by(user_id=user_id, key=key).first()
+
+
+def _wait_for(record_id):
+    deadline = time.monotonic() + WAIT_TIMEOUT
+    while time.monotonic() < deadline:
+        db.session.expire_all()
+        record = db.session.get(IdempotencyKey, record_id)
+        if record is None or record.status == "completed":
+            return record
+        time.sleep(WAIT_INTERVAL)
+    return db.session.get(IdempotencyKey, record_id)
+
+
+def _split_response(result):
+    if isinstance(result, tuple):
+        body = result[0]
+        status = result[1] if len(result) > 1 else 200
+        return body, status
+    return result, 200
+
+
+def idempotent(f):
+    """
+    Honour an Idempotency-Key header on the decorated view (which must run
+    after authentication). The first request's response is stored per
+    (user, key) for IDEMPOTENCY_TTL seconds and replayed for repeats;
+    a repeat arriving while the first is still running waits for it.
+    Server errors release the key so the client can retry.
+    """
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        key = request.headers.get(IDEMPOTENCY_HEADER)
+        if not key:
+            return f(*args, **kwargs)
+        if len(key) > MAX_KEY_LENGTH:
+            return {"error": f"{IDEMPOTENCY_HEADER} must be at most {MAX_KEY_LENGTH} characters"}, 400
+
+        user_id = request.current_user.id
+        request_hash = _request_hash()
+        existing = _claim(user_id, key, request_hash)
+        if existing is not None:
+            if existing.request_hash != request_hash:
+                return {"error": f"{IDEMPOTENCY_HEADER} was already used for a different request"}, 422
+            record = existing if existing.status == "completed" else _wait_for(existing.id)
+            if record is None:
+                return {"error": "The original request failed, retry it"}, 409
+            if record.status != "completed":
+                return {"error": "A request with this Idempotency-Key is still in progress"}, 409
+            return _replay(record)
+
+        try:
+            result = f(*args, **kwargs)
+        except Exception:
+            db.session.rollback()
+            IdempotencyKey.query.filter_by(user_id=user_id, key=key).delete()
+            db.session.commit()
+            raise
+
+        body, status = _split_response(result)
+        record = IdempotencyKey.query.filter_by(user_id=user_id, key=key).first()
+        if status >= 500 or not isinstance(body, (dict, list)):
+            db.session.delete(record)
+        else:
+            record.status = "completed"
+            record.response_status = status
+            record.response_body = body
+        db.session.commit()
+        return result
+    return decorated_function
@@ -0,0 +1,369 @@
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from sqlalchemy.exc import IntegrityError
+from datetime import datetime
+import numpy as np
+from flask import current_app
+from server.extension import db
+from server.models.beat import Beat
+from server.models.beat_file import BeatFile
+from server.models.user import User
+from server.models.beat_waveform import BeatWaveform
+from server.models.audio_fingerprint import AudioFingerprint
+from server.models.fingerprint_match import FingerprintMatch
+from server.models.media_derivative import MediaDerivative
+from server.service.upload_service import upload_to_storage, upload_hls_package, media_source
+from server.service.scratch import get_scratch
+from server.service.task_pool import get_cpu_pool
+from server.utils.audio_utils import (
+    create_preview,
+    decode_pcm,
+    ANALYSIS_SAMPLE_RATE,
+    PREVIEW_DURATION_MS,
+    HLS_MASTER_PLAYLIST,
+    HLS_BITRATES,
+    HLS_SEGMENT_SECONDS,
+    WATERMARK_INTERVAL_SECONDS,
+)
+from server.utils.waveform import build_waveforms, WAVEFORM_FORMAT
+from server.utils.audio_analysis import analyze_audio
+from server.utils.fingerprint import fingerprint, aligned_match_counts
+
+# hashes that must line up at one time offset before an upload is flagged
+FINGERPRINT_MATCH_THRESHOLD = 25
+FINGERPRINT_LOOKUP_BATCH = 1000
+# 30s of MP3 plus the three-rung HLS ladder comes to roughly 2MB
+PREVIEW_SCRATCH_RESERVE = 8 * 1024 * 1024
+# what extract_audio_features derives from an upload's PCM
+INGEST_STEPS = ("waveform", "analysis", "fingerprint")
+# part of the derivative cache key: change it whenever create_preview's output changes
+PREVIEW_CODEC_PARAMS = f"mp3:libmp3lame;hls:aac:{','.join(HLS_BITRATES)}:{HLS_SEGMENT_SECONDS}s"
+# one background re-render at a time, so a later tag change can't be overwritten by an earlier one
+_rerender_lock = threading.Lock()
+
+
+def preview_watermark(producer):
+    """
+    Voice tag settings for a producer's previews, or None when they have no
+    tag or PREVIEW_WATERMARK is off. Needs an app context.
+    """
+    if not producer or not producer.voice_tag_url or not current_app.config.get("PREVIEW_WATERMARK", True):
+        return None
+    return {
+        "source": media_source(producer.voice_tag_url),
+        "interval": float(current_app.config.get("PREVIEW_WATERMARK_INTERVAL", WATERMARK_INTERVAL_SECONDS)),
+        "producer_id": producer.id,
+        "version": producer.voice_tag_version,
+    }
+
+
+def preview_tag_version(watermark):
+    return watermark["version"] if watermark else None
+
+
+def _picklable(source):
+    # the pool pickles arguments, so uploaded file objects go over as bytes
+    if isinstance(source, (str, bytes)):
+        return source
+    source.seek(0)
+    data = source.read()
+    source.seek(0)
+    return data
+
+
+def render_preview(source, preview_start=0, watermark=None):
+    """
+    Cut the MP3 preview and its HLS ladder in one ffmpeg pass and upload
+    both, mixing in the producer's voice tag when watermark is given.
+    Returns (preview_url, preview_playlist_url); the playlist is optional
+    and its failure leaves the MP3 preview in place.
+    """
+    source = _picklable(source)
+    with get_scratch().directory("preview-", reserve=PREVIEW_SCRATCH_RESERVE) as work_dir:
+        preview_path = get_cpu_pool().run(
+            create_preview,
+            source,
+            os.path.join(work_dir, "preview.mp3"),
+            start_time=preview_start,
+            hls_dir=work_dir,
+            **({"watermark": watermark["source"], "watermark_interval": watermark["interval"]} if watermark else {})
+        )
+        if not preview_path:
+            return None, None
+
+        preview_url = upload_to_storage(preview_path, folder="beats")["url"]
+        try:
+            playlist_url = upload_hls_package(work_dir, HLS_MASTER_PLAYLIST)
+        except Exception as e:
+            print("HLS upload failed:", e)
+            playlist_url = None
+        return preview_url, playlist_url
+
+
+def preview_cache_key(source_hash, preview_start=0, watermark=None):
+    codec_params = PREVIEW_CODEC_PARAMS
+    if watermark:
+        # one cached render per (audio, tag version), so a new tag misses and an old one hits again
+        codec_params += f";tag:{watermark['producer_id']}.v{watermark['version']}:{watermark['interval']:g}s"
+    return dict(
+        source_hash=source_hash,
+        kind="preview",
+        start_time=float(preview_start),
+        duration=PREVIEW_DURATION_MS / 1000,
+        codec_params=codec_params
+    )
+
+
+def lookup_preview(key):
+    cached = MediaDerivative.query.filter_by(**key).first() if key["source_hash"] else None
+    if cached:
+        return cached.outputs["preview_url"], cached.outputs.get("preview_playlist_url")
+    return None
+
+
+def remember_preview(key, preview_url, playlist_url):
+    if not (preview_url and key["source_hash"]):
+        return
+    try:
+        # a concurrent render of the same key may win the insert; its row is as good as ours
+        with db.session.begin_nested():
+            db.session.add(MediaDerivative(
+                **key,
+                outputs={"preview_url": preview_url, "preview_playlist_url": playlist_url}
+            ))
+    except IntegrityError:
+        pass
+
+
+def cached_preview(source, source_hash, preview_start=0, watermark=None):
+    """
+    render_preview through the derivative cache: the same audio cut at the
+    same offset with the same codec settings and voice tag is rendered and
+    uploaded once.
+    """
+    key = preview_cache_key(source_hash, preview_start, watermark)
+    cached = lookup_preview(key)
+    if cached:
+        return cached
+
+    preview_url, playlist_url = render_preview(source, preview_start, watermark)
+    remember_preview(key, preview_url, playlist_url)
+    return preview_url, playlist_url
+
+
+def rerender_previews(producer_id=None, force=False, log=print):
+    """
+    Bring previews in line with their producer's current voice tag. Beats
+    whose preview already carries it are skipped unless force is set;
+    renders run on the CPU pool, as many at once as it has workers, while
+    lookups and writes stay on this thread's session. Returns
+    (updated, failed).
+    """
+    query = (
+        db.session.query(Beat, BeatFile, User)
+        .join(BeatFile, (BeatFile.beat_id == Beat.id) & (BeatFile.file_type == "mp3"))
+        .join(User, User.id == Beat.producer_id)
+        .order_by(Beat.id)
+    )
+    if producer_id:
+        query = query.filter(Beat.producer_id == producer_id)
+
+    watermarks = {}
+    updated = failed = 0
+    pending = []
+    for beat, mp3, producer in query:
+        if producer.id not in watermarks:
+            watermarks[producer.id] = preview_watermark(producer)
+        watermark = watermarks[producer.id]
+        if not force and beat.preview_tag_version == preview_tag_version(watermark):
+            continue
+
+        key = preview_cache_key(mp3.content_hash, beat.preview_start or 0, watermark)
+        cached = lookup_preview(key)
+        if cached:
+            beat.preview_url, beat.preview_playlist_url = cached
+            beat.preview_tag_version = preview_tag_version(watermark)
+            updated += 1
+        else:
+            pending.append((beat, mp3, watermark, key))
+
+    # the threads only wait on the pool and on storage uploads, so sizing them to
+    # the pool keeps every worker busy without tripping its queue
+    with ThreadPoolExecutor(max_workers=max(get_cpu_pool().workers, 1)) as threads:
+        futures = [
+            (beat, watermark, key, threads.submit(
+                render_preview, media_source(mp3.file_url), beat.preview_start or 0, watermark
+            ))
+            for beat, mp3, watermark, key in pending
+        ]
+        for beat, watermark, key, future in futures:
+            try:
+                preview_url, playlist_url = future.result()
+            except Exception as e:
+                preview_url, playlist_url = None, None
+                log(f"Beat {beat.id}: preview render failed: {e}")
+            if not preview_url:
+                failed += 1
+                continue
+            remember_preview(key, preview_url, playlist_url)
+            beat.preview_url, beat.preview_playlist_url = preview_url, playlist_url
+            beat.preview_tag_version = preview_tag_version(watermark)
+            updated += 1
+
+    db.session.commit()
+    return updated, failed
+
+
+def start_preview_rerender(producer_id):
+    """Re-render a producer's previews on a background thread after their tag changed."""
+    app = current_app._get_current_object()
+
+    def run():
+        with _rerender_lock, app.app_context():
+            try:
+                updated, failed = rerender_previews(producer_id)
+                print(f"Previews re-rendered for producer {producer_id}: {updated} updated, {failed} failed")
+            except Exception as e:
+                db.session.rollback()
+                print("Preview re-render failed:", e)
+
+    thread = threading.Thread(target=run, daemon=True)
+    thread.start()
+    return thread
+
+
+def save_waveforms(beat, waveforms):
+    BeatWaveform.query.filter_by(beat_id=beat.id).delete()
+    for resolution, peaks in waveforms.items():
+        db.session.add(BeatWaveform(
+            beat_id=beat.id,
+            resolution=resolution,
+            format=WAVEFORM_FORMAT,
+            peaks=peaks
+        ))
+
+
+def save_analysis(beat, analysis):
+    """Detected tempo/key with confidences; the producer's declared values are untouched."""
+    for field, value in analysis.items():
+        setattr(beat, field, value)
+    beat.analyzed_at = datetime.utcnow()
+
+
+def find_fingerprint_matches(hashes, offsets, exclude_beat_id=None):
+    """{beat_id: aligned hash count} from index lookups on the query's hashes."""
+    hits = []
+    unique_hashes = np.unique(hashes).tolist()
+    for i in range(0, len(unique_hashes), FINGERPRINT_LOOKUP_BATCH):
+        query = db.session.query(
+            AudioFingerprint.hash, AudioFingerprint.beat_id, AudioFingerprint.time_offset
+        ).filter(AudioFingerprint.hash.in_(unique_hashes[i:i + FINGERPRINT_LOOKUP_BATCH]))
+        if exclude_beat_id:
+            query = query.filter(AudioFingerprint.beat_id != exclude_beat_id)
+        hits.extend(query.all())
+
+    if not hits:
+        return {}
+    hits = np.array(hits, dtype=np.int64)
+    return aligned_match_counts(hashes, offsets, hits[:, 0], hits[:, 1], hits[:, 2])
+
+
+def save_fingerprint(beat, hashes, offsets):
+    """
+    Match the beat against the whole catalog, flag near-duplicates, then
+    replace the beat's own rows in the fingerprint index.
+    """
+    counts = find_fingerprint_matches(hashes, offsets, exclude_beat_id=beat.id)
+
+    FingerprintMatch.query.filter_by(beat_id=beat.id).delete()
+    for matched_id, aligned in counts.items():
+        if aligned < FINGERPRINT_MATCH_THRESHOLD:
+            continue
+        matched = db.session.get(Beat, matched_id)
+        db.session.add(FingerprintMatch(
+            beat_id=beat.id,
+            matched_beat_id=matched_id,
+            aligned_hashes=aligned,
+            score=round(aligned / max(len(hashes), 1), 4),
+            same_producer=matched is not None and matched.producer_id == beat.producer_id
+        ))
+        print(f"Beat {beat.id} matches beat {matched_id} ({aligned} aligned hashes)")
+
+    AudioFingerprint.query.filter_by(beat_id=beat.id).delete()
+    if len(hashes):
+        db.session.execute(
+            AudioFingerprint.__table__.insert(),
+            [
+                {"hash": h, "beat_id": beat.id, "time_offset": o}
+                for h, o in zip(hashes.tolist(), offsets.tolist())
+            ]
+        )
+
+
+def extract_audio_features(source, preview_start=0, steps=INGEST_STEPS):
+    """
+    Pool worker: decode once and compute the requested steps. Returns None
+    when the audio can't be decoded, else {step: result}, with the message
+    of any step that failed under "errors". No database access.
+    """
+    samples = decode_pcm(source)
+    if samples is None or len(samples) == 0:
+        return None
+
+    compute = {
+        "waveform": lambda: build_waveforms(
+            samples, ANALYSIS_SAMPLE_RATE, start_time=preview_start, duration=PREVIEW_DURATION_MS / 1000
+        ),
+        "analysis": lambda: analyze_audio(samples, ANALYSIS_SAMPLE_RATE),
+        "fingerprint": lambda: fingerprint(samples, ANALYSIS_SAMPLE_RATE),
+    }
+    features = {"errors": {}}
+    for step in steps:
+        try:
+            features[step] = compute[step]()
+        except Exception as e:
+            features["errors"][step] = str(e)
+    return features
+
+
+def refresh_waveforms(beat, source, preview_start=0):
+    """Recompute only the preview-window peaks, for when just the offset moved."""
+    features = get_cpu_pool().run(extract_audio_features, _picklable(source), preview_start, ("waveform",))
+    if not features or "waveform" not in features:
+        return False
+    save_waveforms(beat, features["waveform"])
+    return True
+
+
+def ingest_beat_audio(beat, source, preview_start=0):
+    """
+    Decode the uploaded MP3 once on the CPU pool and derive the catalog's
+    audio metadata from the PCM. Failures are logged and never block the
+    upload itself.
+    """
+    try:
+        features = get_cpu_pool().run(extract_audio_features, _picklable(source), preview_start)
+    except Exception as e:
+        print("Audio ingest failed:", e)
+        return False
+    if not features:
+        return False
+
+    # a savepoint per step: a failed write is rolled back on its own and the
+    # session stays usable for the beat's commit
+    saves = (
+        ("waveform", lambda waveforms: save_waveforms(beat, waveforms)),
+        ("analysis", lambda analysis: save_analysis(beat, analysis)),
+        ("fingerprint", lambda result: save_fingerprint(beat, *result)),
+    )
+    for step, save in saves:
+        if step in features["errors"]:
+            print(f"Audio {step} failed:", features["errors"][step])
+            continue
+        try:
+            with db.session.begin_nested():
+                save(features[step])
+        except Exception as e:
+            print(f"Audio {step} failed:", e)
+    return True
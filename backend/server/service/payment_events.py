@@ -0,0 +1,145 @@
+from datetime import datetime
+from flask import current_app
+from sqlalchemy import update
+from sqlalchemy.dialects import postgresql, sqlite
+from server.extension import db
+from server.models.payment import Payment
+from server.models.sale import Sale
+from server.models.contract import Contract
+from server.models.contract_template import ContractTemplate
+from server.service.discounts import redeem_discount, release_discount
+
+
+# INSERT ... ON CONFLICT DO NOTHING, by database
+CONFLICT_INSERTS = {
+    "postgresql": postgresql.insert,
+    "sqlite": sqlite.insert,
+}
+
+
+def find_payment(reference, metadata):
+    """
+    The payment an event is about, locked FOR UPDATE so that duplicate
+    deliveries handled at the same time by different workers take turns
+    and the second one sees the first one's status.
+    """
+    query = Payment.query.with_for_update().populate_existing()
+    payment = None
+    try:
+        pid = metadata.get("payment_id")
+        if pid:
+            payment = query.filter_by(id=int(pid)).first()
+    except Exception:
+        payment = None
+
+    if not payment and reference:
+        payment = query.filter_by(transaction_ref=reference).first()
+    return payment
+
+
+def payment_lines(payment, file_type=None):
+    """(beat_id, soundpack_id, file_type, amount) for everything a payment bought."""
+    if payment.items:
+        return [(item.beat_id, item.soundpack_id, item.file_type, item.amount) for item in payment.items]
+    return [(payment.beat_id, payment.soundpack_id, file_type or payment.file_type, payment.amount)]
+
+
+def fulfil_payment(payment, file_type=None):
+    """
+    Create a sale for each line of a paid payment in one INSERT that skips
+    sales the buyer already has (uq_sale_buyer_beat_file /
+    uq_sale_buyer_soundpack), then a contract for each new beat sale whose
+    beat has a template. Contracts start with pdf_status "pending"; the
+    contract renderer fills in their contract_url once the caller has
+    committed. Returns the (id, beat_id, file_type, amount) of new sales.
+    """
+    now = datetime.utcnow()
+    rows = [
+        {
+            "buyer_id": payment.user_id,
+            "beat_id": beat_id,
+            "soundpack_id": soundpack_id,
+            "amount": amount,  # keep your USD display amount
+            "file_type": line_file_type,
+            "created_at": now,
+        }
+        for beat_id, soundpack_id, line_file_type, amount in payment_lines(payment, file_type)
+    ]
+    insert = CONFLICT_INSERTS[db.session.get_bind().dialect.name]
+    created = db.session.execute(
+        insert(Sale).on_conflict_do_nothing().returning(Sale.id, Sale.beat_id, Sale.file_type, Sale.amount),
+        rows
+    ).all()
+
+    # Link contract if applicable
+    beat_ids = {sale.beat_id for sale in created if sale.beat_id}
+    templates = {
+        (template.beat_id, template.file_type): template
+        for template in ContractTemplate.query.filter(ContractTemplate.beat_id.in_(beat_ids))
+    } if beat_ids else {}
+
+    contracts = {}
+    for sale in created:
+        template = templates.get((sale.beat_id, sale.file_type))
+        if template:
+            contracts[sale.id] = Contract(
+                buyer_id=payment.user_id,
+                beat_id=sale.beat_id,
+                file_type=sale.file_type,
+                contract_type=template.contract_type,
+                terms=template.terms,
+                price=sale.amount,  # again, USD value
+                template=template,
+                pdf_status="pending"
+            )
+    if contracts:
+        db.session.add_all(contracts.values())
+        db.session.flush()
+        db.session.execute(
+            update(Sale),
+            [{"id": sale_id, "contract_id": contract.id} for sale_id, contract in contracts.items()]
+        )
+    return created
+
+
+def handle_paystack_event(payload):
+    """
+    Apply a Paystack event to its payment. Raises on failure so the inbox
+    retries it; the caller commits.
+    """
+    data = payload.get("data", {})
+    ref = data.get("reference")
+    status = data.get("status")
+    metadata = data.get("metadata", {}) or {}
+
+    payment = find_payment(ref, metadata)
+    if not payment:
+        current_app.logger.warning(f"Payment not found for reference {ref}")
+        return
+
+    # Avoid double processing
+    if payment.status == "success":
+        current_app.logger.info(f"Payment {ref} already processed")
+        return
+
+    paystack_amount = data.get("amount", 0) / 100.0  # convert from kobo-like units
+    paystack_currency = data.get("currency", "KES").upper()
+    current_app.logger.info(
+        f"Webhook received: Ref={ref}, Paystack Amount={paystack_amount} {paystack_currency}, "
+        f"Local USD Display={payment.amount} USD"
+    )
+
+    if status in ("success", "successful"):
+        payment.status = "success"
+        file_type = metadata.get("file_type")
+        current_app.logger.info(f"Processing purchase for file_type: {file_type}")
+        sales = fulfil_payment(payment, file_type)
+        redeem_discount(payment)
+        current_app.logger.info(
+            f"Payment {ref} processed successfully — {len(sales)} new sale(s), USD: {payment.amount}, "
+            f"Paid: {paystack_amount} {paystack_currency}"
+        )
+    else:
+        payment.status = "failed"
+        release_discount(payment)
+        current_app.logger.info(f"Payment {ref} failed")
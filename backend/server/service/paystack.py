@@ -0,0 +1,196 @@
+import os
+import time
+import random
+import threading
+from collections import deque
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import NewConnectionError, ConnectTimeoutError
+
+
+PAYSTACK_BASE_URL = "https://api.paystack.co"
+PAYSTACK_POOL_SIZE = 10
+PAYSTACK_MAX_RETRIES = 3
+# (connect, read) seconds
+PAYSTACK_TIMEOUT = (3.05, 15)
+BACKOFF_BASE = 0.25
+BACKOFF_CAP = 4.0
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+LATENCY_WINDOW = 512
+
+
+class PaystackError(Exception):
+    def __init__(self, message, status=None, response=None):
+        super().__init__(message)
+        self.status = status
+        self.response = response
+
+
+def _never_sent(error):
+    """True for failures to connect at all, which are safe to retry for any call."""
+    if isinstance(error, requests.ConnectTimeout):
+        return True
+    reason = getattr(error.args[0], "reason", None) if error.args else None
+    return isinstance(reason, (NewConnectionError, ConnectTimeoutError))
+
+
+class _EndpointStats:
+    def __init__(self):
+        self.calls = 0
+        self.errors = 0
+        self.retries = 0
+        self.latencies = deque(maxlen=LATENCY_WINDOW)
+
+    def snapshot(self):
+        latencies = sorted(self.latencies)
+        pick = lambda q: round(1000 * latencies[min(len(latencies) - 1, int(q * len(latencies)))], 1) if latencies else None
+        return {
+            "calls": self.calls,
+            "errors": self.errors,
+            "retries": self.retries,
+            "p50_ms": pick(0.5),
+            "p95_ms": pick(0.95),
+            "max_ms": round(1000 * latencies[-1], 1) if latencies else None,
+        }
+
+
+class PaystackClient:
+    """
+    Paystack API client. Each worker process keeps one keep-alive session,
+    so checkouts reuse warm TLS connections instead of opening one per
+    call. Idempotent calls are retried on connection errors and 429/5xx
+    with jittered exponential backoff; others only when the connection
+    couldn't be opened, since then nothing reached Paystack.
+    Non-2xx answers that Paystack explains in JSON are returned as-is for
+    the caller to inspect, like the API's own {"status": false} bodies.
+    """
+
+    def __init__(self, secret_key, base_url=PAYSTACK_BASE_URL, pool_size=PAYSTACK_POOL_SIZE,
+                 max_retries=PAYSTACK_MAX_RETRIES, timeout=PAYSTACK_TIMEOUT):
+        self.secret_key = secret_key
+        self.base_url = base_url.rstrip("/")
+        self.pool_size = pool_size
+        self.max_retries = max_retries
+        self.timeout = timeout
+        self._lock = threading.Lock()
+        self._session = None
+        self._pid = None
+        self._stats = {}
+
+    @property
+    def session(self):
+        # a session's sockets must not be shared with a forked worker
+        if self._session is None or self._pid != os.getpid():
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_size)
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            session.headers.update({
+                "Authorization": f"Bearer {self.secret_key}",
+                "Content-Type": "application/json",
+            })
+            self._session, self._pid = session, os.getpid()
+        return self._session
+
+    def _endpoint(self, name):
+        with self._lock:
+            return self._stats.setdefault(name, _EndpointStats())
+
+    def _backoff(self, attempt, response=None):
+        retry_after = response.headers.get("Retry-After") if response is not None else None
+        if retry_after and retry_after.isdigit():
+            return min(float(retry_after), BACKOFF_CAP)
+        # full jitter keeps workers that failed together from retrying together
+        return random.uniform(0, min(BACKOFF_CAP, BACKOFF_BASE * 2 ** attempt))
+
+    def request(self, method, path, json=None, params=None, timeout=None, idempotent=None, name=None):
+        """
+        Call the API and return its decoded JSON. idempotent defaults to
+        True for GET; name groups calls in metrics (defaults to path).
+        Raises PaystackError when no JSON answer could be obtained.
+        """
+        idempotent = method.upper() == "GET" if idempotent is None else idempotent
+        stats = self._endpoint(name or path)
+
+        for attempt in range(1 + self.max_retries):
+            started = time.perf_counter()
+            response = None
+            retryable = idempotent
+            try:
+                response = self.session.request(
+                    method, self.base_url + path, json=json, params=params, timeout=timeout or self.timeout
+                )
+                error = None if response.status_code not in RETRY_STATUSES else PaystackError(
+                    f"Paystack {path} returned {response.status_code}", status=response.status_code, response=response
+                )
+            except (requests.ConnectionError, requests.Timeout) as e:
+                error = PaystackError(f"Paystack {path} unreachable: {e}")
+                retryable = idempotent or _never_sent(e)
+            finally:
+                with self._lock:
+                    stats.calls += 1
+                    stats.latencies.append(time.perf_counter() - started)
+
+            if error is None:
+                try:
+                    return response.json()
+                except ValueError:
+                    with self._lock:
+                        stats.errors += 1
+                    raise PaystackError(
+                        f"Paystack {path} returned non-JSON ({response.status_code})",
+                        status=response.status_code, response=response
+                    )
+
+            if not retryable or attempt == self.max_retries:
+                with self._lock:
+                    stats.errors += 1
+                raise error
+            with self._lock:
+                stats.retries += 1
+            time.sleep(self._backoff(attempt, response))
+
+    def initialize_transaction(self, payload, timeout=None):
+        # not idempotent: once the request may have reached Paystack, a retry is
+        # refused as a duplicate reference and its checkout page can't be fetched back
+        return self.request("POST", "/transaction/initialize", json=payload, timeout=timeout, idempotent=False)
+
+    def verify_transaction(self, reference, timeout=None):
+        return self.request(
+            "GET", f"/transaction/verify/{reference}", timeout=timeout, name="/transaction/verify"
+        )
+
+    def metrics(self):
+        with self._lock:
+            endpoints = {name: stats.snapshot() for name, stats in self._stats.items()}
+        return {"base_url": self.base_url, "pool_size": self.pool_size, "endpoints": endpoints}
+
+
+_paystack = None
+
+
+def init_paystack(app):
+    """
+    Configure from PAYSTACK_SECRET_KEY, PAYSTACK_BASE_URL (point it at a
+    stub server for load tests), PAYSTACK_POOL_SIZE, PAYSTACK_MAX_RETRIES
+    and PAYSTACK_CONNECT_TIMEOUT / PAYSTACK_READ_TIMEOUT.
+    """
+    global _paystack
+    _paystack = PaystackClient(
+        app.config.get("PAYSTACK_SECRET_KEY") or os.getenv("PAYSTACK_SECRET_KEY"),
+        base_url=app.config.get("PAYSTACK_BASE_URL", PAYSTACK_BASE_URL),
+        pool_size=int(app.config.get("PAYSTACK_POOL_SIZE", PAYSTACK_POOL_SIZE)),
+        max_retries=int(app.config.get("PAYSTACK_MAX_RETRIES", PAYSTACK_MAX_RETRIES)),
+        timeout=(
+            float(app.config.get("PAYSTACK_CONNECT_TIMEOUT", PAYSTACK_TIMEOUT[0])),
+            float(app.config.get("PAYSTACK_READ_TIMEOUT", PAYSTACK_TIMEOUT[1]))
+        )
+    )
+    return _paystack
+
+
+def get_paystack():
+    global _paystack
+    if _paystack is None:
+        _paystack = PaystackClient(os.getenv("PAYSTACK_SECRET_KEY"))
+    return _paystack
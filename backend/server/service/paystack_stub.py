@@ -0,0 +1,59 @@
+import time
+import uuid
+import threading
+from flask import Flask, request
+
+
+def create_stub_app(outcome="success", latency=0.0):
+    """
+    A stand-in for the parts of the Paystack API this app calls, for load
+    tests and for running 'flask payments reconcile' offline. Point
+    PAYSTACK_BASE_URL at it. Transactions it initialized verify with
+    their own amount and metadata; any other reference verifies with
+    outcome and no metadata, so the payment is found by reference.
+    """
+    app = Flask("paystack_stub")
+    transactions = {}
+    lock = threading.Lock()
+
+    @app.before_request
+    def delay():
+        if latency:
+            time.sleep(latency)
+
+    @app.post("/transaction/initialize")
+    def initialize():
+        payload = request.get_json() or {}
+        reference = payload.get("reference") or uuid.uuid4().hex
+        with lock:
+            if reference in transactions:
+                return {"status": False, "message": "Duplicate Transaction Reference"}, 400
+            transactions[reference] = payload
+        access_code = uuid.uuid4().hex[:15]
+        return {
+            "status": True,
+            "message": "Authorization URL created",
+            "data": {
+                "authorization_url": f"{request.host_url}checkout/{access_code}",
+                "access_code": access_code,
+                "reference": reference,
+            },
+        }
+
+    @app.get("/transaction/verify/<reference>")
+    def verify(reference):
+        with lock:
+            payload = transactions.get(reference, {})
+        return {
+            "status": True,
+            "message": "Verification successful",
+            "data": {
+                "reference": reference,
+                "status": outcome,
+                "amount": payload.get("amount", 0),
+                "currency": payload.get("currency", "KES"),
+                "metadata": payload.get("metadata") or {},
+            },
+        }
+
+    return app
@@ -0,0 +1,182 @@
+import os
+import time
+import hashlib
+import tempfile
+import threading
+from server.service.storage import get_storage
+
+
+DEFAULT_PREVIEW_CACHE_BYTES = 1024 * 1024 * 1024
+FILL_CHUNK_SIZE = 1024 * 1024
+FILL_TIMEOUT = 60
+# partial downloads older than this belong to a fill that died
+STALE_PART_SECONDS = 60 * 60
+
+
+class _Fill:
+    def __init__(self):
+        self.done = threading.Event()
+        self.error = None
+
+
+class PreviewCache:
+    """
+    Size-bounded local disk cache of stored previews, so hot previews are
+    served with sendfile and seek locally instead of round-tripping to the
+    CDN. Recency is the file's atime (set explicitly on every hit) and
+    eviction drops the least recently used files once the directory is
+    over max_bytes. Entries are keyed by URL, and a re-rendered preview
+    gets a new URL, so entries never go stale; several worker processes
+    can share one directory.
+    """
+
+    def __init__(self, root=None, max_bytes=DEFAULT_PREVIEW_CACHE_BYTES):
+        self.root = os.path.abspath(root or os.path.join(tempfile.gettempdir(), "beatsmart-preview-cache"))
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._fills = {}
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.fill_errors = 0
+        self.filled_bytes = 0
+        self.evictions = 0
+        os.makedirs(self.root, exist_ok=True)
+
+    def _path(self, location):
+        ext = os.path.splitext(location.split("?", 1)[0])[1][:8] or ".bin"
+        return os.path.join(self.root, hashlib.sha256(location.encode()).hexdigest() + ext)
+
+    def _touch(self, path):
+        try:
+            # only atime moves, so mtime-based ETag and Last-Modified stay stable
+            os.utime(path, (time.time(), os.stat(path).st_mtime))
+            return True
+        except FileNotFoundError:
+            return False
+
+    def path_for(self, location):
+        """
+        Local path of the stored file at location, downloading it on a miss.
+        Concurrent misses for the same file share one download.
+        """
+        local_path = get_storage().local_path(location)
+        if local_path and os.path.exists(local_path):
+            return local_path
+
+        path = self._path(location)
+        if self._touch(path):
+            self.hits += 1
+            return path
+
+        with self._lock:
+            fill = self._fills.get(path)
+            leader = fill is None
+            if leader:
+                fill = self._fills[path] = _Fill()
+                self.misses += 1
+            else:
+                self.coalesced += 1
+
+        if not leader:
+            if not fill.done.wait(FILL_TIMEOUT):
+                raise TimeoutError(f"Timed out waiting for {location} to be cached")
+            if fill.error:
+                raise fill.error
+            return path
+
+        try:
+            self._download(location, path)
+            self._evict(keep=path)
+        except Exception as e:
+            fill.error = e
+            self.fill_errors += 1
+            raise
+        finally:
+            with self._lock:
+                del self._fills[path]
+            fill.done.set()
+        return path
+
+    def _download(self, location, path):
+        storage = get_storage()
+        size = storage.size(location)
+        fd, part_path = tempfile.mkstemp(dir=self.root, suffix=".part")
+        try:
+            with os.fdopen(fd, "wb") as out:
+                for start in range(0, size, FILL_CHUNK_SIZE):
+                    out.write(storage.get_range(location, start, min(start + FILL_CHUNK_SIZE, size) - 1))
+            os.replace(part_path, path)
+        except BaseException:
+            os.remove(part_path)
+            raise
+        self.filled_bytes += size
+
+    def _entries(self):
+        now = time.time()
+        entries = []
+        for entry in os.scandir(self.root):
+            if not entry.is_file():
+                continue
+            stat = entry.stat()
+            if entry.name.endswith(".part"):
+                if now - stat.st_mtime > STALE_PART_SECONDS:
+                    os.remove(entry.path)
+                continue
+            entries.append((stat.st_atime, stat.st_size, entry.path))
+        return entries
+
+    def bytes_in_use(self):
+        return sum(size for _, size, _ in self._entries())
+
+    def _evict(self, keep=None):
+        # scanning the directory rather than an in-memory index keeps workers sharing it honest
+        entries = sorted(self._entries())
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            if path == keep:
+                continue
+            try:
+                # a response already streaming from this file keeps its open descriptor
+                os.remove(path)
+                self.evictions += 1
+            except FileNotFoundError:
+                pass
+            total -= size
+
+    def metrics(self):
+        lookups = self.hits + self.misses + self.coalesced
+        return {
+            "root": self.root,
+            "bytes_in_use": self.bytes_in_use(),
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "hit_ratio": round((self.hits + self.coalesced) / lookups, 4) if lookups else None,
+            "fill_errors": self.fill_errors,
+            "filled_bytes": self.filled_bytes,
+            "evictions": self.evictions,
+        }
+
+
+_preview_cache = None
+
+
+def init_preview_cache(app):
+    """Configure from PREVIEW_CACHE_DIR and PREVIEW_CACHE_MAX_MB."""
+    global _preview_cache
+    _preview_cache = PreviewCache(
+        app.config.get("PREVIEW_CACHE_DIR"),
+        max_bytes=int(app.config.get("PREVIEW_CACHE_MAX_MB", DEFAULT_PREVIEW_CACHE_BYTES // (1024 * 1024))) * 1024 * 1024
+    )
+    return _preview_cache
+
+
+def get_preview_cache():
+    global _preview_cache
+    if _preview_cache is None:
+        _preview_cache = PreviewCache()
+    return _preview_cache
@@ -0,0 +1,105 @@
+import time
+from datetime import datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor
+from server.extension import db
+from server.models.payment import Payment
+from server.models.job_checkpoint import JobCheckpoint
+from server.service.paystack import get_paystack
+from server.service.payment_events import handle_paystack_event
+from server.service.discounts import release_expired_reservations
+
+
+RECONCILE_JOB = "payment_reconcile"
+# leave checkouts younger than this to their webhook
+DEFAULT_MIN_AGE_SECONDS = 15 * 60
+# Paystack outcomes that settle a payment; anything else (abandoned, ongoing, ...) stays pending
+SETTLED_STATUSES = {"success", "failed", "reversed"}
+
+
+def verify_reference(reference):
+    """Paystack's verify answer for one reference; runs on a worker thread, so no database access."""
+    try:
+        return get_paystack().verify_transaction(reference)
+    except Exception as e:
+        return {"status": False, "message": str(e)}
+
+
+def run_reconcile(workers=8, batch_size=50, min_age=DEFAULT_MIN_AGE_SECONDS, restart=False, limit=None, log=print):
+    """
+    Walk pending payments in id order, verify each with Paystack (workers
+    calls in flight at a time) and apply settled ones exactly as their
+    webhook would have. Progress is checkpointed after every batch, so an
+    interrupted run resumes where it stopped; a finished run starts over
+    next time, since payments left pending may settle later.
+    """
+    checkpoint = JobCheckpoint.query.filter_by(name=RECONCILE_JOB).first()
+    if checkpoint is None:
+        checkpoint = JobCheckpoint(name=RECONCILE_JOB, last_id=0, processed=0, skipped=0, failed=0)
+        db.session.add(checkpoint)
+    elif restart or checkpoint.finished_at:
+        checkpoint.last_id = 0
+        checkpoint.processed = checkpoint.skipped = checkpoint.failed = 0
+        checkpoint.started_at = datetime.utcnow()
+        checkpoint.finished_at = None
+    db.session.commit()
+    if checkpoint.last_id:
+        log(f"Resuming after payment {checkpoint.last_id}")
+
+    released = release_expired_reservations()
+    db.session.commit()
+    if released:
+        log(f"Released discount reservations of {released} expired checkouts")
+
+    cutoff = datetime.utcnow() - timedelta(seconds=min_age)
+    started = time.monotonic()
+    seen = 0
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        while limit is None or seen < limit:
+            size = batch_size if limit is None else min(batch_size, limit - seen)
+            payments = (
+                Payment.query.filter(
+                    Payment.id > checkpoint.last_id,
+                    Payment.status == "pending",
+                    Payment.transaction_ref.isnot(None),
+                    Payment.created_at < cutoff
+                )
+                .order_by(Payment.id)
+                .limit(size)
+                .all()
+            )
+            if not payments:
+                checkpoint.finished_at = datetime.utcnow()
+                db.session.commit()
+                break
+
+            answers = pool.map(verify_reference, [payment.transaction_ref for payment in payments])
+            for payment, answer in zip(payments, answers):
+                data = answer.get("data") if answer.get("status") else None
+                if not isinstance(data, dict):
+                    log(f"Payment {payment.id}: not verified: {answer.get('message')}")
+                    checkpoint.skipped += 1
+                    continue
+                if data.get("status") not in SETTLED_STATUSES:
+                    checkpoint.skipped += 1
+                    continue
+                try:
+                    # one savepoint per payment, so a failure leaves no half-made sales
+                    with db.session.begin_nested():
+                        handle_paystack_event({"event": "charge.reconcile", "data": data})
+                    checkpoint.processed += 1
+                except Exception as e:
+                    log(f"Payment {payment.id}: {e}")
+                    checkpoint.failed += 1
+
+            checkpoint.last_id = payments[-1].id
+            db.session.commit()
+            seen += len(payments)
+
+            elapsed = max(time.monotonic() - started, 1e-9)
+            log(
+                f"through payment {checkpoint.last_id}: {checkpoint.processed} settled, "
+                f"{checkpoint.skipped} still open, {checkpoint.failed} failed | {seen / elapsed:.1f} payments/s"
+            )
+
+    return checkpoint
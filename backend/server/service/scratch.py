@@ -0,0 +1,192 @@
+import os
+import time
+import uuid
+import shutil
+import tempfile
+import threading
+from contextlib import contextmanager
+
+
+DEFAULT_SCRATCH_QUOTA = 2 * 1024 * 1024 * 1024
+# leftovers of a live process older than this are assumed leaked
+ORPHAN_MAX_AGE_SECONDS = 6 * 60 * 60
+
+
+class ScratchQuotaExceeded(RuntimeError):
+    pass
+
+
+def _path_size(path):
+    if os.path.isfile(path):
+        return os.path.getsize(path)
+    total = 0
+    for dirpath, _, filenames in os.walk(path):
+        for name in filenames:
+            try:
+                total += os.path.getsize(os.path.join(dirpath, name))
+            except OSError:
+                pass
+    return total
+
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class ScratchSpace:
+    """
+    Temp files for media and PDF work. Everything lives under
+    <root>/<pid>/ and is removed when its context exits, whether the work
+    succeeded or not. Point root at a tmpfs to keep transcodes off disk.
+    """
+
+    def __init__(self, root=None, quota_bytes=DEFAULT_SCRATCH_QUOTA):
+        self.root = os.path.abspath(root or os.path.join(tempfile.gettempdir(), "beatsmart-scratch"))
+        self.quota_bytes = quota_bytes
+        self._lock = threading.Lock()
+        self._active = set()
+        self._pid = None
+        self.peak_bytes = 0
+        self.allocations = 0
+        self.quota_rejections = 0
+
+    @property
+    def process_dir(self):
+        # resolved lazily so forked workers each get their own directory
+        if self._pid != os.getpid():
+            self._pid = os.getpid()
+            self._active = set()
+            os.makedirs(os.path.join(self.root, str(self._pid)), exist_ok=True)
+        return os.path.join(self.root, str(self._pid))
+
+    def bytes_in_use(self):
+        with self._lock:
+            paths = list(self._active)
+        used = sum(_path_size(path) for path in paths if os.path.exists(path))
+        self.peak_bytes = max(self.peak_bytes, used)
+        return used
+
+    def _allocate(self, name, reserve):
+        parent = self.process_dir
+        used = self.bytes_in_use()
+        if used + reserve > self.quota_bytes:
+            self.quota_rejections += 1
+            raise ScratchQuotaExceeded(
+                f"Scratch space quota exceeded ({used} bytes in use, {self.quota_bytes} allowed)"
+            )
+        path = os.path.join(parent, name)
+        with self._lock:
+            self._active.add(path)
+            self.allocations += 1
+        return path
+
+    def _release(self, path):
+        self.bytes_in_use()
+        try:
+            if os.path.isdir(path):
+                shutil.rmtree(path, ignore_errors=True)
+            elif os.path.exists(path):
+                os.remove(path)
+        finally:
+            with self._lock:
+                self._active.discard(path)
+
+    @contextmanager
+    def file(self, suffix="", reserve=0):
+        """
+        Path of a scratch file (not created) that is deleted on exit.
+        reserve is the expected size, checked against the quota up front.
+        """
+        path = self._allocate(f"{uuid.uuid4().hex}{suffix}", reserve)
+        try:
+            yield path
+        finally:
+            self._release(path)
+
+    @contextmanager
+    def directory(self, prefix="", reserve=0):
+        """Scratch directory removed with its contents on exit."""
+        path = self._allocate(f"{prefix}{uuid.uuid4().hex}", reserve)
+        os.makedirs(path)
+        try:
+            yield path
+        finally:
+            self._release(path)
+
+    def clean_orphans(self, max_age=ORPHAN_MAX_AGE_SECONDS):
+        """
+        Remove what crashed or killed processes left behind: directories of
+        dead pids, and entries older than max_age in live ones. Returns the
+        number of bytes freed.
+        """
+        if not os.path.isdir(self.root):
+            return 0
+
+        freed = 0
+        now = time.time()
+        with self._lock:
+            active = set(self._active)
+        for name in os.listdir(self.root):
+            process_dir = os.path.join(self.root, name)
+            if not name.isdigit() or not os.path.isdir(process_dir):
+                continue
+            if not _pid_alive(int(name)):
+                freed += _path_size(process_dir)
+                shutil.rmtree(process_dir, ignore_errors=True)
+                continue
+            for entry in os.listdir(process_dir):
+                path = os.path.join(process_dir, entry)
+                try:
+                    stale = now - os.path.getmtime(path) > max_age
+                except OSError:
+                    continue
+                if stale and path not in active:
+                    freed += _path_size(path)
+                    if os.path.isdir(path):
+                        shutil.rmtree(path, ignore_errors=True)
+                    else:
+                        os.remove(path)
+        return freed
+
+    def metrics(self):
+        return {
+            "root": self.root,
+            "bytes_in_use": self.bytes_in_use(),
+            "peak_bytes": self.peak_bytes,
+            "quota_bytes": self.quota_bytes,
+            "active": len(self._active),
+            "allocations": self.allocations,
+            "quota_rejections": self.quota_rejections,
+        }
+
+
+_scratch = None
+
+
+def init_scratch(app):
+    """Configure from SCRATCH_DIR and SCRATCH_QUOTA_MB, then clear orphans from earlier runs."""
+    global _scratch
+    _scratch = ScratchSpace(
+        app.config.get("SCRATCH_DIR"),
+        quota_bytes=int(app.config.get("SCRATCH_QUOTA_MB", DEFAULT_SCRATCH_QUOTA // (1024 * 1024))) * 1024 * 1024
+    )
+    try:
+        freed = _scratch.clean_orphans()
+        if freed:
+            app.logger.info(f"Scratch janitor freed {freed} bytes")
+    except Exception as e:
+        print("Scratch janitor error:", e)
+    return _scratch
+
+
+def get_scratch():
+    global _scratch
+    if _scratch is None:
+        _scratch = ScratchSpace()
+    return _scratch
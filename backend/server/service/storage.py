@@ -0,0 +1,268 @@
+import os
+import abc
+import uuid
+import shutil
+import tempfile
+import cloudinary
+import cloudinary.uploader
+import cloudinary.utils
+import requests
+from requests.adapters import HTTPAdapter
+from dotenv import load_dotenv
+
+
+load_dotenv()
+
+
+cloudinary.config(
+    cloud_name=os.getenv("CLOUDINARY_CLOUD_NAME"),
+    api_key=os.getenv("CLOUDINARY_API_KEY"),
+    api_secret=os.getenv("CLOUDINARY_API_SECRET"),
+    secure=True
+)
+
+
+STORAGE_POOL_SIZE = 16
+# Cloudinary rejects chunked parts smaller than 5MB (except the last one)
+UPLOAD_CHUNK_SIZE = 6 * 1024 * 1024
+COPY_BUFFER_SIZE = 1024 * 1024
+# the SDK release whose private upload pool _size_upload_pool knows how to replace
+PATCHED_CLOUDINARY_VERSION = "1.44.1"
+
+
+def _size_upload_pool(pool_size):
+    """
+    Give the Cloudinary SDK's upload API a connection pool of pool_size.
+    The SDK has no option for this: every upload goes through the
+    module-private cloudinary.uploader._http, built once at import with
+    urllib3's default of one connection per host. Replacing it affects the
+    whole process. It is only done on the SDK version this was checked
+    against, since another version may build or use _http differently.
+    """
+    if cloudinary.VERSION != PATCHED_CLOUDINARY_VERSION:
+        print(f"Cloudinary SDK {cloudinary.VERSION} is not {PATCHED_CLOUDINARY_VERSION}; upload pool left at the SDK default")
+        return
+    cloudinary.uploader._http = cloudinary.utils.get_http_connector(
+        cloudinary.config(), dict(cloudinary.CERT_KWARGS, maxsize=pool_size)
+    )
+
+
+def _is_file_source(source):
+    return isinstance(source, (str, bytes)) or hasattr(source, "read")
+
+
+class StorageBackend(abc.ABC):
+    """
+    Where uploaded and derived media lives. put_stream returns
+    {"url", "public_id", "resource_type"}; the url is what gets stored on
+    models and is accepted back as a location by get_range and size.
+    """
+
+    @abc.abstractmethod
+    def put_stream(self, source, folder, filename=None, **options):
+        """Store a path, file object or iterable of byte chunks under folder."""
+
+    @abc.abstractmethod
+    def get_range(self, location, start=0, end=None):
+        """Bytes [start, end] (inclusive) of a stored object; end=None reads to the end."""
+
+    @abc.abstractmethod
+    def size(self, location):
+        """Total size in bytes of a stored object."""
+
+    @abc.abstractmethod
+    def delete(self, public_id, resource_type=None):
+        """Remove a stored object by the public_id put_stream returned."""
+
+    @abc.abstractmethod
+    def url_for(self, public_id, resource_type=None):
+        """Public URL of a stored object."""
+
+    def local_path(self, location):
+        """Filesystem path of a stored object, when the backend has one."""
+        return None
+
+
+class CloudinaryStorage(StorageBackend):
+    """
+    Cloudinary backend. The SDK keeps a single module-level urllib3 pool
+    holding one connection per host, so concurrent uploads (HLS segments,
+    streamed parts) kept opening fresh TLS connections; both the upload API
+    pool (see _size_upload_pool) and the CDN download session are sized
+    for our worker threads.
+    """
+
+    def __init__(self, pool_size=STORAGE_POOL_SIZE):
+        _size_upload_pool(pool_size)
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=pool_size)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+    def put_stream(self, source, folder, filename=None, **options):
+        options.setdefault("resource_type", "auto")
+        if _is_file_source(source):
+            result = cloudinary.uploader.upload(source, folder=folder, **options)
+        else:
+            result = self._upload_chunks(source, folder, filename or "stream", **options)
+
+        return {
+            "url": result["secure_url"],
+            "public_id": result["public_id"],
+            "resource_type": result.get("resource_type", "raw")
+        }
+
+    def _upload_chunks(self, chunks, folder, filename, **options):
+        """
+        Chunked upload API for data whose size isn't known up front. The
+        total is sent as -1 until the last part, which is why one full
+        chunk is always held back.
+        """
+        upload_id = cloudinary.utils.random_public_id()
+        options.update(folder=folder, filename=filename)
+        buffered = bytearray()
+        sent = 0
+        result = None
+
+        def send(part, total):
+            content_range = f"bytes {sent}-{sent + len(part) - 1}/{total}"
+            part_result = cloudinary.uploader.upload_large_part(
+                (filename, bytes(part)),
+                http_headers={"Content-Range": content_range, "X-Unique-Upload-Id": upload_id},
+                **options
+            )
+            options["public_id"] = part_result.get("public_id")
+            return part_result
+
+        for data in chunks:
+            buffered += data
+            while len(buffered) >= 2 * UPLOAD_CHUNK_SIZE:
+                part = buffered[:UPLOAD_CHUNK_SIZE]
+                del buffered[:UPLOAD_CHUNK_SIZE]
+                result = send(part, -1)
+                sent += len(part)
+
+        if not buffered and not sent:
+            raise ValueError(f"{filename} is empty")
+        if buffered:
+            result = send(buffered, sent + len(buffered))
+        return result
+
+    def get_range(self, location, start=0, end=None):
+        byte_range = f"bytes={start}-{'' if end is None else end}"
+        response = self.session.get(location, headers={"Range": byte_range}, timeout=30)
+        response.raise_for_status()
+        if response.status_code == 200 and (start or end is not None):
+            raise IOError("Storage ignored the range request")
+        return response.content
+
+    def size(self, location):
+        # CDN HEAD responses aren't guaranteed a length; a one-byte range always carries the total
+        response = self.session.get(location, headers={"Range": "bytes=0-0"}, timeout=15)
+        response.raise_for_status()
+        return int(response.headers["Content-Range"].rsplit("/", 1)[1])
+
+    def delete(self, public_id, resource_type=None):
+        cloudinary.uploader.destroy(public_id, resource_type=resource_type or "raw")
+
+    def url_for(self, public_id, resource_type=None):
+        return cloudinary.utils.cloudinary_url(public_id, resource_type=resource_type or "raw", secure=True)[0]
+
+
+class LocalStorage(StorageBackend):
+    """
+    Files under a local directory, served by the /media route. Lets the
+    whole upload path run offline and gives benchmarks a backend without
+    network cost.
+    """
+
+    def __init__(self, root, base_url):
+        self.root = os.path.abspath(root)
+        self.base_url = base_url.rstrip("/")
+        os.makedirs(self.root, exist_ok=True)
+
+    def _path(self, public_id):
+        path = os.path.abspath(os.path.join(self.root, public_id))
+        if not path.startswith(self.root + os.sep):
+            raise ValueError(f"Invalid storage key: {public_id}")
+        return path
+
+    def _public_id(self, location):
+        if location.startswith(self.base_url + "/"):
+            return location[len(self.base_url) + 1:]
+        return location
+
+    def put_stream(self, source, folder, filename=None, **options):
+        if filename is None:
+            name = getattr(source, "filename", None) or getattr(source, "name", None)
+            filename = name if isinstance(name, str) else (source if isinstance(source, str) else None)
+        ext = os.path.splitext(filename)[1].lower() if filename else ""
+
+        public_id = options.get("public_id") or uuid.uuid4().hex
+        if ext and not public_id.endswith(ext):
+            public_id += ext
+        public_id = f"{folder}/{public_id}" if folder else public_id
+        path = self._path(public_id)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        # write beside the target and rename, so readers never see a partial file
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix=".upload-")
+        try:
+            with os.fdopen(fd, "wb") as out:
+                if isinstance(source, str):
+                    with open(source, "rb") as f:
+                        shutil.copyfileobj(f, out, COPY_BUFFER_SIZE)
+                elif isinstance(source, bytes):
+                    out.write(source)
+                elif hasattr(source, "read"):
+                    shutil.copyfileobj(source, out, COPY_BUFFER_SIZE)
+                else:
+                    for chunk in source:
+                        out.write(chunk)
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+        return {"url": self.url_for(public_id), "public_id": public_id, "resource_type": "raw"}
+
+    def get_range(self, location, start=0, end=None):
+        with open(self.local_path(location), "rb") as f:
+            f.seek(start)
+            return f.read() if end is None else f.read(end - start + 1)
+
+    def size(self, location):
+        return os.path.getsize(self.local_path(location))
+
+    def delete(self, public_id, resource_type=None):
+        path = self._path(self._public_id(public_id))
+        if os.path.exists(path):
+            os.remove(path)
+
+    def url_for(self, public_id, resource_type=None):
+        return f"{self.base_url}/{public_id}"
+
+    def local_path(self, location):
+        return self._path(self._public_id(location))
+
+
+_storage = None
+
+
+def init_storage(app):
+    """Select the backend from STORAGE_BACKEND ("cloudinary" or "local")."""
+    global _storage
+    if app.config.get("STORAGE_BACKEND") == "local":
+        _storage = LocalStorage(app.config["STORAGE_LOCAL_ROOT"], app.config["STORAGE_PUBLIC_URL"])
+    else:
+        _storage = CloudinaryStorage(pool_size=app.config.get("STORAGE_POOL_SIZE", STORAGE_POOL_SIZE))
+    return _storage
+
+
+def get_storage():
+    # upload threads run outside the app context, so the backend is a module global
+    global _storage
+    if _storage is None:
+        _storage = CloudinaryStorage()
+    return _storage
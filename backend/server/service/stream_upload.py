@@ -0,0 +1,205 @@
+import io
+import queue
+import hashlib
+import threading
+from flask import Request, current_app
+from werkzeug.exceptions import BadRequest, RequestEntityTooLarge
+from werkzeug.utils import secure_filename
+from server.service.storage import get_storage
+from server.service.upload_service import (
+    allowed_file,
+    upload_stream_to_storage,
+    ALLOWED_IMAGE_EXTENSIONS,
+    ALLOWED_AUDIO_EXTENSIONS,
+    ALLOWED_ZIP_EXTENSIONS,
+    MAX_IMAGE_SIZE,
+    MAX_AUDIO_SIZE,
+    MAX_ZIP_SIZE,
+)
+
+
+# (allowed extensions, storage folder, max bytes) per kind of part
+STREAMING_RULES = [
+    (ALLOWED_IMAGE_EXTENSIONS, "covers", MAX_IMAGE_SIZE),
+    (ALLOWED_AUDIO_EXTENSIONS, "beats", MAX_AUDIO_SIZE),
+    (ALLOWED_ZIP_EXTENSIONS, "archives", MAX_ZIP_SIZE),
+]
+
+# Chunks queued between the multipart parser and the upload thread. A full
+# queue blocks the parser, so a slow storage backend throttles the client
+# instead of growing memory.
+STREAM_QUEUE_DEPTH = 8
+
+
+class _Discarded(BaseException):
+    """Aborts an upload nobody will claim; not an error, so it skips upload error logging."""
+
+
+class StreamedUpload(io.RawIOBase):
+    """
+    Write-only file object handed to werkzeug's multipart parser in place of
+    a spooled temp file. Every chunk written is forwarded to a background
+    thread that uploads it to the storage backend as it arrives.
+    """
+
+    def __init__(self, filename, folder, max_size):
+        super().__init__()
+        self.filename = filename
+        self.folder = folder
+        self.max_size = max_size
+        self.bytes_written = 0
+        self._sha256 = hashlib.sha256()
+
+        self._queue = queue.Queue(maxsize=STREAM_QUEUE_DEPTH)
+        self._lock = threading.Lock()
+        self._finished_writing = False
+        self._end_of_stream = False
+        self._claimed = False
+        self._discard = False
+        self._result = None
+        self._error = None
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        if self._error:
+            raise self._error
+
+        self.bytes_written += len(data)
+        if self.bytes_written > self.max_size:
+            self._discard = True
+            self._finish_writing()
+            raise RequestEntityTooLarge(
+                f"{self.filename} exceeds the {self.max_size // (1024 * 1024)}MB limit"
+            )
+
+        data = bytes(data)
+        self._sha256.update(data)
+        self._queue.put(data)
+        return len(data)
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        # werkzeug rewinds the container exactly once, after the last chunk
+        # of the part, so this marks the end of the upload stream.
+        self._finish_writing()
+        return 0
+
+    def tell(self):
+        return self.bytes_written
+
+    def close(self):
+        """Called on request teardown; uploads nobody claimed are deleted."""
+        self._finish_writing()
+        with self._lock:
+            if not self._claimed:
+                self._discard = True
+                if not self._thread.is_alive():
+                    self._destroy()
+        super().close()
+
+    def content_hash(self):
+        """sha256 of everything written; complete once the part has been parsed."""
+        return self._sha256.hexdigest()
+
+    def upload_result(self, timeout=None):
+        """Wait for the upload to finish and return {"url", "public_id"}."""
+        self._finish_writing()
+        self._thread.join(timeout)
+        if self._error:
+            raise self._error
+        with self._lock:
+            self._claimed = True
+        return self._result
+
+    def _finish_writing(self):
+        if not self._finished_writing:
+            self._finished_writing = True
+            self._queue.put(None)
+
+    def _chunks(self):
+        while True:
+            chunk = self._queue.get()
+            if chunk is None:
+                self._end_of_stream = True
+                return
+            if self._discard:
+                raise _Discarded()
+            yield chunk
+
+    def _run(self):
+        try:
+            self._result = upload_stream_to_storage(
+                self._chunks(), self.filename, folder=self.folder
+            )
+        except _Discarded:
+            self._drain()
+            return
+        except Exception as e:
+            self._error = e
+            self._drain()
+            return
+
+        with self._lock:
+            if self._discard and not self._claimed:
+                self._destroy()
+
+    def _drain(self):
+        # keep consuming so the parser never blocks on a dead upload thread
+        while not self._end_of_stream:
+            if self._queue.get() is None:
+                self._end_of_stream = True
+
+    def _destroy(self):
+        if not self._result:
+            return
+        try:
+            get_storage().delete(
+                self._result["public_id"], resource_type=self._result["resource_type"]
+            )
+        except Exception as e:
+            print("Storage cleanup error:", e)
+        self._result = None
+
+
+class StreamingRequest(Request):
+    """
+    Request class that, when STREAMING_UPLOADS is enabled, pipes multipart
+    file parts straight to storage instead of spooling them to /tmp first.
+    Extension and size checks run while the part is being received.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # every part streamed so far; request.files is never set if a later part is rejected
+        self._streamed_uploads = []
+
+    def close(self):
+        """Close the request's files, deleting every streamed upload nobody claimed."""
+        try:
+            super().close()
+        finally:
+            for upload in self._streamed_uploads:
+                if not upload.closed:
+                    upload.close()
+
+    def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+        # a file input left blank is sent with an empty filename; buffer it as werkzeug
+        # would, so request.files holds an empty (falsy) FileStorage rather than failing
+        if not current_app.config.get("STREAMING_UPLOADS") or not filename:
+            return super()._get_file_stream(total_content_length, content_type, filename, content_length)
+
+        filename = secure_filename(filename or "")
+        for allowed_exts, folder, max_size in STREAMING_RULES:
+            if allowed_file(filename, allowed_exts):
+                if content_length and content_length > max_size:
+                    raise RequestEntityTooLarge(
+                        f"{filename} exceeds the {max_size // (1024 * 1024)}MB limit"
+                    )
+                upload = StreamedUpload(filename, folder, max_size)
+                self._streamed_uploads.append(upload)
+                return upload
+
+        raise BadRequest(f"Unsupported file type: {filename or 'unnamed file'}")
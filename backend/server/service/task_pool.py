@@ -0,0 +1,185 @@
+import os
+import time
+import threading
+import multiprocessing
+from functools import wraps
+from contextlib import contextmanager
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from werkzeug.exceptions import ServiceUnavailable
+
+
+DEFAULT_CPU_WORKERS = max(1, (os.cpu_count() or 2) // 2)
+# jobs allowed to wait for a worker before new ones are turned away
+DEFAULT_QUEUE_DEPTH = 8
+DEFAULT_RETRY_AFTER = 10
+TASK_TIMEOUT = 300
+
+
+class PoolSaturated(ServiceUnavailable):
+    description = "Media processing is at capacity, please retry shortly"
+
+
+def _timed_call(fn, args, kwargs):
+    started = time.time()
+    result = fn(*args, **kwargs)
+    return started, time.time(), result
+
+
+class CpuPool:
+    """
+    Process pool for CPU-heavy media and PDF work, so transcodes and renders
+    don't occupy request workers' cores. Admission is per job (a request
+    that may run several tasks one after another): once workers +
+    queue_depth jobs are active, new ones get PoolSaturated (a 503 with
+    Retry-After) straight away instead of queueing without bound.
+    """
+
+    def __init__(self, workers=DEFAULT_CPU_WORKERS, queue_depth=DEFAULT_QUEUE_DEPTH, retry_after=DEFAULT_RETRY_AFTER):
+        self.workers = workers
+        self.queue_depth = queue_depth
+        self.retry_after = retry_after
+        self._lock = threading.Lock()
+        self._executor = None
+        self._pid = None
+        self.started_at = time.time()
+        self.active_jobs = 0
+        self.in_flight = 0
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+        self.busy_seconds = 0.0
+        self.total_wait_seconds = 0.0
+        self.max_wait_seconds = 0.0
+
+    def _get_executor(self):
+        with self._lock:
+            # spawn, not fork: request workers run upload threads, which fork doesn't copy safely
+            if self._executor is None or self._pid != os.getpid():
+                self._pid = os.getpid()
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers, mp_context=multiprocessing.get_context("spawn")
+                )
+            return self._executor
+
+    def _replace_broken(self, executor):
+        """Drop a pool whose worker died; threads that saw the same failure replace it once."""
+        with self._lock:
+            if self._executor is not executor:
+                return
+            self._executor = None
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    def shutdown(self):
+        """Stop the worker processes; the next run() starts a fresh pool."""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown()
+
+    @contextmanager
+    def admission(self):
+        with self._lock:
+            if self.active_jobs >= self.workers + self.queue_depth:
+                self.rejected += 1
+                raise PoolSaturated(retry_after=self.retry_after)
+            self.active_jobs += 1
+        try:
+            yield
+        finally:
+            with self._lock:
+                self.active_jobs -= 1
+
+    def _task_done(self, submitted, future):
+        with self._lock:
+            self.in_flight -= 1
+            if future.cancelled() or future.exception():
+                self.failed += 1
+                return
+            started, finished, _ = future.result()
+            wait = max(0.0, started - submitted)
+            self.completed += 1
+            self.busy_seconds += finished - started
+            self.total_wait_seconds += wait
+            self.max_wait_seconds = max(self.max_wait_seconds, wait)
+
+    def run(self, fn, *args, **kwargs):
+        """
+        Run fn(*args, **kwargs) in a worker process and return its result.
+        fn and its arguments must be picklable. With no workers configured
+        the call runs inline.
+        """
+        if self.workers <= 0:
+            return fn(*args, **kwargs)
+
+        submitted = time.time()
+        with self._lock:
+            self.in_flight += 1
+        try:
+            executor = self._get_executor()
+            try:
+                future = executor.submit(_timed_call, fn, args, kwargs)
+            except BrokenProcessPool:
+                # a worker died (OOM, segfault in a codec); start a fresh pool
+                self._replace_broken(executor)
+                executor = self._get_executor()
+                future = executor.submit(_timed_call, fn, args, kwargs)
+        except Exception:
+            with self._lock:
+                self.in_flight -= 1
+            raise
+        # accounting follows the task, not the caller, so a timed-out task keeps its slot
+        future.add_done_callback(lambda f: self._task_done(submitted, f))
+        try:
+            return future.result(timeout=TASK_TIMEOUT)[2]
+        except BrokenProcessPool:
+            self._replace_broken(executor)
+            raise
+
+    def metrics(self):
+        with self._lock:
+            uptime = max(time.time() - self.started_at, 1e-9)
+            finished = self.completed or 1
+            return {
+                "workers": self.workers,
+                "queue_depth": self.queue_depth,
+                "active_jobs": self.active_jobs,
+                "running": min(self.in_flight, self.workers),
+                "queued": max(0, self.in_flight - self.workers),
+                "utilization": round(self.busy_seconds / (max(self.workers, 1) * uptime), 4),
+                "completed": self.completed,
+                "failed": self.failed,
+                "rejected": self.rejected,
+                "avg_queue_wait_ms": round(1000 * self.total_wait_seconds / finished, 1),
+                "max_queue_wait_ms": round(1000 * self.max_wait_seconds, 1),
+            }
+
+
+_cpu_pool = None
+
+
+def init_cpu_pool(app):
+    """Configure from CPU_POOL_WORKERS, CPU_POOL_QUEUE_DEPTH and CPU_POOL_RETRY_AFTER."""
+    global _cpu_pool
+    _cpu_pool = CpuPool(
+        workers=int(app.config.get("CPU_POOL_WORKERS", DEFAULT_CPU_WORKERS)),
+        queue_depth=int(app.config.get("CPU_POOL_QUEUE_DEPTH", DEFAULT_QUEUE_DEPTH)),
+        retry_after=int(app.config.get("CPU_POOL_RETRY_AFTER", DEFAULT_RETRY_AFTER))
+    )
+    return _cpu_pool
+
+
+def get_cpu_pool():
+    global _cpu_pool
+    if _cpu_pool is None:
+        _cpu_pool = CpuPool()
+    return _cpu_pool
+
+
+def cpu_bound(f):
+    """Admit the decorated view as one CPU pool job, or fail fast with a 503."""
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        with get_cpu_pool().admission():
+            return f(*args, **kwargs)
+    return decorated_function
@@ -1,55 +1,205 @@
+import io
 import os
-import cloudinary
-import cloudinary.uploader
-from dotenv import load_dotenv
+import uuid
+import hashlib
+from concurrent.futures import ThreadPoolExecutor
 from werkzeug.utils import secure_filename
-
-
-load_dotenv()
-
-
-cloudinary.config(
-    cloud_name=os.getenv("CLOUDINARY_CLOUD_NAME"),
-    api_key=os.getenv("CLOUDINARY_API_KEY"),
-    api_secret=os.getenv("CLOUDINARY_API_SECRET"),
-    secure=True
-)
+from server.service.storage import get_storage
+from server.service.task_pool import get_cpu_pool
+from server.utils.archive_utils import inspect_zip, StorageRangeReader, ArchiveError
+from server.utils.image_utils import COVER_FORMATS, render_cover_variants
 
 
 ALLOWED_IMAGE_EXTENSIONS = {"jpg", "jpeg", "png"}
 ALLOWED_AUDIO_EXTENSIONS = {"mp3", "wav"}
 ALLOWED_ZIP_EXTENSIONS = {"zip"}
 
+MAX_IMAGE_SIZE = 10 * 1024 * 1024
+MAX_AUDIO_SIZE = 300 * 1024 * 1024
+MAX_ZIP_SIZE = 1024 * 1024 * 1024
+
+TRACKOUT_ENTRY_KINDS = ("audio", "midi", "document")
+SOUNDPACK_ENTRY_KINDS = ("audio", "midi", "preset", "document")
+
+HLS_UPLOAD_WORKERS = 8
+# derivatives are rendered on the CPU pool; these threads only upload them
+COVER_UPLOAD_WORKERS = 6
+COVER_FILE_EXTENSIONS = {"webp": "webp", "jpeg": "jpg"}
+
 
 def allowed_file(filename, allowed_exts):
     
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in allowed_exts
 
 
-def upload_to_cloudinary(file, folder="Beatsmart"):
+def upload_to_storage(file, folder="Beatsmart", **options):
    
     try:
-        result = cloudinary.uploader.upload(
+        return get_storage().put_stream(file, folder, **options)
+    except Exception as e:
+        print("Storage upload error:", e)
+        raise e
+
+
+def upload_stream_to_storage(chunks, filename, folder="Beatsmart"):
+    """
+    Upload an iterable of byte chunks as they arrive, so the file never has
+    to exist on local disk.
+    """
+    try:
+        return get_storage().put_stream(chunks, folder, filename=filename)
+    except Exception as e:
+        print("Storage stream upload error:", e)
+        raise e
+
+
+def media_source(url):
+    """What ffmpeg should read for a stored file: its local path when the backend has one."""
+    return get_storage().local_path(url) or url
+
+
+def _rewrite_playlist(text, urls):
+    """Point every URI line of an m3u8 playlist at its uploaded absolute URL."""
+    lines = []
+    for line in text.splitlines():
+        uri = line.strip()
+        lines.append(urls.get(uri, line) if uri and not uri.startswith("#") else line)
+    return "\n".join(lines) + "\n"
+
+
+def _playlist_uris(text):
+    return [line.strip() for line in text.splitlines() if line.strip() and not line.startswith("#")]
+
+
+def upload_hls_package(hls_dir, master_name="master.m3u8", folder="previews/hls"):
+    """
+    Upload an HLS output directory and return the master playlist URL.
+    Storage URLs don't preserve the relative layout ffmpeg wrote, so
+    segments go up first and the playlists are rewritten to absolute URLs.
+    """
+    package_id = uuid.uuid4().hex
+
+    def put(relative_path, file):
+        return upload_to_storage(
             file,
-            resource_type="auto",  
-            folder=folder
-        )
+            folder=folder,
+            resource_type="raw",
+            public_id=f"{package_id}/{relative_path}"
+        )["url"]
+
+    with open(os.path.join(hls_dir, master_name)) as f:
+        master = f.read()
+
+    variant_urls = {}
+    with ThreadPoolExecutor(max_workers=HLS_UPLOAD_WORKERS) as pool:
+        for variant in _playlist_uris(master):
+            variant_dir = os.path.dirname(variant)
+            with open(os.path.join(hls_dir, variant)) as f:
+                playlist = f.read()
+
+            segments = _playlist_uris(playlist)
+            futures = {
+                segment: pool.submit(put, f"{variant_dir}/{segment}", os.path.join(hls_dir, variant_dir, segment))
+                for segment in segments
+            }
+            segment_urls = {segment: future.result() for segment, future in futures.items()}
+
+            rewritten = _rewrite_playlist(playlist, segment_urls)
+            variant_urls[variant] = put(variant, io.BytesIO(rewritten.encode()))
+
+    return put(master_name, io.BytesIO(_rewrite_playlist(master, variant_urls).encode()))
+
+
+def streamed_result(file):
+    """Return the upload result for a part already piped to storage by StreamingRequest."""
+    stream = getattr(file, "stream", None)
+    if hasattr(stream, "upload_result"):
+        return stream.upload_result()
+    return None
+
+
+def file_content_hash(file):
+    """sha256 hex digest of an uploaded file, hashed while streaming when it was streamed."""
+    stream = getattr(file, "stream", None)
+    if hasattr(stream, "content_hash"):
+        return stream.content_hash()
+
+    sha256 = hashlib.sha256()
+    stream.seek(0)
+    for chunk in iter(lambda: stream.read(1024 * 1024), b""):
+        sha256.update(chunk)
+    stream.seek(0)
+    return sha256.hexdigest()
+
+
+def upload_cover_variants(data):
+    """
+    Render every size in COVER_VARIANTS in every format in COVER_FORMATS
+    as one CPU pool task, then upload the results in parallel. Returns
+    {"card": {"width", "height", "webp": url, "jpeg": url}, ...}.
+    """
+    rendered = get_cpu_pool().run(render_cover_variants, data)
+    variant_id = uuid.uuid4().hex
+
+    def upload(name, fmt):
+        return upload_to_storage(
+            io.BytesIO(rendered[name][fmt]),
+            folder="covers/variants",
+            filename=f"{name}.{COVER_FILE_EXTENSIONS[fmt]}",
+            resource_type="image",
+            public_id=f"{variant_id}/{name}"
+        )["url"]
+
+    with ThreadPoolExecutor(max_workers=COVER_UPLOAD_WORKERS) as pool:
+        futures = {
+            (name, fmt): pool.submit(upload, name, fmt) for name in rendered for fmt in COVER_FORMATS
+        }
         return {
-            "url": result["secure_url"],
-            "public_id": result["public_id"]
+            name: dict(
+                width=variant["width"],
+                height=variant["height"],
+                **{fmt: futures[(name, fmt)].result() for fmt in COVER_FORMATS}
+            )
+            for name, variant in rendered.items()
         }
-    except Exception as e:
-        print("Cloudinary upload error:", e)
-        raise e
 
 
 def upload_cover_image(file):
-    
+    """
+    Upload the original cover and its derivatives. The result carries the
+    derivatives under "variants", or None if they could not be rendered;
+    the original upload stands either way.
+    """
     if not allowed_file(file.filename, ALLOWED_IMAGE_EXTENSIONS):
         raise ValueError("Invalid image format. Allowed: jpg, jpeg, png")
 
-    filename = secure_filename(file.filename)
-    return upload_to_cloudinary(file, folder="covers")
+    streamed = streamed_result(file)
+    if streamed:
+        result = streamed
+        data = get_storage().get_range(streamed["url"])
+    else:
+        file.stream.seek(0)
+        data = file.stream.read()
+        file.stream.seek(0)
+        result = upload_to_storage(file, folder="covers")
+
+    try:
+        variants = upload_cover_variants(data)
+    except Exception as e:
+        print("Cover variant generation failed:", e)
+        variants = None
+    return dict(result, variants=variants)
+
+
+def upload_voice_tag(file):
+    """Upload a producer's voice tag clip, which is mixed into their previews."""
+    if not allowed_file(file.filename, ALLOWED_AUDIO_EXTENSIONS):
+        raise ValueError("Invalid audio format. Allowed: mp3, wav")
+
+    streamed = streamed_result(file)
+    if streamed:
+        return streamed
+    return upload_to_storage(file, folder="voice_tags")
 
 
 def upload_beat_file(file):
@@ -57,14 +207,42 @@ def upload_beat_file(file):
     if not allowed_file(file.filename, ALLOWED_AUDIO_EXTENSIONS):
         raise ValueError("Invalid audio format. Allowed: mp3, wav")
 
+    streamed = streamed_result(file)
+    if streamed:
+        return streamed
+
     filename = secure_filename(file.filename)
-    return upload_to_cloudinary(file, folder="beats")
+    return upload_to_storage(file, folder="beats")
 
 
-def upload_soundpack(file):
-   
+def upload_archive(file, folder, allowed_kinds):
+    """
+    Validate a ZIP from its central directory and upload it. The result
+    carries the archive's content manifest under "manifest". Streamed parts
+    are already in storage, so they are inspected with range requests and
+    deleted again if they fail validation.
+    """
     if not allowed_file(file.filename, ALLOWED_ZIP_EXTENSIONS):
-        raise ValueError("Soundpack must be a ZIP file")
+        raise ValueError("Archive must be a ZIP file")
 
-    filename = secure_filename(file.filename)
-    return upload_to_cloudinary(file, folder="soundpacks")
+    streamed = streamed_result(file)
+    if streamed:
+        try:
+            manifest = inspect_zip(StorageRangeReader(get_storage(), streamed["url"]), allowed_kinds)
+        except ArchiveError:
+            get_storage().delete(streamed["public_id"], resource_type=streamed["resource_type"])
+            raise
+        return dict(streamed, manifest=manifest)
+
+    manifest = inspect_zip(file.stream, allowed_kinds)
+    return dict(upload_to_storage(file, folder=folder), manifest=manifest)
+
+
+def upload_trackout(file):
+   
+    return upload_archive(file, "trackouts", TRACKOUT_ENTRY_KINDS)
+
+
+def upload_soundpack(file):
+   
+    return upload_archive(file, "soundpacks", SOUNDPACK_ENTRY_KINDS)
@@ -0,0 +1,219 @@
+import time
+import random
+import threading
+from datetime import datetime, timedelta
+from sqlalchemy import or_, and_, func
+from sqlalchemy.exc import IntegrityError
+from server.extension import db
+from server.models.webhook_event import WebhookEvent
+from server.service.payment_events import handle_paystack_event
+from server.service.contract_renderer import get_contract_renderer
+
+
+DEFAULT_WEBHOOK_WORKERS = 2
+DEFAULT_MAX_ATTEMPTS = 8
+POLL_INTERVAL = 5
+CLAIM_BATCH = 10
+RETRY_BASE_SECONDS = 5
+RETRY_CAP_SECONDS = 30 * 60
+# an event still "processing" after this is assumed to belong to a dead worker
+LOCK_TIMEOUT = 10 * 60
+
+EVENT_HANDLERS = {
+    "paystack": handle_paystack_event,
+}
+
+
+def record_event(provider, payload):
+    """
+    Store a verified webhook in the inbox. Returns False for a redelivery
+    of an event that is already stored.
+    """
+    data = payload.get("data") or {}
+    event = WebhookEvent(
+        provider=provider,
+        event=payload.get("event") or "unknown",
+        reference=data.get("reference"),
+        payload=payload
+    )
+    db.session.add(event)
+    try:
+        db.session.commit()
+    except IntegrityError:
+        db.session.rollback()
+        return False
+    return True
+
+
+def claim_events(limit=CLAIM_BATCH):
+    """Mark up to limit due events as processing and return their ids."""
+    now = datetime.utcnow()
+    events = (
+        WebhookEvent.query
+        .filter(or_(
+            and_(WebhookEvent.status == "pending", WebhookEvent.next_attempt_at <= now),
+            and_(WebhookEvent.status == "processing", WebhookEvent.locked_at < now - timedelta(seconds=LOCK_TIMEOUT))
+        ))
+        .order_by(WebhookEvent.id)
+        .limit(limit)
+        # workers in other processes skip rows already claimed instead of queueing behind them
+        .with_for_update(skip_locked=True)
+        .all()
+    )
+    for event in events:
+        event.status = "processing"
+        event.locked_at = now
+    db.session.commit()
+    return [event.id for event in events]
+
+
+def retry_delay(attempts):
+    return random.uniform(0.5, 1.0) * min(RETRY_CAP_SECONDS, RETRY_BASE_SECONDS * 2 ** (attempts - 1))
+
+
+class WebhookInbox:
+    """
+    Drains webhook_events on a few threads. Each event is applied in the
+    same transaction that marks it done; a failure is rolled back and the
+    event retried with backoff, and after max_attempts it is left as
+    "dead" for a person to look at (requeue with 'flask webhooks retry-dead').
+    """
+
+    def __init__(self, app, workers=DEFAULT_WEBHOOK_WORKERS, max_attempts=DEFAULT_MAX_ATTEMPTS):
+        self.app = app
+        self.workers = workers
+        self.max_attempts = max_attempts
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._threads = []
+        self.processed = 0
+        self.failed = 0
+        self.dead_lettered = 0
+        self.total_lag_seconds = 0.0
+        self.max_lag_seconds = 0.0
+
+    def start(self):
+        if self._threads:
+            return
+        with self._lock:
+            if self._threads:
+                return
+            self._threads = [
+                threading.Thread(target=self._run, name=f"webhook-inbox-{i}", daemon=True)
+                for i in range(self.workers)
+            ]
+        for thread in self._threads:
+            thread.start()
+
+    def notify(self):
+        """Wake the workers now instead of at their next poll."""
+        self._wake.set()
+
+    def _run(self):
+        while True:
+            try:
+                if not self.drain():
+                    self._wake.wait(POLL_INTERVAL)
+                    self._wake.clear()
+            except Exception as e:
+                print("Webhook inbox error:", e)
+                time.sleep(POLL_INTERVAL)
+
+    def drain(self, limit=CLAIM_BATCH):
+        """Claim and process one batch; returns how many events were handled."""
+        with self.app.app_context():
+            ids = claim_events(limit)
+        for event_id in ids:
+            with self.app.app_context():
+                self.process(event_id)
+        return len(ids)
+
+    def process(self, event_id):
+        event = db.session.get(WebhookEvent, event_id)
+        try:
+            EVENT_HANDLERS[event.provider](event.payload)
+            event.attempts += 1
+            event.status = "done"
+            event.processed_at = datetime.utcnow()
+            event.last_error = None
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            self._failed(event_id, e)
+            return False
+
+        # a sale may have queued a contract PDF
+        if get_contract_renderer():
+            get_contract_renderer().notify()
+
+        lag = (event.processed_at - event.received_at).total_seconds()
+        with self._lock:
+            self.processed += 1
+            self.total_lag_seconds += lag
+            self.max_lag_seconds = max(self.max_lag_seconds, lag)
+        return True
+
+    def _failed(self, event_id, error):
+        # the rollback discarded everything, so the attempt is counted on a fresh load
+        event = db.session.get(WebhookEvent, event_id)
+        event.attempts += 1
+        event.last_error = f"{type(error).__name__}: {error}"[:2000]
+        if event.attempts >= self.max_attempts:
+            event.status = "dead"
+            print(f"Webhook event {event.id} dead-lettered after {event.attempts} attempts:", error)
+        else:
+            event.status = "pending"
+            event.next_attempt_at = datetime.utcnow() + timedelta(seconds=retry_delay(event.attempts))
+            print(f"Webhook event {event.id} failed (attempt {event.attempts}):", error)
+        db.session.commit()
+        with self._lock:
+            self.failed += 1
+            self.dead_lettered += event.status == "dead"
+
+    def metrics(self):
+        """Inbox depth and lag from the table, plus this process's counters. Needs an app context."""
+        counts = dict(
+            db.session.query(WebhookEvent.status, func.count(WebhookEvent.id))
+            .group_by(WebhookEvent.status)
+            .all()
+        )
+        oldest = db.session.query(func.min(WebhookEvent.received_at)).filter(
+            WebhookEvent.status.in_(("pending", "processing"))
+        ).scalar()
+        with self._lock:
+            return {
+                "workers": self.workers,
+                "running": bool(self._threads),
+                "pending": counts.get("pending", 0),
+                "processing": counts.get("processing", 0),
+                "dead": counts.get("dead", 0),
+                "oldest_pending_age_s": round((datetime.utcnow() - oldest).total_seconds(), 1) if oldest else 0,
+                "processed": self.processed,
+                "failed": self.failed,
+                "dead_lettered": self.dead_lettered,
+                "avg_lag_s": round(self.total_lag_seconds / self.processed, 3) if self.processed else None,
+                "max_lag_s": round(self.max_lag_seconds, 3),
+            }
+
+
+_inbox = None
+
+
+def init_webhook_inbox(app):
+    """
+    Configure from WEBHOOK_WORKERS and WEBHOOK_MAX_ATTEMPTS. The workers
+    start with the first request, so CLI commands never run them.
+    """
+    global _inbox
+    _inbox = WebhookInbox(
+        app,
+        workers=int(app.config.get("WEBHOOK_WORKERS", DEFAULT_WEBHOOK_WORKERS)),
+        max_attempts=int(app.config.get("WEBHOOK_MAX_ATTEMPTS", DEFAULT_MAX_ATTEMPTS))
+    )
+    if _inbox.workers > 0:
+        app.before_request(_inbox.start)
+    return _inbox
+
+
+def get_webhook_inbox():
+    return _inbox
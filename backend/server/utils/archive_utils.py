@@ -0,0 +1,311 @@
+import io
+import os
+import struct
+import posixpath
+import zipfile
+
+MAX_ARCHIVE_ENTRIES = 2000
+MAX_UNCOMPRESSED_TOTAL = 8 * 1024 * 1024 * 1024
+# audio barely compresses; anything squeezing harder than this is suspicious
+MAX_COMPRESSION_RATIO = 50
+COMPRESSION_RATIO_MIN_SIZE = 1024 * 1024
+
+# only the first bytes of each audio entry are decompressed, to read its header
+HEADER_PROBE_BYTES = 8 * 1024
+MAX_PROBED_ENTRIES = 300
+
+# a local header's name and extra field are 16-bit lengths each
+MAX_LOCAL_FIELD_BYTES = 2 * 0xFFFF
+# local headers within this many bytes of the first in a group share one range request
+LOCAL_HEADER_RANGE_BYTES = 1024 * 1024
+
+ENTRY_KINDS = {
+    "audio": {"wav", "mp3", "aif", "aiff", "flac", "ogg"},
+    "midi": {"mid", "midi"},
+    "preset": {"fxp", "fxb", "nmsv", "vital", "serumpreset", "adg", "adv"},
+    "document": {"txt", "pdf", "rtf", "md"},
+}
+
+# OS metadata that archivers add; skipped rather than rejected
+IGNORED_ENTRY_PREFIXES = ("__MACOSX/",)
+IGNORED_ENTRY_NAMES = {".DS_Store", "Thumbs.db", "desktop.ini"}
+
+MPEG1_L3_BITRATES = [0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320]
+MPEG2_L3_BITRATES = [0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160]
+# indexed by the header's version bits: 0 = MPEG 2.5, 2 = MPEG 2, 3 = MPEG 1
+MPEG_SAMPLE_RATES = {0: [11025, 12000, 8000], 2: [22050, 24000, 16000], 3: [44100, 48000, 32000]}
+
+
+class ArchiveError(ValueError):
+    pass
+
+
+class StorageRangeReader(io.RawIOBase):
+    """
+    Seekable read-only view of a stored file that fetches only the byte
+    ranges asked for, so zipfile can read a stored archive's central
+    directory without downloading the archive.
+    """
+
+    def __init__(self, storage, location, block_size=64 * 1024):
+        super().__init__()
+        self.storage = storage
+        self.location = location
+        self.block_size = block_size
+        self.position = 0
+        self._buffer_start = 0
+        self._buffer = b""
+        try:
+            self.size = storage.size(location)
+        except Exception:
+            raise ArchiveError("Could not determine archive size")
+
+    def _get(self, start, end):
+        try:
+            return self.storage.get_range(self.location, start, end)
+        except Exception:
+            raise ArchiveError("Storage does not support range requests for this archive")
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def tell(self):
+        return self.position
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        if whence == io.SEEK_SET:
+            self.position = offset
+        elif whence == io.SEEK_CUR:
+            self.position += offset
+        elif whence == io.SEEK_END:
+            self.position = self.size + offset
+        return self.position
+
+    def read(self, size=-1):
+        if size is None or size < 0:
+            size = self.size - self.position
+        size = min(size, self.size - self.position)
+        if size <= 0:
+            return b""
+
+        end = self.position + size
+        buffer_end = self._buffer_start + len(self._buffer)
+        if not (self._buffer_start <= self.position and end <= buffer_end):
+            fetch_end = min(self.size, max(end, self.position + self.block_size)) - 1
+            self._buffer = self._get(self.position, fetch_end)
+            self._buffer_start = self.position
+
+        offset = self.position - self._buffer_start
+        data = self._buffer[offset:offset + size]
+        self.position += len(data)
+        return data
+
+    def readinto(self, b):
+        data = self.read(len(b))
+        b[:len(data)] = data
+        return len(data)
+
+
+def _extension(name):
+    return name.rsplit(".", 1)[1].lower() if "." in name else ""
+
+
+def entry_kind(name):
+    ext = _extension(name)
+    for kind, extensions in ENTRY_KINDS.items():
+        if ext in extensions:
+            return kind
+    return None
+
+
+def _is_ignored(name):
+    return name.startswith(IGNORED_ENTRY_PREFIXES) or posixpath.basename(name) in IGNORED_ENTRY_NAMES
+
+
+def wav_duration(header, file_size):
+    """Duration from the RIFF fmt/data chunks at the start of a WAV file."""
+    if header[:4] != b"RIFF" or header[8:12] != b"WAVE":
+        return None
+
+    pos = 12
+    byte_rate = None
+    while pos + 8 <= len(header):
+        chunk_id = header[pos:pos + 4]
+        chunk_size = int.from_bytes(header[pos + 4:pos + 8], "little")
+        if chunk_id == b"fmt " and pos + 20 <= len(header):
+            byte_rate = int.from_bytes(header[pos + 16:pos + 20], "little")
+        elif chunk_id == b"data":
+            # streamed WAVs often leave the data size unset
+            data_size = min(chunk_size, file_size - pos - 8)
+            return round(data_size / byte_rate, 2) if byte_rate else None
+        pos += 8 + chunk_size + (chunk_size & 1)
+    return None
+
+
+def mp3_duration(header, file_size):
+    """
+    Exact duration from a Xing/Info header when the encoder wrote one,
+    otherwise an estimate from the first frame's bitrate (exact for CBR).
+    """
+    pos = 0
+    if header[:3] == b"ID3" and len(header) >= 10:
+        tag_size = 0
+        for byte in header[6:10]:
+            tag_size = (tag_size << 7) | (byte & 0x7F)
+        pos = 10 + tag_size
+
+    while pos + 4 <= len(header):
+        if header[pos] == 0xFF and header[pos + 1] & 0xE0 == 0xE0:
+            version = (header[pos + 1] >> 3) & 0x03
+            layer = (header[pos + 1] >> 1) & 0x03
+            index = header[pos + 2] >> 4
+            rate_index = (header[pos + 2] >> 2) & 0x03
+            if layer == 1 and 0 < index < 15 and rate_index < 3 and version != 1:
+                sample_rate = MPEG_SAMPLE_RATES[version][rate_index]
+                samples_per_frame = 1152 if version == 3 else 576
+
+                for tag in (b"Xing", b"Info"):
+                    tag_pos = header.find(tag, pos + 4, pos + 64)
+                    if tag_pos != -1 and tag_pos + 12 <= len(header):
+                        flags = int.from_bytes(header[tag_pos + 4:tag_pos + 8], "big")
+                        if flags & 0x1:
+                            frames = int.from_bytes(header[tag_pos + 8:tag_pos + 12], "big")
+                            return round(frames * samples_per_frame / sample_rate, 2)
+
+                table = MPEG1_L3_BITRATES if version == 3 else MPEG2_L3_BITRATES
+                return round((file_size - pos) * 8 / (table[index] * 1000), 2)
+        pos += 1
+    return None
+
+
+def _probe_duration(archive, info):
+    ext = _extension(info.filename)
+    if ext not in ("wav", "mp3"):
+        return None
+    try:
+        with archive.open(info) as entry:
+            header = entry.read(HEADER_PROBE_BYTES)
+    except Exception:
+        return None
+    if ext == "wav":
+        return wav_duration(header, info.file_size)
+    return mp3_duration(header, info.file_size)
+
+
+def _local_field_lengths(fileobj, infos):
+    """
+    {info: name + extra field length} from each entry's local header.
+    Headers near each other are read in one range, so a stored archive
+    costs a few range requests rather than one per entry.
+    """
+    groups = []
+    for info in sorted(infos, key=lambda info: info.header_offset):
+        if groups and info.header_offset + zipfile.sizeFileHeader - groups[-1][0].header_offset <= LOCAL_HEADER_RANGE_BYTES:
+            groups[-1].append(info)
+        else:
+            groups.append([info])
+
+    lengths = {}
+    for group in groups:
+        base = group[0].header_offset
+        fileobj.seek(base)
+        data = fileobj.read(group[-1].header_offset + zipfile.sizeFileHeader - base)
+        for info in group:
+            header = data[info.header_offset - base:info.header_offset - base + zipfile.sizeFileHeader]
+            if len(header) != zipfile.sizeFileHeader or header[:4] != zipfile.stringFileHeader:
+                raise ArchiveError(f"Archive has a corrupt local header for {info.filename}")
+            name_length, extra_length = struct.unpack("<HH", header[26:30])
+            lengths[info] = name_length + extra_length
+    return lengths
+
+
+def _check_overlaps(fileobj, infos, directory_offset):
+    """
+    Reject entries that overlap each other or the central directory, the
+    trick behind non-recursive zip bombs. Each entry spans from its local
+    header to the end of its data, which starts after that header's
+    variable-length fields; the spans must be disjoint. The central
+    directory bounds those fields, so only entries that could reach the
+    next one have their local header read.
+    """
+    ordered = sorted(infos, key=lambda info: info.header_offset)
+    limits = [info.header_offset for info in ordered[1:]] + [directory_offset]
+    unsure = []
+    for info, limit in zip(ordered, limits):
+        shortest_end = info.header_offset + zipfile.sizeFileHeader + info.compress_size
+        if shortest_end > limit:
+            raise ArchiveError("Archive contains overlapping entries")
+        if shortest_end + MAX_LOCAL_FIELD_BYTES > limit:
+            unsure.append((info, limit))
+
+    lengths = _local_field_lengths(fileobj, [info for info, _ in unsure])
+    for info, limit in unsure:
+        if info.header_offset + zipfile.sizeFileHeader + lengths[info] + info.compress_size > limit:
+            raise ArchiveError("Archive contains overlapping entries")
+
+
+def inspect_zip(fileobj, allowed_kinds=("audio", "midi", "document")):
+    """
+    Validate a ZIP from its central directory and build a manifest of its
+    contents. Nothing is extracted: only the directory and the first few KB
+    of each audio entry (for durations) are read.
+    """
+    try:
+        archive = zipfile.ZipFile(fileobj)
+    except zipfile.BadZipFile:
+        raise ArchiveError("File is not a valid ZIP archive")
+
+    infos = archive.infolist()
+    if len(infos) > MAX_ARCHIVE_ENTRIES:
+        raise ArchiveError(f"Archive has more than {MAX_ARCHIVE_ENTRIES} entries")
+    _check_overlaps(fileobj, infos, archive.start_dir)
+
+    entries = []
+    total_uncompressed = 0
+    for info in infos:
+        name = info.filename
+        if info.is_dir() or _is_ignored(name):
+            continue
+        if name.startswith("/") or ".." in name.split("/") or ":" in name:
+            raise ArchiveError(f"Unsafe path in archive: {name}")
+        if info.flag_bits & 0x1:
+            raise ArchiveError("Encrypted archives are not supported")
+
+        kind = entry_kind(name)
+        if kind not in allowed_kinds:
+            raise ArchiveError(f"Unexpected file type in archive: {name}")
+
+        if (
+            info.file_size > COMPRESSION_RATIO_MIN_SIZE
+            and info.file_size > MAX_COMPRESSION_RATIO * max(info.compress_size, 1)
+        ):
+            raise ArchiveError(f"Suspicious compression ratio for {name}")
+
+        total_uncompressed += info.file_size
+        if total_uncompressed > MAX_UNCOMPRESSED_TOTAL:
+            raise ArchiveError("Archive expands beyond the allowed size")
+
+        entries.append({
+            "name": name,
+            "kind": kind,
+            "size": info.file_size,
+            "compressed_size": info.compress_size,
+            "duration": _probe_duration(archive, info) if kind == "audio" and len(entries) < MAX_PROBED_ENTRIES else None,
+        })
+
+    if not entries:
+        raise ArchiveError("Archive is empty")
+
+    fileobj.seek(0, os.SEEK_END)
+    archive_size = fileobj.tell()
+    fileobj.seek(0)
+
+    return {
+        "archive_size": archive_size,
+        "entry_count": len(entries),
+        "total_uncompressed": total_uncompressed,
+        "entries": entries,
+    }
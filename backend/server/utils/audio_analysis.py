@@ -0,0 +1,142 @@
+import numpy as np
+
+# Long tracks are analysed over a centred window so a full-length upload
+# costs the same as a two-minute one.
+MAX_ANALYSIS_SECONDS = 120
+
+MIN_BPM = 60
+MAX_BPM = 200
+
+ONSET_FRAME_SIZE = 1024
+ONSET_HOP = 256
+CHROMA_FRAME_SIZE = 4096
+CHROMA_HOP = 2048
+
+PITCH_CLASSES = ["C", "C#", "D", "D#", "E", "F", "F#", "G", "G#", "A", "A#", "B"]
+
+# Krumhansl-Kessler key profiles, tonic first
+MAJOR_PROFILE = np.array([6.35, 2.23, 3.48, 2.33, 4.38, 4.09, 2.52, 5.19, 2.39, 3.66, 2.29, 2.88])
+MINOR_PROFILE = np.array([6.33, 2.68, 3.52, 5.38, 2.60, 3.53, 2.54, 4.75, 3.98, 2.69, 3.34, 3.17])
+
+
+def _analysis_window(samples, sample_rate):
+    max_len = MAX_ANALYSIS_SECONDS * sample_rate
+    if len(samples) <= max_len:
+        return samples
+    start = (len(samples) - max_len) // 2
+    return samples[start:start + max_len]
+
+
+def _stft_magnitude(x, frame_size, hop):
+    """|STFT| of a float signal as a (frames, bins) float32 array."""
+    if len(x) < frame_size:
+        x = np.pad(x, (0, frame_size - len(x)))
+    frames = np.lib.stride_tricks.sliding_window_view(x, frame_size)[::hop]
+    window = np.hanning(frame_size).astype(np.float32)
+    return np.abs(np.fft.rfft(frames * window, axis=1)).astype(np.float32)
+
+
+def onset_envelope(x, sample_rate):
+    """Half-wave rectified spectral flux of the log spectrum, one value per hop."""
+    mag = np.log1p(100.0 * _stft_magnitude(x, ONSET_FRAME_SIZE, ONSET_HOP))
+    flux = np.maximum(np.diff(mag, axis=0), 0.0).sum(axis=1)
+
+    # subtract a ~0.5s moving average so slow loudness changes don't read as onsets
+    width = max(1, int(0.5 * sample_rate / ONSET_HOP))
+    local_mean = np.convolve(flux, np.ones(width) / width, mode="same")
+    return np.maximum(flux - local_mean, 0.0), sample_rate / ONSET_HOP
+
+
+def estimate_tempo(x, sample_rate):
+    """
+    Tempo from the autocorrelation of the onset envelope. Each candidate lag
+    also collects evidence from its double, and a log-normal prior centred
+    on 120 BPM breaks octave ties. Returns (bpm, confidence in [0, 1]).
+    """
+    env, fps = onset_envelope(x, sample_rate)
+    env = env - env.mean()
+    n = len(env)
+    if n < 4:
+        return None, 0.0
+
+    spectrum = np.fft.rfft(env, 2 * n)
+    ac = np.fft.irfft(spectrum * np.conj(spectrum))[:n]
+    if ac[0] <= 0:
+        return None, 0.0
+    ac = ac / ac[0]
+
+    min_lag = max(1, int(np.floor(60.0 * fps / MAX_BPM)))
+    max_lag = min(n // 2 - 1, int(np.ceil(60.0 * fps / MIN_BPM)))
+    if max_lag <= min_lag:
+        return None, 0.0
+
+    lags = np.arange(min_lag, max_lag + 1)
+    bpms = 60.0 * fps / lags
+    prior = np.exp(-0.5 * np.log2(bpms / 120.0) ** 2)
+    score = (ac[lags] + 0.5 * ac[2 * lags]) * prior
+
+    best = int(np.argmax(score))
+    lag = float(lags[best])
+    # parabolic interpolation between neighbouring lags for sub-frame precision
+    if 0 < best < len(score) - 1:
+        left, centre, right = score[best - 1], score[best], score[best + 1]
+        denom = left - 2 * centre + right
+        if denom != 0:
+            lag += 0.5 * (left - right) / denom
+
+    bpm = round(float(60.0 * fps / lag), 1)
+    confidence = float(np.clip(ac[lags[best]], 0.0, 1.0))
+    return bpm, round(confidence, 3)
+
+
+def chroma_profile(x, sample_rate):
+    """12-bin pitch class energy, each frame normalised before summing."""
+    mag = _stft_magnitude(x, CHROMA_FRAME_SIZE, CHROMA_HOP)
+    freqs = np.fft.rfftfreq(CHROMA_FRAME_SIZE, 1.0 / sample_rate)
+    valid = (freqs >= 55.0) & (freqs <= 2000.0)
+
+    pitch_class = (np.round(12 * np.log2(freqs[valid] / 440.0)).astype(int) + 9) % 12
+    mapping = np.zeros((valid.sum(), 12), dtype=np.float32)
+    mapping[np.arange(valid.sum()), pitch_class] = 1.0
+
+    frames = mag[:, valid] @ mapping
+    peaks = frames.max(axis=1, keepdims=True)
+    frames = np.divide(frames, peaks, out=np.zeros_like(frames), where=peaks > 0)
+    return frames.sum(axis=0)
+
+
+def estimate_key(x, sample_rate):
+    """
+    Key by correlating the chroma profile against all 24 rotated major and
+    minor Krumhansl profiles. Returns ("C# minor", confidence in [0, 1]).
+    """
+    chroma = chroma_profile(x, sample_rate)
+    if not chroma.any():
+        return None, 0.0
+
+    profiles = np.stack(
+        [np.roll(MAJOR_PROFILE, k) for k in range(12)]
+        + [np.roll(MINOR_PROFILE, k) for k in range(12)]
+    )
+    profiles = (profiles - profiles.mean(axis=1, keepdims=True)) / profiles.std(axis=1, keepdims=True)
+    chroma = (chroma - chroma.mean()) / (chroma.std() or 1.0)
+    correlations = profiles @ chroma / 12.0
+
+    best = int(np.argmax(correlations))
+    mode = "major" if best < 12 else "minor"
+    key = f"{PITCH_CLASSES[best % 12]} {mode}"
+    confidence = float(np.clip(correlations[best], 0.0, 1.0))
+    return key, round(confidence, 3)
+
+
+def analyze_audio(samples, sample_rate):
+    """Tempo and key of int16 PCM, bounded to MAX_ANALYSIS_SECONDS of audio."""
+    x = _analysis_window(samples, sample_rate).astype(np.float32) / 32768.0
+    bpm, bpm_confidence = estimate_tempo(x, sample_rate)
+    key, key_confidence = estimate_key(x, sample_rate)
+    return {
+        "detected_bpm": bpm,
+        "bpm_confidence": bpm_confidence,
+        "detected_key": key,
+        "key_confidence": key_confidence,
+    }
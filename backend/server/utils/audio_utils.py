@@ -1,20 +1,118 @@
+import os
 import ffmpeg
-import tempfile
+import numpy as np
 
 PREVIEW_DURATION_MS = 30 * 1000
-def create_preview(file_storage, start_time=0):
+ANALYSIS_SAMPLE_RATE = 22050
+
+HLS_BITRATES = ["48k", "96k", "160k"]
+HLS_SEGMENT_SECONDS = 4
+HLS_MASTER_PLAYLIST = "master.m3u8"
+
+PREVIEW_SAMPLE_RATE = 44100
+WATERMARK_INTERVAL_SECONDS = 10
+
+
+def _ffmpeg_source(source):
+    """
+    Returns (input spec, stdin bytes) for ffmpeg. Paths and URLs are read by
+    ffmpeg directly; raw bytes and uploaded file objects are piped in
+    through stdin.
+    """
+    if isinstance(source, str):
+        return source, None
+    if isinstance(source, bytes):
+        return "pipe:", source
+
+    source.seek(0)
+    data = source.read()
+    source.seek(0)
+    return "pipe:", data
+
+
+def _overlay_watermark(audio, watermark, interval):
+    """
+    Mix the watermark clip into audio once every interval seconds: the clip
+    is padded with silence to exactly one interval and looped for as long
+    as the preview runs.
+    """
+    stereo = {"sample_fmts": "fltp", "sample_rates": PREVIEW_SAMPLE_RATE, "channel_layouts": "stereo"}
+    tag = (
+        ffmpeg.input(watermark)['a']
+        .filter("aformat", **stereo)
+        .filter("apad", whole_dur=interval)
+        .filter("atrim", duration=interval)
+        .filter("aloop", loop=-1, size=int(interval * PREVIEW_SAMPLE_RATE))
+    )
+    return ffmpeg.filter(
+        [audio.filter("aformat", **stereo), tag],
+        "amix", inputs=2, duration="first", dropout_transition=0, normalize=0
+    )
+
+
+def create_preview(file_storage, output_path, start_time=0, hls_dir=None,
+                   watermark=None, watermark_interval=WATERMARK_INTERVAL_SECONDS):
+    """
+    Cut the preview MP3 to output_path. When hls_dir is given the same
+    ffmpeg pass also writes an AAC HLS ladder there: master.m3u8 plus
+    v<N>/index.m3u8 and HLS_SEGMENT_SECONDS segments for each bitrate in
+    HLS_BITRATES. The caller owns both locations and their cleanup.
+    watermark is the path or URL of a voice tag mixed in every
+    watermark_interval seconds.
+    """
     try:
-        temp_file = tempfile.NamedTemporaryFile(delete=False, suffix=".mp3")
+        spec, data = _ffmpeg_source(file_storage)
+
+        audio = ffmpeg.input(spec, ss=start_time, t=PREVIEW_DURATION_MS / 1000)['a']
+        renditions = 1 + (len(HLS_BITRATES) if hls_dir else 0)
+        if watermark:
+            # a filtered stream feeds a single output, so split it per rendition
+            mixed = _overlay_watermark(audio, watermark, watermark_interval).filter_multi_output("asplit", renditions)
+            streams = [mixed[i] for i in range(renditions)]
+        else:
+            streams = [audio] * renditions
+
+        outputs = [streams[0].output(output_path, format='mp3', acodec='libmp3lame')]
+
+        if hls_dir:
+            bitrates = {f"b:a:{i}": rate for i, rate in enumerate(HLS_BITRATES)}
+            outputs.append(ffmpeg.output(
+                *streams[1:],
+                os.path.join(hls_dir, "v%v", "index.m3u8"),
+                format="hls",
+                hls_time=HLS_SEGMENT_SECONDS,
+                hls_playlist_type="vod",
+                hls_segment_filename=os.path.join(hls_dir, "v%v", "seg%03d.ts"),
+                master_pl_name=HLS_MASTER_PLAYLIST,
+                var_stream_map=" ".join(f"a:{i}" for i in range(len(HLS_BITRATES))),
+                **{"c:a": "aac"},
+                **bitrates
+            ))
 
         (
             ffmpeg
-            .input(file_storage, ss=start_time, t=PREVIEW_DURATION_MS / 1000)
-            .output(temp_file.name, format='mp3', acodec='libmp3lame')
+            .merge_outputs(*outputs)
             .overwrite_output()
-            .run(quiet=True)
+            .run(input=data, quiet=True)
         )
 
-        return temp_file.name
+        return output_path
     except Exception as e:
         print("Preview generation failed:", e)
         return None
+
+
+def decode_pcm(source, sample_rate=ANALYSIS_SAMPLE_RATE):
+    """Decode any ffmpeg-readable audio to mono int16 PCM as a NumPy array."""
+    try:
+        spec, data = _ffmpeg_source(source)
+        out, _ = (
+            ffmpeg
+            .input(spec)
+            .output("pipe:", format="s16le", acodec="pcm_s16le", ac=1, ar=sample_rate)
+            .run(input=data, capture_stdout=True, capture_stderr=True)
+        )
+        return np.frombuffer(out, dtype=np.int16)
+    except Exception as e:
+        print("Audio decode failed:", e)
+        return None
@@ -1,23 +1,66 @@
-
+from functools import lru_cache
 from fpdf import FPDF
-import tempfile
-from server.service.upload_service import upload_to_cloudinary
+from server.service.upload_service import upload_to_storage
+from server.service.scratch import get_scratch
+from server.service.task_pool import get_cpu_pool
 
-def generate_contract_pdf(template, buyer, beat, file_type):
+
+LINE_HEIGHT = 10
+
+
+def _new_document():
     pdf = FPDF()
     pdf.add_page()
     pdf.set_font("Arial", size=12)
-    
-    pdf.multi_cell(0, 10, f"Contract Type: {template.contract_type}")
-    pdf.multi_cell(0, 10, f"Buyer: {buyer.name}")
-    pdf.multi_cell(0, 10, f"Beat: {beat.title}")
-    pdf.multi_cell(0, 10, f"File Type: {file_type}")
-    pdf.multi_cell(0, 10, f"Price: {template.price}")
-    pdf.multi_cell(0, 10, f"Terms:\n{template.terms}")
-
-    tmp_file = tempfile.NamedTemporaryFile(delete=False, suffix=".pdf")
-    pdf.output(tmp_file.name)
-
-   
-    upload_result = upload_to_cloudinary(tmp_file.name, folder="contracts")
+    return pdf
+
+
+@lru_cache(maxsize=128)
+def template_layout(contract_type, price, terms):
+    """
+    Line wrapping of the parts of a contract that only depend on its
+    template: (lines above the sale fields, lines below). Only the
+    wrapping is cached, not rendered output; every contract still lays
+    out and writes its own PDF. Wrapping long terms is most of that cost,
+    so it is done once per template per process, and an edited template
+    gets a new entry.
+    """
+    pdf = _new_document()
+    # split_only is fpdf2 2.7's way to wrap without drawing; later releases
+    # deprecate it for dry_run=True, output="LINES"
+    wrap = lambda text: pdf.multi_cell(0, LINE_HEIGHT, text, split_only=True)
+    head = wrap(f"Contract Type: {contract_type}")
+    tail = wrap(f"Price: {price}") + wrap(f"Terms:\n{terms}")
+    return head, tail
+
+
+def render_contract_pdf(pdf_path, contract_type, price, terms, fields):
+    """Write the contract PDF; plain arguments only, so it can run in the CPU pool."""
+    head, tail = template_layout(contract_type, price, terms)
+    pdf = _new_document()
+
+    for line in head:
+        pdf.cell(0, LINE_HEIGHT, line, new_x="LMARGIN", new_y="NEXT")
+    for field in fields:
+        # return to the left margin after each cell, or the next full-width cell has no room
+        pdf.multi_cell(0, LINE_HEIGHT, field, new_x="LMARGIN", new_y="NEXT")
+    for line in tail:
+        pdf.cell(0, LINE_HEIGHT, line, new_x="LMARGIN", new_y="NEXT")
+
+    pdf.output(pdf_path)
+    return pdf_path
+
+
+def generate_contract_pdf(template, buyer, beat, file_type):
+    fields = [
+        f"Buyer: {buyer.name}",
+        f"Beat: {beat.title}",
+        f"File Type: {file_type}",
+    ]
+
+    with get_scratch().file(suffix=".pdf") as pdf_path:
+        get_cpu_pool().run(
+            render_contract_pdf, pdf_path, template.contract_type, template.price, template.terms or "", fields
+        )
+        upload_result = upload_to_storage(pdf_path, folder="contracts")
     return upload_result["url"]
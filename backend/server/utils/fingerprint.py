@@ -0,0 +1,117 @@
+import numpy as np
+
+# fingerprints are taken at half the analysis rate (~11kHz); the hashed
+# range stays below 5.5kHz where peaks survive lossy re-encoding
+DOWNSAMPLE = 2
+FRAME_SIZE = 1024
+HOP = 256
+MAX_FINGERPRINT_SECONDS = 600
+
+# peak picking: a bin is a peak if it is the maximum of its neighbourhood
+NEIGHBOURHOOD_BINS = 15
+NEIGHBOURHOOD_FRAMES = 10
+PEAKS_PER_SECOND = 8
+
+# pairing: every anchor is paired with the next FAN_OUT peaks that fall in
+# its target zone; (f1, f2, dt) is packed into one 30-bit hash
+FAN_OUT = 5
+MAX_DELTA_FRAMES = 128
+FREQ_BITS = 10
+DELTA_BITS = 10
+
+
+def _max_filter_1d(x, size, axis):
+    pad = [(0, 0)] * x.ndim
+    pad[axis] = (size, size)
+    padded = np.pad(x, pad, mode="constant", constant_values=-np.inf)
+    windows = np.lib.stride_tricks.sliding_window_view(padded, 2 * size + 1, axis=axis)
+    return windows.max(axis=-1)
+
+
+def spectral_peaks(samples, sample_rate):
+    """(frame, bin) coordinates of the strongest local spectrogram maxima."""
+    x = samples[:MAX_FINGERPRINT_SECONDS * sample_rate].astype(np.float32) / 32768.0
+    # averaging neighbours is a crude low-pass that's good enough before decimating
+    x = x[:len(x) - len(x) % DOWNSAMPLE].reshape(-1, DOWNSAMPLE).mean(axis=1)
+    sample_rate = sample_rate // DOWNSAMPLE
+    if len(x) < FRAME_SIZE:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+
+    frames = np.lib.stride_tricks.sliding_window_view(x, FRAME_SIZE)[::HOP]
+    window = np.hanning(FRAME_SIZE).astype(np.float32)
+    spec = np.log1p(1000.0 * np.abs(np.fft.rfft(frames * window, axis=1)))
+    spec = spec[:, 1:]
+
+    # a rectangular max filter is separable, so two 1-D passes are exact
+    local_max = _max_filter_1d(_max_filter_1d(spec, NEIGHBOURHOOD_FRAMES, 0), NEIGHBOURHOOD_BINS, 1)
+    is_peak = (spec == local_max) & (spec > spec.mean())
+    times, bins = np.nonzero(is_peak)
+    if len(times) == 0:
+        return times, bins
+
+    # keep only the loudest PEAKS_PER_SECOND peaks in every one-second block
+    strength = spec[times, bins]
+    block = times // max(1, int(sample_rate / HOP))
+    order = np.lexsort((-strength, block))
+    block_sorted = block[order]
+    first_in_block = np.searchsorted(block_sorted, block_sorted, side="left")
+    rank = np.arange(len(order)) - first_in_block
+    keep = np.sort(order[rank < PEAKS_PER_SECOND])
+
+    times, bins = times[keep], bins[keep] + 1
+    order = np.lexsort((bins, times))
+    return times[order], bins[order]
+
+
+def fingerprint(samples, sample_rate):
+    """
+    Constellation hashes of int16 PCM. Returns (hashes, offsets) as int64
+    arrays, where offsets are the anchor frame of each hash.
+    """
+    times, bins = spectral_peaks(samples, sample_rate)
+    hashes, offsets = [], []
+
+    for k in range(1, FAN_OUT + 1):
+        anchor_t, target_t = times[:-k], times[k:]
+        anchor_f, target_f = bins[:-k], bins[k:]
+        delta = target_t - anchor_t
+        valid = (delta > 0) & (delta < MAX_DELTA_FRAMES)
+
+        hashes.append(
+            (anchor_f[valid] << (FREQ_BITS + DELTA_BITS))
+            | (target_f[valid] << DELTA_BITS)
+            | delta[valid]
+        )
+        offsets.append(anchor_t[valid])
+
+    if not hashes:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+    return np.concatenate(hashes).astype(np.int64), np.concatenate(offsets).astype(np.int64)
+
+
+def aligned_match_counts(query_hashes, query_offsets, hit_hashes, hit_items, hit_offsets):
+    """
+    For stored hash hits, the number of hashes each item shares with the
+    query at one consistent time offset. A re-upload of the same audio lines
+    up at a single offset; unrelated tracks only share scattered hashes.
+    Returns {item_id: count}.
+    """
+    if len(hit_hashes) == 0 or len(query_hashes) == 0:
+        return {}
+
+    order = np.argsort(query_hashes, kind="stable")
+    sorted_hashes = query_hashes[order]
+    positions = np.searchsorted(sorted_hashes, hit_hashes)
+    positions = np.clip(positions, 0, len(sorted_hashes) - 1)
+    found = sorted_hashes[positions] == hit_hashes
+
+    deltas = hit_offsets[found] - query_offsets[order][positions[found]]
+    items = hit_items[found]
+    if len(items) == 0:
+        return {}
+
+    pairs, counts = np.unique(np.stack([items, deltas], axis=1), axis=0, return_counts=True)
+    item_ids, index = np.unique(pairs[:, 0], return_inverse=True)
+    best = np.zeros(len(item_ids), dtype=np.int64)
+    np.maximum.at(best, index, counts)
+    return dict(zip(item_ids.tolist(), best.tolist()))
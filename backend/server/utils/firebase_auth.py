@@ -57,14 +57,16 @@ def firebase_auth_required(f):
                     user.role = normalized_role
                     db.session.commit()
 
-          
-            request.current_user = user
-
-            print(f"Authenticated: {user.email} | Role: {user.role}")
-            return f(*args, **kwargs)
 
         except Exception as e:
             print("Auth Error:", e)
             return {"error": "Invalid or expired token"}, 401
 
+        # the view runs outside the try, so its own errors (a busy CPU pool,
+        # a bad upload) reach the client as themselves rather than as a 401
+        request.current_user = user
+
+        print(f"Authenticated: {user.email} | Role: {user.role}")
+        return f(*args, **kwargs)
+
     return decorated_function
@@ -0,0 +1,71 @@
+import io
+from PIL import Image, ImageOps
+
+# longest edge in pixels; covers are square in practice but nothing assumes it
+COVER_VARIANTS = {
+    "thumbnail": 160,
+    "card": 480,
+    "hero": 1200,
+}
+
+# (format, Pillow save options); WebP for browsers that take it, JPEG as the fallback
+COVER_FORMATS = {
+    "webp": {"format": "WEBP", "quality": 80, "method": 4},
+    "jpeg": {"format": "JPEG", "quality": 82, "optimize": True, "progressive": True},
+}
+
+
+def load_cover(data):
+    """
+    Decode an uploaded cover, applying its EXIF orientation. For JPEGs the
+    decoder is asked for the smallest DCT scale still above the hero size,
+    which makes decoding large phone photos several times cheaper.
+    """
+    image = Image.open(io.BytesIO(data))
+    largest = max(COVER_VARIANTS.values())
+    image.draft("RGB", (largest, largest))
+    image = ImageOps.exif_transpose(image)
+    if image.mode not in ("RGB", "RGBA"):
+        image = image.convert("RGBA" if "transparency" in image.info else "RGB")
+    return image
+
+
+def resize_cover(image, max_edge):
+    """A copy scaled so its longest edge is at most max_edge; never upscaled."""
+    variant = image.copy()
+    variant.thumbnail((max_edge, max_edge), Image.LANCZOS)
+    return variant
+
+
+def encode_cover(image, fmt):
+    """
+    Encode a derivative. A fresh image is saved without passing exif or
+    icc_profile, so no metadata from the source is carried over.
+    """
+    if fmt == "jpeg" and image.mode != "RGB":
+        background = Image.new("RGB", image.size, (255, 255, 255))
+        background.paste(image, mask=image.getchannel("A"))
+        image = background
+
+    out = io.BytesIO()
+    image.save(out, **COVER_FORMATS[fmt])
+    return out.getvalue()
+
+
+def render_cover_variants(data):
+    """
+    CPU pool worker: decode the cover once and encode every size in
+    COVER_VARIANTS in every format in COVER_FORMATS. Returns
+    {name: {"width", "height", "webp": bytes, "jpeg": bytes}}.
+    """
+    image = load_cover(data)
+    image.load()
+    variants = {}
+    for name, max_edge in COVER_VARIANTS.items():
+        variant = resize_cover(image, max_edge)
+        variants[name] = dict(
+            width=variant.width,
+            height=variant.height,
+            **{fmt: encode_cover(variant, fmt) for fmt in COVER_FORMATS}
+        )
+    return variants
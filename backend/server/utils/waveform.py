@@ -0,0 +1,36 @@
+import numpy as np
+
+WAVEFORM_RESOLUTIONS = (256, 1024, 4096)
+DEFAULT_WAVEFORM_RESOLUTION = 1024
+
+# Peaks are stored as interleaved [min, max] pairs of signed 8-bit values,
+# i.e. the top byte of each int16 sample. 4096 buckets fit in 8KB.
+WAVEFORM_FORMAT = "int8-minmax"
+
+
+def compute_peaks(samples, buckets):
+    """Min/max peaks of int16 PCM split into `buckets` equal slices."""
+    if len(samples) == 0:
+        return np.zeros(buckets * 2, dtype=np.int8)
+
+    buckets = min(buckets, len(samples))
+    edges = np.linspace(0, len(samples), buckets + 1, dtype=np.int64)[:-1]
+
+    peaks = np.empty(buckets * 2, dtype=np.int8)
+    peaks[0::2] = np.minimum.reduceat(samples, edges) >> 8
+    peaks[1::2] = np.maximum.reduceat(samples, edges) >> 8
+    return peaks
+
+
+def build_waveforms(samples, sample_rate, start_time=0, duration=None):
+    """
+    Peak arrays for every resolution in WAVEFORM_RESOLUTIONS, computed over
+    the [start_time, start_time + duration) window of the decoded track.
+    """
+    start = int(start_time * sample_rate)
+    end = start + int(duration * sample_rate) if duration else len(samples)
+    window = samples[start:end]
+    if len(window) == 0:
+        window = samples
+
+    return {res: compute_peaks(window, res).tobytes() for res in WAVEFORM_RESOLUTIONS}